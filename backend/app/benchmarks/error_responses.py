@@ -0,0 +1,60 @@
+"""
+Cost of handing out an error response: building the BaseResponse model and a
+JSONResponse per hit, against copying a response pre-rendered at import.
+
+Reports time and the memory blocks allocated per response (tracemalloc).
+
+Run from backend/app:
+    python -m benchmarks.error_responses [--number 50000]
+"""
+import argparse, gc, json, timeit, tracemalloc
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+from routers.responses.user import InvalidTokenResponse, INVALID_TOKEN
+
+
+def per_hit():
+    return JSONResponse(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        content=InvalidTokenResponse(
+            status=status.HTTP_401_UNAUTHORIZED,
+            message='Token is invalid or has expired'
+        ).dict()
+    )
+
+def prerendered():
+    return INVALID_TOKEN.response()
+
+
+def allocations(func, number: int) -> tuple[float, float]:
+    # Keep every response alive so the snapshot sees what each one allocates.
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [func() for _ in range(number)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, 'filename')
+    size = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+    del kept
+    return size / number, blocks / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=50_000)
+    args = parser.parse_args()
+
+    assert json.loads(per_hit().body) == json.loads(prerendered().body), 'bodies differ'
+    for func in (per_hit, prerendered):
+        seconds = timeit.timeit(func, number=args.number) / args.number
+        size, blocks = allocations(func, min(args.number, 10_000))
+        print(f'{func.__name__:>12}: {seconds * 1e6:7.2f}us  {size:7.0f} bytes  {blocks:5.1f} blocks per response')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Throughput of the development entry point (one process, reloader on) against
+the production launcher (one worker per CPU, uvloop/httptools when installed).
+
+Each target is started as `python main.py` with its SETTINGS_MODULE, driven
+with concurrent GETs for a fixed duration and stopped with SIGINT so the
+graceful shutdown path runs too. Both need the database from their env file.
+
+Run from backend/app:
+    python -m benchmarks.load [--path /openapi.json] [--concurrency 64] [--duration 10]
+"""
+import argparse, asyncio, os, signal, statistics, subprocess, sys, time
+
+import httpx
+
+from settings import settings
+
+
+async def wait_until_ready(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise TimeoutError(f'{url} did not come up in {timeout}s')
+
+async def drive(url: str, concurrency: int, duration: float) -> tuple[int, int, list[float]]:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        async def worker() -> None:
+            nonlocal errors
+            while time.monotonic() < deadline:
+                started_at = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    if response.status_code >= 500:
+                        errors += 1
+                except httpx.TransportError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started_at)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return len(latencies), errors, latencies
+
+def run(module: str, args: argparse.Namespace) -> None:
+    url = f'http://127.0.0.1:{settings.server_port}{args.path}'
+    server = subprocess.Popen([sys.executable, 'main.py'], env={**os.environ, 'SETTINGS_MODULE': module})
+    try:
+        asyncio.run(wait_until_ready(url))
+        requests, errors, latencies = asyncio.run(drive(url, args.concurrency, args.duration))
+    finally:
+        server.send_signal(signal.SIGINT)
+        server.wait(timeout=60)
+
+    latencies.sort()
+    print(
+        f'{module:>12}: {requests / args.duration:9.0f} req/s  '
+        f'p50 {statistics.median(latencies) * 1e3:7.2f}ms  '
+        f'p99 {latencies[int(len(latencies) * 0.99) - 1] * 1e3:7.2f}ms  '
+        f'errors {errors}'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--path', default='/openapi.json')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--settings', nargs='+', default=['development', 'production'])
+    args = parser.parse_args()
+
+    for module in args.settings:
+        run(module, args)
+
+
+if __name__ == '__main__':
+    main()
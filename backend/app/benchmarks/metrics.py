@@ -0,0 +1,77 @@
+"""
+Per-request overhead of MetricsMiddleware.
+
+Requests are driven straight through the ASGI interface, without a server
+or HTTP client, so the difference between the two runs is the middleware.
+
+Run from backend/app:
+    python -m benchmarks.metrics [--requests 20000]
+"""
+import argparse, asyncio, time
+
+from fastapi import FastAPI
+
+from middlewares.metrics import MetricsMiddleware
+
+
+def _app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get('/api/v1/users/{user_id}')
+    async def get_user(user_id: str) -> dict:
+        return {'id': user_id}
+
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+async def _drive(app: FastAPI, requests: int) -> float:
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': '/api/v1/users/42',
+        'raw_path': b'/api/v1/users/42',
+        'root_path': '',
+        'query_string': b'',
+        'headers': [],
+        'client': ('127.0.0.1', 1234),
+        'server': ('127.0.0.1', 8001),
+    }
+
+    async def receive() -> dict:
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message: dict) -> None:
+        ...
+
+    started_at = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - started_at
+
+
+async def run(requests: int) -> None:
+    results = {}
+    for with_metrics in (False, True):
+        app = _app(with_metrics)
+        await _drive(app, 500)
+        results[with_metrics] = await _drive(app, requests) / requests
+
+    overhead = results[True] - results[False]
+    print(f'without metrics: {results[False] * 1e6:8.2f}us per request')
+    print(f'   with metrics: {results[True] * 1e6:8.2f}us per request')
+    print(f'       overhead: {overhead * 1e6:8.2f}us per request ({overhead / results[False]:.1%})')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == '__main__':
+    main()
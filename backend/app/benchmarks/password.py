@@ -0,0 +1,76 @@
+"""
+p99 latency of an unrelated endpoint during a login storm.
+
+Run from backend/app:
+    python -m benchmarks.password [--storm 64] [--pings 200]
+"""
+import argparse, asyncio, statistics, time
+
+import httpx
+from fastapi import FastAPI
+
+from services.auth import password
+
+
+HASHED = password.get_password_hash('benchmark_password')
+
+app = FastAPI()
+
+
+@app.post('/login/sync')
+async def login_sync() -> dict:
+    return {'ok': password.verify_password('benchmark_password', HASHED)}
+
+@app.post('/login/async')
+async def login_async() -> dict:
+    return {'ok': await password.averify_password('benchmark_password', HASHED)}
+
+@app.get('/ping')
+async def ping() -> dict:
+    return {'status': 'ok'}
+
+
+async def _ping_latencies(client: httpx.AsyncClient, count: int, interval: float = 0.005) -> list[float]:
+    # Latency is measured from the moment a ping was scheduled, so time spent
+    # waiting for a blocked event loop is counted as well.
+    scheduled_at = time.perf_counter()
+
+    async def ping(delay: float) -> float:
+        await client.get('/ping')
+        return time.perf_counter() - (scheduled_at + delay)
+
+    tasks = []
+    for index in range(count):
+        tasks.append(asyncio.create_task(ping(index * interval)))
+        await asyncio.sleep(max(0.0, scheduled_at + (index + 1) * interval - time.perf_counter()))
+    return list(await asyncio.gather(*tasks))
+
+async def run(mode: str, storm: int, pings: int) -> dict:
+    async with httpx.AsyncClient(app=app, base_url='http://bench') as client:
+        logins = [asyncio.create_task(client.post(f'/login/{mode}')) for _ in range(storm)]
+        latencies = await _ping_latencies(client, pings)
+        await asyncio.gather(*logins)
+
+    latencies.sort()
+    return {
+        'mode': mode,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'max_ms': latencies[-1] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--storm', type=int, default=64)
+    parser.add_argument('--pings', type=int, default=200)
+    args = parser.parse_args()
+
+    for mode in ('sync', 'async'):
+        result = asyncio.run(run(mode, args.storm, args.pings))
+        print('{mode:>5}: p50={p50_ms:8.2f}ms p99={p99_ms:8.2f}ms max={max_ms:8.2f}ms'.format(**result))
+    password.shutdown_pool()
+
+
+if __name__ == '__main__':
+    main()
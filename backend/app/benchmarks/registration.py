@@ -0,0 +1,104 @@
+"""
+Registrations per second through crud.user.create against a local Postgres
+(the PG_DSN of the active SETTINGS_MODULE; the users table is recreated).
+
+`legacy` is the previous add/flush/commit/refresh path, `returning` is the
+INSERT ... RETURNING path. Each run also replays every registration once to
+measure rejected duplicates, which the pre-check answers without bcrypt.
+
+Run from backend/app:
+    python -m benchmarks.registration [--users 200] [--concurrency 16] [--rounds 4]
+"""
+import argparse, asyncio, time, uuid
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from sqlmodel import SQLModel
+
+import models, schemas
+from crud import user as usr
+from database.core import async_engine
+from services.auth import password
+from settings import settings
+
+
+async def legacy_create(data: dict, _session: AsyncSession) -> schemas.UserWithID | None:
+    data = dict(data)
+    data['password'] = await password.aget_password_hash(data['password'])
+    del data['confirm_password']
+    try:
+        user_data = models.User(**data)
+        _session.add(user_data)
+        await _session.flush()
+        await _session.commit()
+        await _session.refresh(user_data)
+        return schemas.UserWithID(
+            id=str(user_data.id),
+            name=user_data.name,
+            surname=user_data.surname,
+            login=user_data.login,
+            photo=user_data.photo,
+            is_active=user_data.is_active,
+        )
+    except IntegrityError:
+        await _session.rollback()
+        return
+
+
+def _users(count: int) -> list[dict]:
+    users = []
+    for _ in range(count):
+        suffix = uuid.uuid4().hex[:12]
+        users.append({
+            'name': 'bench',
+            'surname': 'bench',
+            'login': f'bench_{suffix}',
+            'email': f'bench_{suffix}@example.com',
+            'photo': None,
+            'role': 'user',
+            'password': 'bench_password',
+            'confirm_password': 'bench_password',
+        })
+    return users
+
+async def _register(create, users: list[dict], concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(data: dict) -> None:
+        async with semaphore:
+            async with AsyncSession(bind=async_engine) as session:
+                await create(dict(data), session)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(one(data) for data in users))
+    return len(users) / (time.perf_counter() - started_at)
+
+async def run(users: int, concurrency: int) -> None:
+    async with async_engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.drop_all)
+        await connection.run_sync(SQLModel.metadata.create_all)
+
+    for name, create in (('legacy', legacy_create), ('returning', usr.create)):
+        batch = _users(users)
+        created = await _register(create, batch, concurrency)
+        duplicates = await _register(create, batch, concurrency)
+        print(f'{name:>9}: {created:8.1f} registrations/s, {duplicates:8.1f} duplicate rejections/s')
+
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=4, help='bcrypt log rounds, lowered to keep the DB path visible')
+    args = parser.parse_args()
+
+    password.pwd_cxt.update(bcrypt__rounds=args.rounds)
+    settings.user_create_precheck = True
+    asyncio.run(run(args.users, args.concurrency))
+    password.shutdown_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Response serialization cost of /users/get and /auth/login: FastAPI's default
+path (response_model validation, jsonable_encoder, stdlib json) against the
+prevalidated route with orjson.
+
+Only the work done after the handler returns is measured.
+
+Run from backend/app:
+    python -m benchmarks.serialization [--number 20000]
+"""
+import argparse, timeit, uuid
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field, create_cloned_field
+
+import schemas
+from routers.responses.user import UserLoginSuccessfullyResponse
+
+
+PAYLOADS = {
+    '/users/get': schemas.UserWithID(
+        id=str(uuid.uuid4()),
+        login='benchmark',
+        name='Bench',
+        surname='Mark',
+        photo='media/benchmark.png',
+        is_active=True,
+    ),
+    '/auth/login': UserLoginSuccessfullyResponse(
+        status='success',
+        message='Succeesfully logged in',
+        token='x' * 600,
+    ),
+}
+
+
+def run(coroutine):
+    # serialize_response never suspends for coroutine endpoints, so it can be
+    # driven without an event loop getting into the numbers.
+    try:
+        coroutine.send(None)
+    except StopIteration as result:
+        return result.value
+    raise RuntimeError('serialize_response suspended')
+
+def validated_json(field, model) -> bytes:
+    return JSONResponse(run(serialize_response(field=field, response_content=model))).body
+
+def prevalidated_orjson(model) -> bytes:
+    return ORJSONResponse(run(serialize_response(field=None, response_content=model))).body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=20_000)
+    args = parser.parse_args()
+
+    for path, model in PAYLOADS.items():
+        field = create_cloned_field(create_response_field(name='response', type_=type(model)))
+        cases = (
+            ('validated + json', lambda: validated_json(field, model)),
+            ('prevalidated + orjson', lambda: prevalidated_orjson(model)),
+        )
+        print(path)
+        for name, func in cases:
+            seconds = timeit.timeit(func, number=args.number) / args.number
+            print(f'  {name:>22}: {seconds * 1e6:8.2f}us per response')
+
+
+if __name__ == '__main__':
+    main()
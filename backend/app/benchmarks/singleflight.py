@@ -0,0 +1,49 @@
+"""
+A burst of concurrent lookups for one popular user, each running its own query
+against all of them sharing a single flight. The query is simulated with a
+fixed latency and a bounded pool, so the numbers show queueing rather than
+Postgres itself.
+
+Run from backend/app:
+    python -m benchmarks.singleflight [--callers 200] [--latency 0.002] [--pool 5]
+"""
+import argparse, asyncio, time
+
+from services.singleflight import SingleFlight
+
+
+async def burst(callers: int, latency: float, pool: int, coalesce: bool) -> tuple[float, int]:
+    connections = asyncio.Semaphore(pool)
+    queries = 0
+
+    async def query(key: str) -> str:
+        nonlocal queries
+        async with connections:
+            queries += 1
+            await asyncio.sleep(latency)
+        return key
+
+    flights = SingleFlight(timeout=10)
+    started = time.perf_counter()
+    if coalesce:
+        await asyncio.gather(*(flights.do('popular', query, 'popular') for _ in range(callers)))
+    else:
+        await asyncio.gather(*(query('popular') for _ in range(callers)))
+    return time.perf_counter() - started, queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--callers', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.002)
+    parser.add_argument('--pool', type=int, default=5)
+    args = parser.parse_args()
+
+    for coalesce in (False, True):
+        seconds, queries = asyncio.run(burst(args.callers, args.latency, args.pool, coalesce))
+        name = 'single-flight' if coalesce else 'per-request'
+        print(f'{name:>14}: {seconds * 1e3:8.2f}ms for {args.callers} callers, {queries} queries')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Access token verifications per second: re-parsing the PEM key per call (what
+fastapi_jwt_auth did for every request), verifying with the preloaded key
+object, and the TokenService path with its verified-token LRU.
+
+Run from backend/app:
+    python -m benchmarks.token [--number 2000]
+"""
+import argparse, base64, timeit
+from datetime import timedelta
+
+import jwt
+
+from settings import settings
+from services.auth.token import TokenService, tokens
+
+
+PUBLIC_KEY = base64.b64decode(settings.jwt_public_key).decode('utf-8')
+
+
+def pem_per_call(token: str):
+    return jwt.decode(token, PUBLIC_KEY, algorithms=[settings.jwt_algorithm])
+
+def preloaded_key(token: str):
+    return jwt.decode(token, tokens._verifying_key, algorithms=[settings.jwt_algorithm])
+
+def uncached_service(token: str, _service=TokenService(
+    algorithm=settings.jwt_algorithm,
+    private_key=base64.b64decode(settings.jwt_private_key).decode('utf-8'),
+    public_key=PUBLIC_KEY,
+    cache_size=0,
+)):
+    return _service.verify(token)
+
+def cached_service(token: str):
+    return tokens.verify(token)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=2_000)
+    args = parser.parse_args()
+
+    token = tokens.create_access_token('benchmark', timedelta(minutes=5))
+    for func in (pem_per_call, preloaded_key, uncached_service, cached_service):
+        seconds = timeit.timeit(lambda: func(token), number=args.number)
+        print(f'{func.__name__:>16}: {args.number / seconds:12.0f} verifications/s')
+
+
+if __name__ == '__main__':
+    main()
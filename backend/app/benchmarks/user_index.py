@@ -0,0 +1,42 @@
+"""
+Sizing and cost of the login/email Bloom filter: time to fill it from a scan,
+its memory, the cost of one membership check (what a definite miss costs in
+place of a query against the unique index) and the observed false-positive
+rate on names that were never added.
+
+Run from backend/app:
+    python -m benchmarks.user_index [--users 500000] [--error-rate 0.01]
+"""
+import argparse, time, timeit
+
+from services.bloom import BloomFilter
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=500_000)
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    parser.add_argument('--probes', type=int, default=100_000)
+    args = parser.parse_args()
+
+    keys = args.users * 2
+    bloom = BloomFilter(keys, args.error_rate)
+    started = time.perf_counter()
+    for i in range(args.users):
+        bloom.add(f'login:user_{i}')
+        bloom.add(f'email:user_{i}@example.com')
+    fill_seconds = time.perf_counter() - started
+
+    absent = [f'login:nobody_{i}' for i in range(args.probes)]
+    false_positives = sum(key in bloom for key in absent)
+    seconds = timeit.timeit(lambda: 'login:nobody_0' in bloom, number=args.probes)
+
+    print(f'{"keys":>20}: {keys}')
+    print(f'{"fill":>20}: {fill_seconds:8.2f}s')
+    print(f'{"memory":>20}: {len(bloom._bits) / 1024 / 1024:8.2f}MiB, {bloom.hashes} hashes')
+    print(f'{"check":>20}: {seconds / args.probes * 1e6:8.2f}us')
+    print(f'{"false positive rate":>20}: {false_positives / args.probes:8.4f} (estimated {bloom.estimated_error_rate:.4f})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Per-call SQL construction overhead of crud.user.get, before and after the
+statements were prebuilt.
+
+Each variant produces the statement and its cache key, which is what
+SQLAlchemy needs per execution to find the compiled form in its cache.
+
+Run from backend/app:
+    python -m benchmarks.user_lookup [--number 20000]
+"""
+import argparse, timeit, uuid
+
+from sqlmodel import select
+from sqlalchemy import lambda_stmt
+
+import models
+from crud.user import _LOOKUPS, _lookup_key
+
+
+COLUMNS = (
+    models.User.id,
+    models.User.created_at,
+    models.User.updated_at,
+    models.User.login,
+    models.User.name,
+    models.User.surname,
+    models.User.photo,
+    models.User.email,
+    models.User.is_active,
+    models.User.role,
+    models.User.password,
+)
+
+
+def per_call_select(user_id: uuid.UUID):
+    return select(*COLUMNS).where(models.User.id==user_id)._generate_cache_key()
+
+def lambda_select(user_id: uuid.UUID):
+    return lambda_stmt(lambda: select(*COLUMNS).where(models.User.id==user_id))._generate_cache_key()
+
+def prebuilt_select(user_id: uuid.UUID):
+    return _LOOKUPS[(_lookup_key(user_id), True)]._generate_cache_key()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=20_000)
+    args = parser.parse_args()
+
+    user_id = uuid.uuid4()
+    for func in (per_call_select, lambda_select, prebuilt_select):
+        seconds = timeit.timeit(lambda: func(user_id), number=args.number)
+        print(f'{func.__name__:>16}: {seconds / args.number * 1e6:8.2f}us per call')
+
+
+if __name__ == '__main__':
+    main()
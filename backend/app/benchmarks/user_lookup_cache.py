@@ -0,0 +1,55 @@
+"""
+Response cost of /users/get once the row is in hand: serializing the model per
+hit with orjson, against serving the cached body and answering a matching
+If-None-Match with 304.
+
+The database round trip a cache hit also saves is not part of the numbers.
+
+Run from backend/app:
+    python -m benchmarks.user_lookup_cache [--number 50000]
+"""
+import argparse, timeit, uuid
+from datetime import datetime, timezone
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+import schemas
+from services.cache import MemoryBackend
+from services.user_lookup import CachedUser, UserLookupCache, make_etag
+
+
+USER = schemas.UserWithID(
+    id=str(uuid.uuid4()),
+    login='benchmark',
+    name='Bench',
+    surname='Mark',
+    photo='media/benchmark.png',
+    is_active=True,
+)
+ENTRY = CachedUser(USER.id, make_etag(USER.id, datetime.now(timezone.utc)), orjson.dumps(USER.dict()))
+CACHE = UserLookupCache(MemoryBackend(), ttl=5, cache_control='public, no-cache')
+
+
+def serialized():
+    return ORJSONResponse(content=USER.dict())
+
+def cached_body():
+    return CACHE.respond(ENTRY)
+
+def not_modified():
+    return CACHE.respond(ENTRY, ENTRY.etag)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=50_000)
+    args = parser.parse_args()
+
+    for func in (serialized, cached_body, not_modified):
+        seconds = timeit.timeit(func, number=args.number)
+        print(f'{func.__name__:>12}: {seconds / args.number * 1e6:8.2f}us per response')
+
+
+if __name__ == '__main__':
+    main()
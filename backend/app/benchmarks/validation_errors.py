@@ -0,0 +1,68 @@
+"""
+Cost of formatting a 422 for request bodies with many invalid fields: the
+previous handler (every error flattened, stdlib json) against the current
+one (lazy flattening capped at settings.validation_max_errors, orjson).
+
+Run from backend/app:
+    python -m benchmarks.validation_errors [--number 200]
+"""
+import argparse, asyncio, timeit
+
+from fastapi import status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.errors import MissingError, StrRegexError
+
+from middlewares.errors import validation_exception_handler
+
+
+async def previous_handler(request, exc: RequestValidationError):
+    error_messages = []
+    for error in exc.errors():
+        if len(error['loc']) > 1:
+            match error['loc'][1]:
+                case 'login':
+                    error["msg"] = 'invalid login'
+                case 'email':
+                    error["msg"] = 'invalid email'
+                case 'password':
+                    error["msg"] = 'password length should be 8-32 symbols and not contents spaces'
+            error_messages.append({"field": dict([tuple(error['loc'])]), "message": error["msg"]})
+        else:
+            error_messages.append({"field": error['loc'][0], "message": error["msg"]})
+    return JSONResponse(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        content={'status': status.HTTP_422_UNPROCESSABLE_ENTITY, "errors": error_messages},
+    )
+
+def make_exception(size: int) -> RequestValidationError:
+    errors = []
+    for i in range(size):
+        if i % 2:
+            errors.append(ErrorWrapper(StrRegexError(pattern='^[a-z]+$'), loc=('body', 'login')))
+        else:
+            errors.append(ErrorWrapper(MissingError(), loc=('body', f'field_{i}')))
+    return RequestValidationError(errors)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    for size in (5, 100, 1_000, 10_000):
+        print(f'{size} errors')
+        for handler in (previous_handler, validation_exception_handler):
+            # A fresh exception per call, as pydantic caches errors() on it; the
+            # list keeps them alive so their teardown stays out of the timing.
+            exceptions = [make_exception(size) for _ in range(args.number)]
+            pending = iter(exceptions)
+            seconds = timeit.timeit(lambda: loop.run_until_complete(handler(None, next(pending))), number=args.number)
+            print(f'  {handler.__name__:>30}: {seconds / args.number * 1e3:9.3f}ms')
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
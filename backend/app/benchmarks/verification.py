@@ -0,0 +1,46 @@
+"""
+Email verification tokens per second: the per-user Fernet key that used to be
+embedded in the link, against the server-side HMAC keyring.
+
+Run from backend/app:
+    python -m benchmarks.verification [--number 20000]
+"""
+import argparse, base64, timeit, uuid
+
+from cryptography.fernet import Fernet
+
+from services.auth.encryption import get_verification_token, get_verified_user_id
+
+
+def per_user_key_issue(user_id: uuid.UUID) -> str:
+    cipher_key = Fernet.generate_key()
+    encrypted = base64.b64encode(Fernet(cipher_key).encrypt(str(user_id).encode('utf-8'))).decode('utf-8')
+    return f'{cipher_key.decode()}:{encrypted}'
+
+def per_user_key_verify(key: str) -> uuid.UUID:
+    cipher_key, encrypted = key.split(':')
+    return uuid.UUID(Fernet(cipher_key.encode()).decrypt(base64.b64decode(encrypted)).decode('utf-8'))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=20_000)
+    args = parser.parse_args()
+
+    user_id = uuid.uuid4()
+    legacy_key = per_user_key_issue(user_id)
+    token = get_verification_token(user_id)
+    cases = (
+        ('per-user key issue', lambda: per_user_key_issue(user_id)),
+        ('per-user key verify', lambda: per_user_key_verify(legacy_key)),
+        ('keyring issue', lambda: get_verification_token(user_id)),
+        ('keyring verify', lambda: get_verified_user_id(token)),
+    )
+    for name, func in cases:
+        seconds = timeit.timeit(func, number=args.number)
+        print(f'{name:>20}: {args.number / seconds:10.0f} tokens/s')
+    print(f'link key length: {len(legacy_key)} -> {len(token)} characters')
+
+
+if __name__ == '__main__':
+    main()
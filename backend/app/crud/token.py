@@ -0,0 +1,148 @@
+import uuid
+from datetime import datetime
+from typing import AsyncIterator
+
+import orjson
+
+import models
+from .utils.errors import RefreshTokenReuseError
+from database.core import AsyncSession
+from services.notify import notify
+
+
+from sqlmodel import select, update as update_query
+from sqlalchemy import bindparam, func
+from sqlalchemy.dialects.postgresql import insert as insert_query
+
+__all__ = [
+    'create',
+    'rotate',
+    'revoke_family',
+    'revoke_user',
+    'is_family_revoked',
+    'revoked_families',
+    'REVOCATIONS',
+]
+
+# Channel every revocation is announced on, as a JSON list of family ids.
+REVOCATIONS = 'refresh_revocations'
+# Keeps each payload well under Postgres' 8000 byte NOTIFY limit.
+_ANNOUNCE_CHUNK = 100
+
+
+_CREATE = insert_query(models.RefreshToken)
+# Marks the presented token as used only if it is still live, so two racing
+# refreshes with the same token cannot both rotate it.
+_ROTATE = (
+    update_query(models.RefreshToken)
+    .where(
+        models.RefreshToken.id==bindparam('jti'),
+        models.RefreshToken.replaced_by.is_(None),
+        models.RefreshToken.revoked.is_(False),
+        models.RefreshToken.expires_at > func.now(),
+    )
+    .values(replaced_by=bindparam('replaced_by'))
+    .returning(models.RefreshToken.user_id, models.RefreshToken.family_id)
+    .execution_options(synchronize_session=False)
+)
+_GET = select(
+    models.RefreshToken.family_id,
+    models.RefreshToken.replaced_by,
+).where(models.RefreshToken.id==bindparam('jti'))
+# UPDATE binds are prefixed: a parameter named after a column is taken as a SET value.
+_REVOKE_FAMILY = (
+    update_query(models.RefreshToken)
+    .where(models.RefreshToken.family_id==bindparam('b_family_id'))
+    .values(revoked=True)
+    .execution_options(synchronize_session=False)
+)
+_REVOKE_USER = (
+    update_query(models.RefreshToken)
+    .where(
+        models.RefreshToken.user_id==bindparam('b_user_id'),
+        models.RefreshToken.revoked.is_(False),
+    )
+    .values(revoked=True)
+    .returning(models.RefreshToken.family_id)
+    .execution_options(synchronize_session=False)
+)
+# A family counts as revoked unless a live row says otherwise, so families
+# whose rows went with their user are revoked too.
+_FAMILY_IS_LIVE = (
+    select(models.RefreshToken.id)
+    .where(
+        models.RefreshToken.family_id==bindparam('family_id'),
+        models.RefreshToken.revoked.is_(False),
+    )
+    .limit(1)
+)
+_REVOKED_FAMILIES = (
+    select(models.RefreshToken.family_id)
+    .where(
+        models.RefreshToken.revoked.is_(True),
+        models.RefreshToken.expires_at > func.now(),
+    )
+    .distinct()
+)
+
+
+async def create(
+    jti: uuid.UUID,
+    user_id: uuid.UUID,
+    family_id: uuid.UUID,
+    expires_at: datetime,
+    _session: AsyncSession,
+) -> None:
+
+    await _session.execute(_CREATE.values(id=jti, user_id=user_id, family_id=family_id, expires_at=expires_at))
+    await _session.commit()
+
+async def rotate(jti: uuid.UUID, new_jti: uuid.UUID, expires_at: datetime, _session: AsyncSession) -> uuid.UUID | None:
+    """
+    Swaps a live refresh token for `new_jti` in the same family and returns the
+    family id. Returns None for unknown, expired or revoked tokens; presenting a
+    token that was already rotated revokes its whole family and raises
+    RefreshTokenReuseError.
+    """
+
+    rotated = (await _session.execute(_ROTATE, {'jti': jti, 'replaced_by': new_jti})).first()
+    if rotated:
+        await _session.execute(_CREATE.values(
+            id=new_jti, 
+            user_id=rotated.user_id, 
+            family_id=rotated.family_id, 
+            expires_at=expires_at,
+        ))
+        await _session.commit()
+        return rotated.family_id
+
+    await _session.rollback()
+    token = (await _session.execute(_GET, {'jti': jti})).first()
+    if token and token.replaced_by is not None:
+        await revoke_family(token.family_id, _session)
+        raise RefreshTokenReuseError(token.family_id)
+
+async def revoke_family(family_id: uuid.UUID, _session: AsyncSession) -> bool:
+    result = await _session.execute(_REVOKE_FAMILY, {'b_family_id': family_id})
+    await _announce([family_id], _session)
+    await _session.commit()
+    return result.rowcount > 0
+
+async def revoke_user(user_id: uuid.UUID, _session: AsyncSession) -> set[uuid.UUID]:
+    families = set((await _session.execute(_REVOKE_USER, {'b_user_id': user_id})).scalars().all())
+    await _announce(list(families), _session)
+    await _session.commit()
+    return families
+
+async def is_family_revoked(family_id: uuid.UUID, _session: AsyncSession) -> bool:
+    return (await _session.execute(_FAMILY_IS_LIVE, {'family_id': family_id})).first() is None
+
+async def revoked_families(_session: AsyncSession, chunk_size: int = 1_000) -> AsyncIterator[list[uuid.UUID]]:
+    result = await _session.stream(_REVOKED_FAMILIES.execution_options(yield_per=chunk_size))
+    async for rows in result.scalars().partitions(chunk_size):
+        yield rows
+
+async def _announce(families: list[uuid.UUID], _session: AsyncSession) -> None:
+    for start in range(0, len(families), _ANNOUNCE_CHUNK):
+        chunk = families[start:start + _ANNOUNCE_CHUNK]
+        await notify(_session, REVOCATIONS, orjson.dumps([str(family_id) for family_id in chunk]).decode('utf-8'))
@@ -1,10 +1,15 @@
 import uuid
 from functools import singledispatch
+from datetime import datetime
+from typing import AsyncIterator, Sequence
 
 import schemas, models
-from .utils.errors import PasswordsMismatchError
+from .utils.errors import PasswordsMismatchError, ConcurrentUpdateError
+from .utils import hooks
 from database.core import AsyncSession
-from services.auth.password import get_password_hash, verify_password
+from settings import settings
+from services.auth.password import aget_password_hash, averify_password
+from services.notify import notify_many
 
 
 from sqlmodel import (
@@ -12,101 +17,223 @@ from sqlmodel import (
     update as update_query,
     delete as delete_query,
 )
+from sqlalchemy import bindparam, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert as insert_query
+from sqlalchemy.engine import Row
 from sqlalchemy.sql.expression import Select, Update, Delete
 from sqlalchemy.exc import IntegrityError
 from pydantic import ValidationError, EmailStr
 
 __all__ = [
     'get',
+    'get_versioned',
+    'get_principal',
+    'get_many',
+    'get_page',
+    'stream',
+    'identities',
     'create',
+    'create_many',
+    'exists',
     'delete',
     'update',
+    'activate',
+    'IDENTITIES',
 ]
 
+# Channel new logins and emails are announced on, as a JSON list of
+# [login, email] pairs, so every worker's user index hears about them.
+IDENTITIES = 'user_identities'
 
-async def create(user: schemas.CreateUser | dict, _session: AsyncSession) -> schemas.UserWithID | None:
+
+_PUBLIC_COLUMNS = (
+    models.User.id,
+    models.User.login,
+    models.User.name,
+    models.User.surname,
+    models.User.photo,
+    models.User.is_active,
+)
+_PRIVATE_COLUMNS = _PUBLIC_COLUMNS + (
+    models.User.email,
+    models.User.role,
+    models.User.password,
+    models.User.created_at,
+    models.User.updated_at,
+)
+_LOOKUP_COLUMNS = {
+    'id': models.User.id,
+    'login': models.User.login,
+    'email': models.User.email,
+}
+
+# Built once per (key, projection): SQLAlchemy memoizes the cache key of a
+# statement object, so repeated lookups go straight to the compiled cache.
+_LOOKUPS: dict[tuple[str, bool], Select] = {
+    (key, private): select(*(_PRIVATE_COLUMNS if private else _PUBLIC_COLUMNS)).where(column==bindparam('value'))
+    for key, column in _LOOKUP_COLUMNS.items()
+    for private in (False, True)
+}
+# The looked-up column rides along as `lookup_value` to match rows back to
+# their keys; the public projection has no email of its own to use.
+_MANY_LOOKUPS: dict[tuple[str, bool], Select] = {
+    (key, private): (
+        select(*(_PRIVATE_COLUMNS if private else _PUBLIC_COLUMNS), column.label('lookup_value'))
+        .where(column.in_(bindparam('values', expanding=True)))
+    )
+    for key, column in _LOOKUP_COLUMNS.items()
+    for private in (False, True)
+}
+_VERSIONED_LOOKUPS: dict[str, Select] = {
+    key: select(*_PUBLIC_COLUMNS, models.User.updated_at).where(column==bindparam('value'))
+    for key, column in _LOOKUP_COLUMNS.items()
+}
+# What authorization needs of a user, and nothing else: no password hash.
+_PRINCIPAL = select(models.User.id, models.User.is_active, models.User.role).where(models.User.id==bindparam('value'))
+_IDENTITIES = select(models.User.login, models.User.email)
+_LISTING_ORDER = (models.User.created_at, models.User.id)
+_CREATE = insert_query(models.User).returning(*_PUBLIC_COLUMNS)
+_ACTIVATE = (
+    update_query(models.User)
+    # Not 'id': a parameter named after a column is taken as a SET value.
+    .where(models.User.id==bindparam('b_id'), models.User.is_active.is_(False))
+    .values(is_active=True)
+    .returning(models.User.id, models.User.login, models.User.email)
+    .execution_options(synchronize_session=False)
+)
+_EXISTS = (
+    select(models.User.id)
+    .where(or_(models.User.login==bindparam('login'), models.User.email==bindparam('email')))
+    .limit(1)
+)
+
+
+def _lookup_key(user: uuid.UUID | EmailStr | str) -> str:
+    if isinstance(user, uuid.UUID):
+        return 'id'
+    if isinstance(user, EmailStr):
+        return 'email'
+    if isinstance(user, str):
+        return 'login'
+    raise TypeError(f'Cannot look up a user by {type(user).__name__}')
+
+
+async def create(user: schemas.CreateUser | dict, _session: AsyncSession, precheck: bool = True) -> schemas.UserWithID | None:
     if isinstance(user, schemas.CreateUser):
-        data.email = data.email.lower()
         data = user.dict()
+        data['email'] = data['email'].lower()
     else:
-        data = user
-    data['password'] = get_password_hash(data['password'])
-    del data['confirm_password']
+        data = dict(user)
+    data.pop('confirm_password', None)
+
+    # Skips the bcrypt hash for logins/emails that are already taken; the
+    # unique constraints stay the authority for concurrent registrations.
+    # Callers that already know both are free can pass precheck=False.
+    if settings.user_create_precheck and precheck and await exists(data['login'], data['email'], _session):
+        return
+
+    data['password'] = await aget_password_hash(data['password'])
     try:
-        user_data = models.User(**data)
-        _session.add(user_data)
-        await _session.flush()
+        result = (await _session.execute(_CREATE.values(**data))).one()
+        await _announce([(result.login, data['email'])], _session)
         await _session.commit()
-        await _session.refresh(user_data)
-        return schemas.UserWithID(
-            id=str(user_data.id),
-            name=user_data.name,
-            surname=user_data.surname,
-            login=user_data.login,
-            photo=user_data.photo,
-            is_active=user_data.is_active,
-        )
     except IntegrityError:
-        return 
-
-@singledispatch
-async def get(user_id: uuid.UUID, _session: AsyncSession, private: bool = False) -> schemas.UserWithID | schemas.UserPrivate | None:
-    
-    qs = select(
-        models.User.id,
-        models.User.created_at,
-        models.User.updated_at,
-        models.User.login,
-        models.User.name,
-        models.User.surname,
-        models.User.photo,
-        models.User.email,
-        models.User.is_active,
-        models.User.role,
-        models.User.password,
-    ).where(models.User.id==user_id)
-
-    return await _get_user(qs, _session, private)
-
-@get.register
-async def _(login: str, _session: AsyncSession, private: bool = False) -> schemas.UserWithID | schemas.UserPrivate | None:
-
-    qs = select(
-        models.User.id,
-        models.User.created_at,
-        models.User.updated_at,
-        models.User.login,
-        models.User.name,
-        models.User.surname,
-        models.User.photo,
-        models.User.email,
-        models.User.is_active,
-        models.User.role,
-        models.User.password,
-    ).where(models.User.login==login)
-
-    return await _get_user(qs, _session, private)
-
-@get.register
-async def _(email: EmailStr, _session: AsyncSession, private: bool = False) -> schemas.UserWithID | schemas.UserPrivate | None:
-
-    qs = (select(
-        models.User.id,
-        models.User.created_at,
-        models.User.updated_at,
-        models.User.login,
-        models.User.name,
-        models.User.surname,
-        models.User.photo,
-        models.User.email,
-        models.User.is_active,
-        models.User.role,
-        models.User.password,
-    )
-    .where(models.User.email==email)
+        await _session.rollback()
+        return
+
+    await hooks.fire(hooks.UserEvent(kind='created', id=result.id, login=result.login, email=data['email']))
+    return _to_schema(result, False)
+
+async def exists(login: str, email: str, _session: AsyncSession) -> bool:
+    return (await _session.execute(_EXISTS, {'login': login, 'email': email})).first() is not None
+
+async def create_many(users: list[dict], _session: AsyncSession) -> set[str]:
+
+    if not users:
+        return set()
+
+    qs = (
+        insert_query(models.User)
+        .values(users)
+        .on_conflict_do_nothing()
+        .returning(models.User.id, models.User.login, models.User.email)
     )
+    created = (await _session.execute(qs)).all()
+    await _announce([(row.login, row.email) for row in created], _session)
+    await _session.commit()
+    for row in created:
+        await hooks.fire(hooks.UserEvent(kind='created', id=row.id, login=row.login, email=row.email))
+
+    return {row.login for row in created}
+
+async def get(user: uuid.UUID | EmailStr | str, _session: AsyncSession, private: bool = False) -> schemas.UserWithID | schemas.UserPrivate | None:
+
+    qs = _LOOKUPS[(_lookup_key(user), private)]
+    return await _get_user(qs, {'value': user}, _session, private)
+
+async def get_versioned(user: uuid.UUID | EmailStr | str, _session: AsyncSession) -> tuple[schemas.UserWithID, datetime] | None:
+
+    result = (await _session.execute(_VERSIONED_LOOKUPS[_lookup_key(user)], {'value': user})).one_or_none()
+    if result:
+        return _to_schema(result, False), result.updated_at
+
+async def get_principal(user_id: uuid.UUID, _session: AsyncSession) -> Row | None:
 
-    return await _get_user(qs, _session, private)
+    return (await _session.execute(_PRINCIPAL, {'value': user_id})).one_or_none()
+
+async def get_many(
+    users: Sequence[uuid.UUID | EmailStr | str],
+    _session: AsyncSession,
+    private: bool = False,
+) -> list[schemas.UserWithID | schemas.UserPrivate | None]:
+
+    keys = [(_lookup_key(user), user) for user in users]
+    values_by_key: dict[str, list] = {}
+    for key, value in dict.fromkeys(keys):
+        values_by_key.setdefault(key, []).append(value)
+
+    found = {}
+    for key, values in values_by_key.items():
+        qs = _MANY_LOOKUPS[(key, private)]
+        for start in range(0, len(values), settings.user_batch_chunk_size):
+            chunk = values[start:start + settings.user_batch_chunk_size]
+            for row in (await _session.execute(qs, {'values': chunk})).all():
+                found[(key, row.lookup_value)] = _to_schema(row, private)
+
+    return [found.get(key) for key in keys]
+
+async def get_page(
+    _session: AsyncSession,
+    limit: int,
+    after: tuple[datetime, uuid.UUID] | None = None,
+    role: str | None = None,
+    is_active: bool | None = None,
+) -> tuple[list[schemas.UserWithID], tuple[datetime, uuid.UUID] | None]:
+
+    qs = _listing(role, is_active).limit(limit + 1)
+    if after:
+        qs = qs.where(tuple_(*_LISTING_ORDER) > tuple_(*after))
+
+    rows = (await _session.execute(qs)).all()
+    next_after = (rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+    return [_to_schema(row, False) for row in rows[:limit]], next_after
+
+async def stream(
+    _session: AsyncSession,
+    role: str | None = None,
+    is_active: bool | None = None,
+    chunk_size: int = 1_000,
+) -> AsyncIterator[list[schemas.UserWithID]]:
+
+    result = await _session.stream(_listing(role, is_active).execution_options(yield_per=chunk_size))
+    async for rows in result.partitions(chunk_size):
+        yield [_to_schema(row, False) for row in rows]
+
+async def identities(_session: AsyncSession, chunk_size: int = 1_000) -> AsyncIterator[list[Row]]:
+
+    result = await _session.stream(_IDENTITIES.execution_options(yield_per=chunk_size))
+    async for rows in result.partitions(chunk_size):
+        yield rows
 
 @singledispatch  
 async def delete(user_id: uuid.UUID, _session: AsyncSession) -> bool:
@@ -128,69 +255,122 @@ async def _(email: EmailStr, _session: AsyncSession) -> bool:
 
 async def update(user: schemas.UpdateUser, _session: AsyncSession) -> bool:
 
-    if isinstance(user.entity, uuid.UUID):
-        user_qs = select(models.User).where(models.User.id==user.entity)
-        update_qs = update_query(models.User).where(models.User.id==user.entity)
-    elif isinstance(user.entity, EmailStr):
-        user_qs = select(models.User).where(models.User.email==user.entity)
-        update_qs = update_query(models.User).where(models.User.email==user.entity)
-    else:
-        user_qs = select(models.User).where(models.User.login==user.entity)
-        update_qs = update_query(models.User).where(models.User.login==user.entity)
-
-    user_in_db = (await _session.execute(user_qs)).one_or_none()
-    if user_in_db:
-        if 'password' in user.update:
-            is_password_verified = verify_password(user.update['old_password'], user_in_db.User.password)
-            if not is_password_verified:
-                raise PasswordsMismatchError('Passwords mismatch')
-            del user.update['old_password']
-            user.update['password'] = get_password_hash(user.update['password'])
-        
-        return await _update_user(update_qs.values(**user.update), _session)
-    
-    return False
-
-async def _get_user(qs: Select, _session: AsyncSession, private: bool) -> schemas.UserWithID | schemas.UserPrivate | None:
+    changes = dict(user.update)
+    conditions = [_LOOKUP_COLUMNS[_lookup_key(user.entity)]==user.entity]
+    if user.expected_updated_at is not None:
+        conditions.append(models.User.updated_at==user.expected_updated_at)
+
+    if 'password' in changes:
+        user_in_db = (await _session.execute(
+            select(models.User.id, models.User.password, models.User.updated_at).where(*conditions)
+        )).one_or_none()
+        if not user_in_db:
+            return await _update_missed(user, _session)
+
+        is_password_verified = await averify_password(changes.pop('old_password'), user_in_db.password)
+        if not is_password_verified:
+            raise PasswordsMismatchError('Passwords mismatch')
+        changes['password'] = await aget_password_hash(changes['password'])
+        # The hash was checked against this exact row version; a concurrent
+        # update in between makes the UPDATE below match nothing.
+        conditions = [models.User.id==user_in_db.id, models.User.updated_at==user_in_db.updated_at]
+
+    updated = await _update_user(
+        update_query(models.User)
+        .where(*conditions)
+        .values(**changes)
+        .returning(models.User.id, models.User.login, models.User.email)
+        .execution_options(synchronize_session=False),
+        _session,
+        announce='login' in changes or 'email' in changes,
+    )
+    if not updated:
+        return await _update_missed(user, _session)
+
+    for row in updated:
+        await hooks.fire(hooks.UserEvent(kind='updated', id=row.id, login=row.login, email=row.email))
+    return True
+
+async def activate(user_id: uuid.UUID, _session: AsyncSession) -> bool:
+
+    updated = (await _session.execute(_ACTIVATE, {'b_id': user_id})).first()
+    if not updated:
+        return False
+
+    await _session.commit()
+    await hooks.fire(hooks.UserEvent(kind='updated', id=updated.id, login=updated.login, email=updated.email))
+    return True
+
+async def _update_missed(user: schemas.UpdateUser, _session: AsyncSession) -> bool:
+    if 'password' not in user.update and user.expected_updated_at is None:
+        return False
+    # Only reached when nothing was updated: tells a stale version apart
+    # from a user that does not exist.
+    if (await _session.execute(_LOOKUPS[(_lookup_key(user.entity), False)], {'value': user.entity})).first() is None:
+        return False
+    raise ConcurrentUpdateError('User was modified concurrently')
+
+def _listing(role: str | None, is_active: bool | None) -> Select:
+    qs = select(*_PUBLIC_COLUMNS, models.User.created_at).order_by(*_LISTING_ORDER)
+    if role is not None:
+        qs = qs.where(models.User.role==role)
+    if is_active is not None:
+        qs = qs.where(models.User.is_active==is_active)
+    return qs
+
+async def _get_user(qs: Select, params: dict, _session: AsyncSession, private: bool) -> schemas.UserWithID | schemas.UserPrivate | None:
     try:
-        result = (await _session.execute(qs)).one_or_none()
+        result = (await _session.execute(qs, params)).one_or_none()
         if result:
-            if not private:
-                return schemas.UserWithID(
-                    id=str(result.id),
-                    name=result.name,
-                    surname=result.surname,
-                    login=result.login,
-                    photo=result.photo,
-                    is_active=result.is_active,
-                )       
-            return schemas.UserPrivate(
-                id=str(result.id),
-                name=result.name,
-                surname=result.surname,
-                login=result.login,
-                photo=result.photo,
-                email=result.email,
-                role=result.role,
-                is_active=result.is_active,
-                password=result.password,
-                created_at=result.created_at,
-                updated_at=result.updated_at,
-            )
+            return _to_schema(result, private)
     except ValidationError as e:
         print(e)
 
+def _to_schema(result: Row, private: bool) -> schemas.UserWithID | schemas.UserPrivate:
+    if not private:
+        return schemas.UserWithID(
+            id=str(result.id),
+            name=result.name,
+            surname=result.surname,
+            login=result.login,
+            photo=result.photo,
+            is_active=result.is_active,
+        )
+    return schemas.UserPrivate(
+        id=str(result.id),
+        name=result.name,
+        surname=result.surname,
+        login=result.login,
+        photo=result.photo,
+        email=result.email,
+        role=result.role,
+        is_active=result.is_active,
+        password=result.password,
+        created_at=result.created_at,
+        updated_at=result.updated_at,
+    )
+
 async def _delete_user(qs: Delete, _session: AsyncSession) -> bool:
-    result = (await _session.execute(qs)).rowcount
-    if result > 0:
+    deleted = (await _session.execute(
+        qs.returning(models.User.id, models.User.login, models.User.email)
+    )).all()
+    if deleted:
         await _session.commit()
+        for row in deleted:
+            await hooks.fire(hooks.UserEvent(kind='deleted', id=row.id, login=row.login, email=row.email))
 
-    return bool(result)
+    return bool(deleted)
 
-async def _update_user(qs: Update, _session: AsyncSession) -> bool:
-    result = (await _session.execute(qs)).rowcount
-    if result > 0:
+async def _update_user(qs: Update, _session: AsyncSession, announce: bool = False) -> list[Row]:
+    updated = (await _session.execute(qs)).all()
+    if updated:
+        if announce:
+            await _announce([(row.login, row.email) for row in updated], _session)
         await _session.commit()
 
-    return bool(result)
+    return updated
 
+async def _announce(identities: list[tuple[str, str]], _session: AsyncSession) -> None:
+    # Sent inside the write's transaction: delivered on commit, dropped on rollback.
+    if identities:
+        await notify_many(_session, IDENTITIES, identities)
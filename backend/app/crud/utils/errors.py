@@ -2,4 +2,10 @@
 
 
 class PasswordsMismatchError(Exception):
-    ...
\ No newline at end of file
+    ...
+
+class ConcurrentUpdateError(Exception):
+    ...
+
+class RefreshTokenReuseError(Exception):
+    ...
@@ -0,0 +1,29 @@
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+
+@dataclass(frozen=True)
+class UserEvent:
+    kind: str
+    id: uuid.UUID
+    login: str | None = None
+    email: str | None = None
+
+
+Hook = Callable[[UserEvent], Awaitable[None]]
+
+_hooks: list[Hook] = []
+
+
+def register(hook: Hook) -> Hook:
+    _hooks.append(hook)
+    return hook
+
+def unregister(hook: Hook) -> None:
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+async def fire(event: UserEvent) -> None:
+    for hook in _hooks:
+        await hook(event)
@@ -0,0 +1,18 @@
+import base64, uuid
+from datetime import datetime
+
+
+class InvalidCursorError(Exception):
+    ...
+
+
+def encode_cursor(created_at: datetime, user_id: uuid.UUID) -> str:
+    raw = f'{created_at.isoformat()}|{user_id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        created_at, user_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(created_at), uuid.UUID(user_id)
+    except (ValueError, UnicodeError) as ex:
+        raise InvalidCursorError('Invalid cursor') from ex
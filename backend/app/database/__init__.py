@@ -1 +1 @@
-from .core import init_db, get_session
\ No newline at end of file
+from .core import init_db, ensure_schema, get_session, get_read_session, warm_up_pool, dispose_engines
\ No newline at end of file
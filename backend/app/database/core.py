@@ -1,4 +1,4 @@
-import os
+import asyncio, logging, os
 from typing import AsyncGenerator
 
 from sqlmodel import SQLModel
@@ -6,16 +6,44 @@ from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.ext.asyncio.session import AsyncSession
 
 from settings import settings, module
+from .pool import TimedAsyncQueuePool, instrument, warm_up
+from .routing import RoutingSession, create_replica_set, routing_state
+from . import schema
+from services.metrics.sql import instrument_engine
+from services import profiling
 
 
+logger = logging.getLogger(__name__)
+
 async_engine = create_async_engine(
     url=settings.pg_dsn,
     echo=settings.pg_echo,
-    future=settings.pg_future
+    future=settings.pg_future,
+    poolclass=TimedAsyncQueuePool,
+    pool_size=settings.pg_pool_size,
+    max_overflow=settings.pg_max_overflow,
+    pool_timeout=settings.pg_pool_timeout,
+    pool_recycle=settings.pg_pool_recycle,
+    pool_pre_ping=settings.pg_pool_pre_ping,
+    connect_args={'statement_cache_size': settings.pg_statement_cache_size},
 )
+instrument(async_engine)
+replica_set = create_replica_set(async_engine)
+for engine in (async_engine, *replica_set.engines):
+    if settings.metrics_enabled:
+        instrument_engine(engine)
+    if settings.profiling_secret or settings.profiling_sample_rate > 0:
+        profiling.instrument_engine(engine)
+
+
+class ReadSession(RoutingSession):
+    primary = async_engine
+    replicas = replica_set
+
 
 async def init_db() -> None:
     async with async_engine.begin() as connection:
+        await schema.lock(connection)
         match module:
             case 'development':
                 # await connection.run_sync(SQLModel.metadata.drop_all)
@@ -25,6 +53,56 @@ async def init_db() -> None:
                 await connection.run_sync(SQLModel.metadata.create_all)
       
 
+async def ensure_schema() -> bool:
+    """
+    Checks the tables against the models once per schema change rather than on
+    every boot: a matching stored version costs a single SELECT. Otherwise, in
+    development and test, create_all runs under an advisory lock so workers
+    starting together take turns. create_all only adds missing tables and
+    indexes, so the version is recorded only if the live schema then matches
+    the models; any other difference is logged as needing a migration and
+    checked again on the next boot. Production never runs DDL and only
+    reports the mismatch.
+    """
+    version = schema.current_version()
+    async with async_engine.connect() as connection:
+        if await schema.stored_version(connection) == version:
+            return False
+
+    if module not in ('development', 'test'):
+        logger.warning('Database schema does not match the models (expected version %s)', version)
+        return False
+
+    async with async_engine.begin() as connection:
+        await schema.lock(connection)
+        await schema.create_version_table(connection)
+        if await schema.stored_version(connection) == version:
+            return False
+        await connection.run_sync(SQLModel.metadata.create_all)
+        drift = await connection.run_sync(schema.drift)
+        if drift:
+            logger.error('Database schema needs a migration, create_all cannot apply it: %s', '; '.join(drift))
+            return False
+        await schema.store_version(connection, version)
+    return True
+
+async def warm_up_pool() -> None:
+    connections = min(settings.pg_pool_warm_up, settings.pg_pool_size + settings.pg_max_overflow)
+    await asyncio.gather(*(warm_up(engine, connections) for engine in (async_engine, *replica_set.engines)))
+
+async def dispose_engines() -> None:
+    for engine in (async_engine, *replica_set.engines):
+        await engine.dispose()
+
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    routing_state()
     async with AsyncSession(bind=async_engine) as session:
+        yield session
+
+def read_session() -> AsyncSession:
+    return AsyncSession(bind=async_engine, sync_session_class=ReadSession)
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    routing_state()
+    async with read_session() as session:
         yield session
\ No newline at end of file
@@ -0,0 +1,80 @@
+import asyncio, time
+from dataclasses import dataclass
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+@dataclass
+class PoolStats:
+    connects: int = 0
+    checkouts: int = 0
+    checkins: int = 0
+    checked_out: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    total_checkout_seconds: float = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.total_wait_seconds += seconds
+        if seconds > self.max_wait_seconds:
+            self.max_wait_seconds = seconds
+
+
+stats = PoolStats()
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            stats.record_wait(time.perf_counter() - started_at)
+
+
+def instrument(engine: AsyncEngine) -> None:
+    pool = engine.sync_engine.pool
+
+    @event.listens_for(pool, 'connect')
+    def _on_connect(dbapi_connection, connection_record) -> None:
+        stats.connects += 1
+
+    @event.listens_for(pool, 'checkout')
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        stats.checkouts += 1
+        stats.checked_out += 1
+        connection_record.info['checked_out_at'] = time.perf_counter()
+
+    @event.listens_for(pool, 'checkin')
+    def _on_checkin(dbapi_connection, connection_record) -> None:
+        checked_out_at = connection_record.info.pop('checked_out_at', None)
+        if checked_out_at is None:
+            return
+        stats.checkins += 1
+        stats.checked_out -= 1
+        stats.total_checkout_seconds += time.perf_counter() - checked_out_at
+
+
+async def warm_up(engine: AsyncEngine, connections: int) -> None:
+    if connections <= 0:
+        return
+
+    async def _open(ready: asyncio.Event) -> None:
+        async with engine.connect() as connection:
+            await connection.execute(text('SELECT 1'))
+            # Hold the connection until every opener has one, otherwise the
+            # pool hands the same connection back out and nothing is pre-opened.
+            await ready.wait()
+
+    # This pool's own count: the global stats also see requests and other
+    # engines' pools warming up at the same time.
+    pool = engine.sync_engine.pool
+    ready = asyncio.Event()
+    tasks = [asyncio.create_task(_open(ready)) for _ in range(connections)]
+    while pool.checkedout() < connections and not any(task.done() for task in tasks):
+        await asyncio.sleep(0.01)
+    ready.set()
+    await asyncio.gather(*tasks)
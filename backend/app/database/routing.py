@@ -0,0 +1,134 @@
+import itertools, time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import Session
+
+from settings import settings
+from .pool import TimedAsyncQueuePool, instrument
+
+
+@dataclass
+class RoutingState:
+    wrote: bool = False
+
+
+_state: ContextVar[RoutingState | None] = ContextVar('routing_state', default=None)
+
+
+def routing_state() -> RoutingState:
+    state = _state.get()
+    if state is None:
+        state = RoutingState()
+        _state.set(state)
+    return state
+
+def mark_write() -> None:
+    routing_state().wrote = True
+
+
+class ReplicaSet:
+
+    def __init__(self, engines: list[AsyncEngine], strategy: str = 'round_robin', retry_after: float = 30) -> None:
+        self.engines = engines
+        self.strategy = strategy
+        self.retry_after = retry_after
+        self._unhealthy_until: dict[int, float] = {}
+        self._round_robin = itertools.cycle(range(len(engines))) if engines else None
+
+    def healthy(self) -> list[AsyncEngine]:
+        now = time.monotonic()
+        return [
+            engine for index, engine in enumerate(self.engines)
+            if self._unhealthy_until.get(index, 0) <= now
+        ]
+
+    def choose(self) -> AsyncEngine | None:
+        healthy = self.healthy()
+        if not healthy:
+            return None
+
+        match self.strategy:
+            case 'least_loaded':
+                return min(healthy, key=lambda engine: engine.sync_engine.pool.checkedout())
+            case 'round_robin':
+                for _ in range(len(self.engines)):
+                    engine = self.engines[next(self._round_robin)]
+                    if engine in healthy:
+                        return engine
+            case _:
+                raise ValueError(f'Unknown replica strategy: {self.strategy}')
+
+    def mark_unhealthy(self, engine: AsyncEngine) -> None:
+        self._unhealthy_until[self.engines.index(engine)] = time.monotonic() + self.retry_after
+
+
+def create_replica_set(primary: AsyncEngine) -> ReplicaSet:
+    engines = [
+        create_async_engine(
+            url=dsn,
+            echo=settings.pg_echo,
+            future=settings.pg_future,
+            poolclass=TimedAsyncQueuePool,
+            pool_size=settings.pg_pool_size,
+            max_overflow=settings.pg_max_overflow,
+            pool_timeout=settings.pg_pool_timeout,
+            pool_recycle=settings.pg_pool_recycle,
+            pool_pre_ping=settings.pg_pool_pre_ping,
+            connect_args={'statement_cache_size': settings.pg_statement_cache_size},
+        )
+        for dsn in settings.pg_replica_dsns
+    ]
+    # Most reads go to the replicas, so the pool metrics have to include them.
+    for engine in engines:
+        instrument(engine)
+    return ReplicaSet(engines, strategy=settings.pg_replica_strategy, retry_after=settings.pg_replica_retry_after)
+
+
+class RoutingSession(Session):
+    """
+    Read-only session: statements go to a replica chosen once per session,
+    or to the primary when no replica is healthy or the current request has
+    already written through the primary.
+    """
+
+    primary: AsyncEngine
+    replicas: ReplicaSet
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._replica: AsyncEngine | None = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if routing_state().wrote:
+            return self.primary.sync_engine
+        if self._replica is None:
+            self._replica = self.replicas.choose() or self.primary
+        return self._replica.sync_engine
+
+    def execute(self, *args, **kwargs):
+        try:
+            return super().execute(*args, **kwargs)
+        except (OSError, DBAPIError) as ex:
+            replica = self._replica
+            if replica is None or replica is self.primary or not _is_connection_error(ex):
+                raise
+            self.replicas.mark_unhealthy(replica)
+            self.rollback()
+            self._replica = self.primary
+            return super().execute(*args, **kwargs)
+
+
+def _is_connection_error(ex: Exception) -> bool:
+    if isinstance(ex, OSError):
+        return True
+    return bool(getattr(ex, 'connection_invalidated', False)) or isinstance(ex.orig, OSError)
+
+
+@event.listens_for(Session, 'after_commit')
+def _on_commit(session: Session) -> None:
+    if not isinstance(session, RoutingSession):
+        mark_write()
@@ -0,0 +1,77 @@
+import hashlib, zlib
+
+from sqlmodel import SQLModel
+from sqlalchemy import MetaData, Table, Column, String, inspect, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection, Inspector
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.schema import CreateTable, CreateIndex
+
+import models  # noqa: F401, registers the tables on SQLModel.metadata
+
+
+# Kept out of SQLModel.metadata so drop_all/create_all never touch it.
+_metadata = MetaData()
+schema_version = Table(
+    'schema_version',
+    _metadata,
+    Column('version', String(64), primary_key=True),
+)
+
+# Every process uses the same key, so concurrent boots take turns on the DDL.
+LOCK_KEY = zlib.crc32(b'fastapi_template.schema')
+
+
+def current_version() -> str:
+    dialect = postgresql.dialect()
+    statements = []
+    for table in SQLModel.metadata.sorted_tables:
+        statements.append(str(CreateTable(table).compile(dialect=dialect)))
+        statements.extend(str(CreateIndex(index).compile(dialect=dialect)) for index in sorted(table.indexes, key=lambda index: index.name))
+    return hashlib.sha256('\n'.join(statements).encode('utf-8')).hexdigest()
+
+async def lock(connection: AsyncConnection) -> None:
+    # Transaction-scoped: released on commit/rollback of the DDL transaction.
+    await connection.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': LOCK_KEY})
+
+async def create_version_table(connection: AsyncConnection) -> None:
+    await connection.run_sync(_metadata.create_all)
+
+async def stored_version(connection: AsyncConnection) -> str | None:
+    try:
+        return (await connection.execute(select(schema_version.c.version))).scalar()
+    except DBAPIError:
+        # Fresh database: no version table yet.
+        return None
+
+async def store_version(connection: AsyncConnection, version: str) -> None:
+    await connection.execute(schema_version.delete())
+    await connection.execute(insert(schema_version).values(version=version))
+
+def drift(connection: Connection) -> list[str]:
+    return differences(inspect(connection))
+
+def differences(inspector: Inspector) -> list[str]:
+    """
+    What create_all leaves behind: it only creates missing tables and indexes,
+    so a changed table keeps its old columns until a migration alters it.
+    """
+    found = []
+    existing = set(inspector.get_table_names())
+    for table in SQLModel.metadata.sorted_tables:
+        if table.name not in existing:
+            found.append(f'table {table.name} is missing')
+            continue
+        columns = {column['name']: column for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                found.append(f'column {table.name}.{column.name} is missing')
+            elif columns[column.name]['nullable'] != column.nullable:
+                found.append(f'column {table.name}.{column.name} is {"" if columns[column.name]["nullable"] else "not "}nullable')
+        found.extend(f'column {table.name}.{name} is not in the models' for name in sorted(columns.keys() - table.columns.keys()))
+        indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        found.extend(f'index {index.name} is missing' for index in sorted(table.indexes, key=lambda index: index.name) if index.name not in indexes)
+    return found
+
@@ -1,19 +1,82 @@
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 
 from routers import router
-from database import init_db
+from database import ensure_schema, warm_up_pool, dispose_engines
 from middlewares import errors
+from middlewares.metrics import MetricsMiddleware, metrics_endpoint
+from middlewares.profiling import ProfilingMiddleware
+from middlewares.ratelimit import RateLimitMiddleware
 from settings import settings
+from services.mail import outbox, registry
+from services.auth.refresh import refresh_tokens
+from services.user_index import user_index
+from services.auth.password import shutdown_pool
+from services.metrics.collectors import register_default_collectors
+from services import lifecycle
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    async with lifecycle.phase('startup.schema'):
+        await ensure_schema()
+    async with lifecycle.phase('startup.pool'):
+        await warm_up_pool()
+    async with lifecycle.phase('startup.revocations'):
+        await refresh_tokens.start()
+    async with lifecycle.phase('startup.user_index'):
+        await user_index.start()
+    async with lifecycle.phase('startup.templates'):
+        registry.load()
+    outbox.start()
+    lifecycle.report('startup')
+
+    yield
+
+    # Uvicorn has already stopped accepting requests and waited for in-flight
+    # ones, so queued mail gets a bounded chance to go out before teardown.
+    async with lifecycle.phase('shutdown.outbox'):
+        await outbox.stop(timeout=settings.mail_drain_timeout)
+    async with lifecycle.phase('shutdown.revocations'):
+        await refresh_tokens.stop()
+    async with lifecycle.phase('shutdown.user_index'):
+        await user_index.stop()
+    async with lifecycle.phase('shutdown.password_pool'):
+        shutdown_pool(wait=True)
+    async with lifecycle.phase('shutdown.engines'):
+        await dispose_engines()
+    lifecycle.report('shutdown')
 
-app = FastAPI()
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+app.add_exception_handler(RequestValidationError, errors.validation_exception_handler)
+app.include_router(router)
+
+if settings.rate_limit_enabled:
+    app.add_middleware(RateLimitMiddleware)
+
+if settings.profiling_secret or settings.profiling_sample_rate > 0:
+    app.add_middleware(ProfilingMiddleware)
+
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+    app.add_route(settings.metrics_path, metrics_endpoint, include_in_schema=False)
+    register_default_collectors()
 
 origins = [
     settings.client_origin
 ]
 
+# Added last, so it wraps every other middleware: responses they answer with
+# themselves, such as a 429, still carry the CORS headers browsers need.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -21,17 +84,33 @@ app.add_middleware(
     allow_methods=['*'],
     allow_headers=['*'],
 )
-app.add_exception_handler(RequestValidationError, errors.validation_exception_handler)
-app.include_router(router)
-
-
-@app.on_event("startup")
-async def start_up() -> None:
-    await init_db()
 
 
 def main() -> None:
-    uvicorn.run("main:app", host="127.0.0.1", port=8001, reload=True)
+    if settings.server_reload:
+        uvicorn.run(
+            "main:app",
+            host=settings.server_host,
+            port=settings.server_port,
+            reload=True,
+            proxy_headers=True,
+            forwarded_allow_ips=settings.rate_limit_trusted_proxies,
+        )
+        return
+
+    # loop/http 'auto' pick uvloop and httptools when they are installed.
+    uvicorn.run(
+        "main:app",
+        host=settings.server_host,
+        port=settings.server_port,
+        workers=settings.server_workers or os.cpu_count(),
+        loop='auto',
+        http='auto',
+        timeout_keep_alive=settings.server_keep_alive,
+        backlog=settings.server_backlog,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.rate_limit_trusted_proxies,
+    )
 
 
 if __name__ == '__main__':
@@ -1,23 +1,48 @@
+from itertools import islice
+
 from fastapi import Request, status
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from pydantic.error_wrappers import flatten_errors
+
+from settings import settings
+
+
+FIELD_MESSAGES = {
+    'login': 'invalid login',
+    'email': 'invalid email',
+    'password': 'password length should be 8-32 symbols and not contents spaces',
+}
+
+
+def _field(loc: tuple) -> str | dict:
+    # ('body',) -> 'body', ('body', 'email') -> {'body': 'email'},
+    # ('body', 'users', 0, 'email') -> {'body': {'users': {'0': 'email'}}}
+    field = str(loc[-1])
+    for part in reversed(loc[:-1]):
+        field = {str(part): field}
+    return field
+
+def _message(error: dict) -> str:
+    loc = error['loc']
+    if len(loc) > 1:
+        for part in reversed(loc):
+            if isinstance(part, str):
+                return FIELD_MESSAGES.get(part, error['msg'])
+    return error['msg']
 
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    error_messages = []
-    for error in exc.errors():
-        if len(error['loc']) > 1:
-            match error['loc'][1]:
-                case 'login':
-                    error["msg"] = 'invalid login'
-                case 'email':
-                    error["msg"] = 'invalid email'
-                case 'password':
-                    error["msg"] = 'password length should be 8-32 symbols and not contents spaces'
-            error_messages.append({"field": dict([tuple(error['loc'])]), "message": error["msg"]})
-        else:
-            error_messages.append({"field": error['loc'][0], "message": error["msg"]})
-    return JSONResponse(
-        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content={'status': status.HTTP_422_UNPROCESSABLE_ENTITY, "errors": error_messages},
-    )
+    # flatten_errors is lazy, so a body with thousands of invalid fields only
+    # pays for the errors that are actually reported.
+    errors = list(islice(flatten_errors(exc.raw_errors, exc.model.__config__), settings.validation_max_errors + 1))
+    content = {
+        'status': status.HTTP_422_UNPROCESSABLE_ENTITY,
+        'errors': [
+            {'field': _field(error['loc']), 'message': _message(error)}
+            for error in errors[:settings.validation_max_errors]
+        ],
+    }
+    if len(errors) > settings.validation_max_errors:
+        content['truncated'] = True
+    return ORJSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content=content)
@@ -0,0 +1,59 @@
+import time
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from services.metrics import registry, http_requests, http_request_duration
+
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+class MetricsMiddleware:
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._routes: dict = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started_at = time.perf_counter()
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = self._route_template(scope)
+            http_request_duration.observe(time.perf_counter() - started_at, scope['method'], route)
+            http_requests.inc(scope['method'], route, str(status_code))
+
+    def _route_template(self, scope: Scope) -> str:
+        # Starlette writes the matched endpoint into the scope; labels use the
+        # route's path template so that path parameters do not explode cardinality.
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        template = self._routes.get(endpoint)
+        if template is None:
+            template = UNMATCHED_ROUTE
+            for route in scope['app'].routes:
+                if getattr(route, 'endpoint', None) is endpoint and route.matches(scope)[0] == Match.FULL:
+                    template = route.path
+                    break
+            self._routes[endpoint] = template
+        return template
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(registry.render(), media_type='text/plain; version=0.0.4')
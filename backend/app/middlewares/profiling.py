@@ -0,0 +1,66 @@
+import cProfile, random, time
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from services import profiling
+from settings import settings
+
+
+class ProfilingMiddleware:
+    """
+    Profiles one request at a time: cProfile hooks the whole thread, so
+    concurrent coroutines that run while a request is profiled show up in
+    its call graph as well.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.header = settings.profiling_header.lower().encode('latin-1')
+        self._busy = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or self._busy or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        self._busy = True
+        active = profiling.ActiveProfile()
+        token = profiling.active.set(active)
+        profiler = cProfile.Profile()
+        started_at = time.time()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            profiling.active.reset(token)
+            self._busy = False
+            profiling.store.add(profiling.Profile(
+                id=profiling.store.next_id(),
+                method=scope['method'],
+                path=scope['path'],
+                status=status_code,
+                started_at=started_at,
+                seconds=time.perf_counter() - started,
+                statements=len(active.statements),
+                functions=profiling.functions(profiler, settings.profiling_max_functions),
+                sql=active.statements,
+            ))
+
+    def _requested(self, scope: Scope) -> bool:
+        if settings.profiling_secret:
+            for name, value in scope['headers']:
+                if name == self.header:
+                    return profiling.verify_signature(
+                        value.decode('latin-1'), scope['method'], scope['path'], settings.profiling_secret
+                    )
+        return settings.profiling_sample_rate > 0 and random.random() < settings.profiling_sample_rate
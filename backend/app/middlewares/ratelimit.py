@@ -0,0 +1,28 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from services.ratelimit import RateLimiter, rate_limiter, too_many_requests
+
+
+class RateLimitMiddleware:
+    """
+    Per-IP limits for the paths in `settings.rate_limit_ip_rules`, checked
+    before routing so a rejected request never reaches the database or bcrypt.
+    The client is `scope['client']`, which uvicorn resolves from
+    X-Forwarded-For for the peers in `settings.rate_limit_trusted_proxies`.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter = rate_limiter) -> None:
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['path'] not in self.limiter.ip_rules:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get('client')
+        retry_after = await self.limiter.check_ip(scope['path'], client[0] if client else 'unknown')
+        if retry_after:
+            await too_many_requests(retry_after)(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,44 @@
+import uuid
+from typing import Optional
+
+from sqlmodel import Column, Boolean, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+
+from .base import UUIDBaseModel
+from .base import Field
+
+
+
+
+class RefreshToken(UUIDBaseModel, table=True):
+    __tablename__ = 'refresh_tokens'
+
+    user_id: uuid.UUID = Field(
+        sa_column=Column(
+            UUID(as_uuid=True),
+            ForeignKey('users.id', ondelete='CASCADE'),
+            nullable=False,
+            index=True,
+    ))
+    family_id: uuid.UUID = Field(
+        sa_column=Column(
+            UUID(as_uuid=True),
+            nullable=False,
+            index=True,
+    ))
+    expires_at: int = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+    ))
+    replaced_by: Optional[uuid.UUID] = Field(
+        sa_column=Column(
+            UUID(as_uuid=True),
+            nullable=True,
+    ))
+    revoked: bool = Field(
+        sa_column=Column(
+            Boolean(),
+            server_default='False',
+            nullable=False,
+    ))
@@ -1,3 +1,6 @@
+from dataclasses import dataclass
+
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel
 
 
@@ -5,3 +8,32 @@ class BaseResponse(BaseModel):
     
     status: int | str
     message: str
+
+
+class PrerenderedResponse(JSONResponse):
+    """
+    A response whose body and headers were rendered ahead of time. It is still
+    a JSONResponse, so `isinstance(..., JSONResponse)` checks in handlers hold.
+    """
+
+    def __init__(self, status_code: int, body: bytes, raw_headers: tuple[tuple[bytes, bytes], ...]) -> None:
+        self.status_code = status_code
+        self.body = body
+        self.background = None
+        # Fresh list per response: handlers may still add cookies or headers.
+        self.raw_headers = list(raw_headers)
+
+
+@dataclass(frozen=True)
+class PrerenderedError:
+    status_code: int
+    body: bytes
+    raw_headers: tuple[tuple[bytes, bytes], ...]
+
+    def response(self) -> PrerenderedResponse:
+        return PrerenderedResponse(self.status_code, self.body, self.raw_headers)
+
+
+def prerender(status_code: int, content: BaseModel | dict) -> PrerenderedError:
+    rendered = ORJSONResponse(status_code=status_code, content=content.dict() if isinstance(content, BaseModel) else content)
+    return PrerenderedError(status_code, rendered.body, tuple(rendered.raw_headers))
@@ -1,4 +1,6 @@
-from .base import BaseResponse
+from fastapi import status
+
+from .base import BaseResponse, prerender
 
 
 class NoSuchUserResponse(BaseResponse):
@@ -44,3 +46,58 @@ class UserDoesNotExistsResponse(BaseResponse):
 
 class UserDoesNotActivatedResponse(BaseResponse):
     ...
+
+class PermissionDeniedResponse(BaseResponse):
+    ...
+
+class InvalidCursorResponse(BaseResponse):
+    ...
+
+class UnsupportedImportFormatResponse(BaseResponse):
+    ...
+
+class ImportTooLargeResponse(BaseResponse):
+    ...
+
+class UnreadableImportResponse(BaseResponse):
+    ...
+
+class UserUpdateConflictResponse(BaseResponse):
+    ...
+
+class NoSuchProfileResponse(BaseResponse):
+    ...
+
+class TooManyRequestsResponse(BaseResponse):
+    ...
+
+
+# Error responses rendered once at import: the hot error paths (bad
+# credentials, missing or invalid tokens) hand out a copy of these bytes
+# instead of building a model and encoding it on every hit.
+INVALID_TOKEN = prerender(status.HTTP_401_UNAUTHORIZED, InvalidTokenResponse(status=status.HTTP_401_UNAUTHORIZED, message='Token is invalid or has expired'))
+USER_NO_LONGER_EXISTS = prerender(status.HTTP_401_UNAUTHORIZED, NoSuchUserResponse(status=status.HTTP_401_UNAUTHORIZED, message='User no longer exist'))
+USER_NOT_VERIFIED = prerender(status.HTTP_401_UNAUTHORIZED, UserNotActivetedResponse(status=status.HTTP_401_UNAUTHORIZED, message='You are not verified'))
+NOT_LOGGED_IN = prerender(status.HTTP_401_UNAUTHORIZED, MissingTokenResponse(status=status.HTTP_401_UNAUTHORIZED, message='You are not logged in'))
+ADMIN_REQUIRED = prerender(status.HTTP_403_FORBIDDEN, PermissionDeniedResponse(status=status.HTTP_403_FORBIDDEN, message='Admin permissions required'))
+PASSWORDS_MISMATCH = prerender(status.HTTP_400_BAD_REQUEST, UserPasswordMismatchResponse(status=status.HTTP_400_BAD_REQUEST, message='Passwords mismatch'))
+USER_ALREADY_EXISTS = prerender(status.HTTP_409_CONFLICT, UserWasntCreatedResponse(status=status.HTTP_409_CONFLICT, message='User already exists'))
+INCORRECT_CREDENTIALS = prerender(status.HTTP_400_BAD_REQUEST, UserDoesNotExistsResponse(status=status.HTTP_400_BAD_REQUEST, message='Incorrect Email or Password'))
+EMAIL_NOT_VERIFIED = prerender(status.HTTP_401_UNAUTHORIZED, UserDoesNotActivatedResponse(status=status.HTTP_401_UNAUTHORIZED, message='Please verify your email address'))
+CANNOT_REFRESH_TOKEN = prerender(status.HTTP_400_BAD_REQUEST, UserDoesNotExistsResponse(status=status.HTTP_400_BAD_REQUEST, message='Cannot refresh token'))
+TOKEN_USER_NO_LONGER_EXISTS = prerender(status.HTTP_400_BAD_REQUEST, UserDoesNotExistsResponse(status=status.HTTP_400_BAD_REQUEST, message='The user belonging to this token no longer exist'))
+INVALID_REFRESH_TOKEN = prerender(status.HTTP_401_UNAUTHORIZED, InvalidTokenResponse(status=status.HTTP_401_UNAUTHORIZED, message='Refresh token is invalid or has expired'))
+MISSING_REFRESH_TOKEN = prerender(status.HTTP_400_BAD_REQUEST, MissingTokenResponse(status=status.HTTP_400_BAD_REQUEST, message='Please provide refresh token'))
+REFRESH_TOKEN_REUSED = prerender(status.HTTP_401_UNAUTHORIZED, InvalidTokenResponse(status=status.HTTP_401_UNAUTHORIZED, message='Refresh token was already used, please log in again'))
+INVALID_CURSOR = prerender(status.HTTP_400_BAD_REQUEST, InvalidCursorResponse(status=status.HTTP_400_BAD_REQUEST, message='Invalid cursor'))
+NO_SUCH_USER = prerender(status.HTTP_400_BAD_REQUEST, NoSuchUserResponse(status=status.HTTP_400_BAD_REQUEST, message='No such user'))
+NO_SUCH_USER_TO_UPDATE_LOGIN = prerender(status.HTTP_400_BAD_REQUEST, NoSuchUserResponse(status=status.HTTP_400_BAD_REQUEST, message='No such user to update login'))
+NO_SUCH_USER_TO_UPDATE_EMAIL = prerender(status.HTTP_400_BAD_REQUEST, NoSuchUserResponse(status=status.HTTP_400_BAD_REQUEST, message='No such user to update email'))
+NO_SUCH_USER_TO_UPDATE_PASSWORD = prerender(status.HTTP_400_BAD_REQUEST, NoSuchUserResponse(status=status.HTTP_400_BAD_REQUEST, message='No such user to update password'))
+NO_SUCH_USER_TO_DELETE = prerender(status.HTTP_400_BAD_REQUEST, NoSuchUserResponse(status=status.HTTP_400_BAD_REQUEST, message='No such user to delete'))
+PASSWORD_INCORRECT = prerender(status.HTTP_400_BAD_REQUEST, UserPasswordMismatchResponse(status=status.HTTP_400_BAD_REQUEST, message='Password is incorrect'))
+UPDATE_CONFLICT = prerender(status.HTTP_409_CONFLICT, UserUpdateConflictResponse(status=status.HTTP_409_CONFLICT, message='User was modified concurrently, fetch it and retry'))
+NO_SUCH_PROFILE = prerender(status.HTTP_404_NOT_FOUND, NoSuchProfileResponse(status=status.HTTP_404_NOT_FOUND, message='No such profile'))
+INVALID_CONFIRMATION_LINK = prerender(status.HTTP_400_BAD_REQUEST, {'status': 'failed', 'message': 'Confirmation link is invalid or has expired'})
+NO_SUCH_USER_TO_CONFIRM = prerender(status.HTTP_400_BAD_REQUEST, {'status': 'failed', 'message': 'No such user to confirm registration'})
+USER_ALREADY_ACTIVATED = prerender(status.HTTP_400_BAD_REQUEST, {'status': 'failed', 'message': 'This user is already activated'})
@@ -0,0 +1,24 @@
+from typing import Callable
+
+from fastapi.routing import APIRoute
+
+
+def prevalidated(endpoint: Callable) -> Callable:
+    """
+    Marks an endpoint whose return value is already an instance of its
+    `response_model`, so FastAPI can skip validating it a second time. The
+    model stays on the route for the OpenAPI schema. Do not use it where the
+    response model filters fields out of what the handler returns (`/users/me`).
+    """
+    endpoint.__prevalidated__ = True
+    return endpoint
+
+
+class PrevalidatedRoute(APIRoute):
+
+    def get_route_handler(self):
+        # FastAPI validates against the cloned field and documents the
+        # original one; dropping only the former keeps the schema intact.
+        if getattr(self.endpoint, '__prevalidated__', False):
+            self.secure_cloned_response_field = None
+        return super().get_route_handler()
@@ -1,8 +1,10 @@
 from fastapi import APIRouter
 from routers.v1 import user
 from routers.v1 import auth
+from routers.v1 import admin
 
 
 router = APIRouter(prefix='/v1')
 router.include_router(auth.router)
 router.include_router(user.router)
+router.include_router(admin.router)
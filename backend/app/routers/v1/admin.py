@@ -0,0 +1,39 @@
+from services import profiling
+from services.auth.oauth2 import require_admin
+from ..responses.user import NoSuchProfileResponse, NO_SUCH_PROFILE
+
+from fastapi import (
+    APIRouter, 
+    Depends,
+    status,
+)
+from fastapi.responses import JSONResponse
+
+from typing import Union
+
+
+router = APIRouter(prefix='/admin', tags=['ADMIN'])
+
+
+@router.get('/profiles', status_code=status.HTTP_200_OK, response_model=list[profiling.ProfileSummary])
+async def list_profiles_endpoint(
+    user_id: str | JSONResponse = Depends(require_admin)
+    ) -> list[profiling.ProfileSummary]:
+
+    if isinstance(user_id, JSONResponse):
+        return user_id
+    return profiling.store.list()
+
+@router.get('/profiles/{profile_id}', status_code=status.HTTP_200_OK, response_model=profiling.Profile)
+async def get_profile_endpoint(
+    profile_id: int,
+    user_id: str | JSONResponse = Depends(require_admin)
+    ) -> Union[NoSuchProfileResponse, profiling.Profile]:
+
+    if isinstance(user_id, JSONResponse):
+        return user_id
+
+    profile = profiling.store.get(profile_id)
+    if not profile:
+        return NO_SUCH_PROFILE.response()
+    return profile
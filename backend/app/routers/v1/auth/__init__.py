@@ -1,24 +1,37 @@
-import uuid
 from datetime import timedelta
 from typing import Union
 
 import schemas
 from settings import settings
-from services.auth.oauth2 import AuthJWT, MissingTokenError, require_user
+from services.auth.oauth2 import require_user
+from services.auth.token import tokens, MissingTokenError, REFRESH
+from services.auth.refresh import refresh_tokens
+from services.auth.principal import principal_cache
+from services.ratelimit import throttle
+from services.user_index import user_index
 from services.auth.cookie import Cookie
-from services.auth.password import verify_password
-from services.auth.encryption import get_decrypted_value, get_encrypted_key
+from services.auth.password import averify_password
+from services.auth.encryption import get_verification_token, get_verified_user_id
 from services.auth.confirmation import send_email
 from crud import user as usr
+from crud.utils.errors import RefreshTokenReuseError
 from routers.responses.user import (
     UserCreatedSuccessfullyResponse,
-    UserWasntCreatedResponse,
-    UserPasswordMismatchResponse,
     UserLoginSuccessfullyResponse,
-    UserDoesNotExistsResponse,
-    UserDoesNotActivatedResponse,
-    MissingTokenResponse,
+    PASSWORDS_MISMATCH,
+    USER_ALREADY_EXISTS,
+    INCORRECT_CREDENTIALS,
+    EMAIL_NOT_VERIFIED,
+    INVALID_CONFIRMATION_LINK,
+    NO_SUCH_USER_TO_CONFIRM,
+    USER_ALREADY_ACTIVATED,
+    CANNOT_REFRESH_TOKEN,
+    TOKEN_USER_NO_LONGER_EXISTS,
+    INVALID_REFRESH_TOKEN,
+    MISSING_REFRESH_TOKEN,
+    REFRESH_TOKEN_REUSED,
 )
+from routers.route import PrevalidatedRoute, prevalidated
 from database import get_session
 from database.core import AsyncSession
 
@@ -26,33 +39,37 @@ from fastapi import (
     APIRouter, 
     Depends,
     status,
+    Request,
     Response,
 )
 from fastapi.responses import JSONResponse
 from pydantic import EmailStr
 
 
-router = APIRouter(prefix='/auth', tags=['AUTH'])
+router = APIRouter(prefix='/auth', tags=['AUTH'], route_class=PrevalidatedRoute)
 
 
 
 @router.post('/register', status_code=status.HTTP_201_CREATED, response_model=schemas.UserWithID)
-async def create_user_endpoint(data: schemas.CreateUser, database_session: AsyncSession = Depends(get_session)) -> schemas.UserWithID:
+async def create_user_endpoint(
+    data: schemas.CreateUser, 
+    throttled: JSONResponse | None = Depends(throttle('register', 'email')),
+    database_session: AsyncSession = Depends(get_session),
+    ) -> schemas.UserWithID:
     
+    if throttled:
+        return throttled
     if data.password != data.confirm_password:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content=UserPasswordMismatchResponse(
-                status=status.HTTP_400_BAD_REQUEST,
-                message='Passwords mismatch'
-            ).dict()
-        )
+        return PASSWORDS_MISMATCH.response()
     data = data.dict()
     data['email'] = data['email'].lower()
     data['role'] = 'user'
-    user = await usr.create(data, database_session)
+    # A login and email the index has never seen cannot be taken, so the
+    # existence query in front of the bcrypt hash can be skipped.
+    precheck = user_index.might_exist(data['login'], EmailStr(data['email']))
+    user = await usr.create(data, database_session, precheck=precheck)
     if user:
-        user_key = get_encrypted_key(user.id)
+        user_key = get_verification_token(user.id)
         await send_email(to=data['email'], endpoint_key=f'/api/v1/auth/verify/{user_key}', user=user)
         return JSONResponse(
             status_code=status.HTTP_201_CREATED, 
@@ -63,58 +80,35 @@ async def create_user_endpoint(data: schemas.CreateUser, database_session: Async
             ).dict(),
         )
     
-    return JSONResponse(
-        status_code=status.HTTP_409_CONFLICT,
-        content=UserWasntCreatedResponse(
-            status=status.HTTP_409_CONFLICT,
-            message='User already exists'
-        ).dict(),
-    )
+    return USER_ALREADY_EXISTS.response()
 
 @router.post('/login', status_code=status.HTTP_200_OK, response_model=UserLoginSuccessfullyResponse)
+@prevalidated
 async def login_endpoint(
     data: Union[schemas.AuthenticateWithLogin, schemas.AuthenticateWithEmail], 
     response: Response,
-    auth: AuthJWT = Depends(),
+    throttled: JSONResponse | None = Depends(throttle('login', 'login', 'email')),
     database_session: AsyncSession = Depends(get_session),
     ) -> UserLoginSuccessfullyResponse:
 
+    if throttled:
+        return throttled
     if isinstance(data, schemas.AuthenticateWithLogin):
-        user = await usr.get(data.login, database_session, True)
+        user = await user_index.get(data.login, database_session, True)
     elif isinstance(data, schemas.AuthenticateWithEmail):
-        user = await usr.get(EmailStr(data.email.lower()), database_session, True)
+        user = await user_index.get(EmailStr(data.email.lower()), database_session, True)
     
     if not user:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content=UserDoesNotExistsResponse(
-                status=status.HTTP_400_BAD_REQUEST,
-                message='Incorrect Email or Password',
-            ).dict()
-        )
+        return INCORRECT_CREDENTIALS.response()
     if not user.is_active:
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content=UserDoesNotActivatedResponse(
-                status=status.HTTP_401_UNAUTHORIZED,
-                message='Please verify your email address',
-            ).dict()
-        )
-    if not verify_password(data.password, user.password):
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content=UserDoesNotExistsResponse(
-                status=status.HTTP_400_BAD_REQUEST,
-                message='Incorrect Email or Password',
-            ).dict()
-        )
-    access_token = auth.create_access_token(
+        return EMAIL_NOT_VERIFIED.response()
+    if not await averify_password(data.password, user.password):
+        return INCORRECT_CREDENTIALS.response()
+    refresh_token, family_id = await refresh_tokens.issue(str(user.id), database_session)
+    access_token = tokens.create_access_token(
         subject=str(user.id),
-        expires_time=timedelta(minutes=settings.access_token_expires_in)
-    )
-    refresh_token = auth.create_refresh_token(
-        subject=str(user.id),
-        expires_time=timedelta(minutes=settings.refresh_token_expires_in)
+        expires_time=timedelta(minutes=settings.access_token_expires_in),
+        claims={'fam': family_id},
     )
 
     response.set_cookie(
@@ -154,20 +148,14 @@ async def login_endpoint(
 @router.get('/verify/{key}', status_code=status.HTTP_200_OK)
 async def verify_user_enpoint(key: str,  database_session: AsyncSession = Depends(get_session)) -> JSONResponse:
     
-    cipher_key, encrypted_value = key.split(':')
-    user_id = get_decrypted_value(encrypted_value=encrypted_value, cipher_key=cipher_key.encode())
-    user = await usr.get(uuid.UUID(user_id), database_session)
-    if not user:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content={'status': 'failed', 'message': 'No such user to confirm registration'}
-        )
-    if user.is_active:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content={'status': 'failed', 'message': 'This user is already activated'}
-        )
-    await usr.update(schemas.UpdateUser(entity=uuid.UUID(user.id), update={'is_active': True}), database_session)
+    user_id = get_verified_user_id(key)
+    if not user_id:
+        return INVALID_CONFIRMATION_LINK.response()
+    if not await usr.activate(user_id, database_session):
+        # Only the miss path pays for a lookup, to tell the two failures apart.
+        if not await usr.get(user_id, database_session):
+            return NO_SUCH_USER_TO_CONFIRM.response()
+        return USER_ALREADY_ACTIVATED.response()
 
     return JSONResponse(
         status_code=status.HTTP_200_OK,
@@ -175,46 +163,39 @@ async def verify_user_enpoint(key: str,  database_session: AsyncSession = Depend
     )
 
 @router.get('/refresh', status_code=status.HTTP_200_OK, response_model=UserLoginSuccessfullyResponse)
+@prevalidated
 async def refresh_token_endpoint(
+    request: Request,
     response: Response,
-    auth: AuthJWT = Depends(),
     database_session: AsyncSession = Depends(get_session),
 ) -> UserLoginSuccessfullyResponse:
     
     try:
-        auth.jwt_refresh_token_required()
-        user_id = auth.get_jwt_subject()
+        claims = tokens.read(request, REFRESH)
+        user_id = claims.get('sub')
 
         if not user_id:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content=UserDoesNotExistsResponse(
-                    status=status.HTTP_400_BAD_REQUEST,
-                    message='Cannot refresh token',
-                ).dict()
-            )
-        user = await usr.get(uuid.UUID(user_id), database_session)
+            return CANNOT_REFRESH_TOKEN.response()
+        user = await principal_cache.get(user_id)
         if not user:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content=UserDoesNotExistsResponse(
-                    status=status.HTTP_400_BAD_REQUEST,
-                    message='The user belonging to this token no longer exist',
-                ).dict()
-            )
-        access_token = auth.create_access_token(
+            return TOKEN_USER_NO_LONGER_EXISTS.response()
+        rotated = await refresh_tokens.rotate(claims, database_session)
+        if not rotated:
+            return INVALID_REFRESH_TOKEN.response()
+        refresh_token, family_id = rotated
+        access_token = tokens.create_access_token(
             subject=str(user.id),
-            expires_time=timedelta(minutes=settings.access_token_expires_in)
+            expires_time=timedelta(minutes=settings.access_token_expires_in),
+            claims={'fam': family_id},
         )
 
     except MissingTokenError:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content=MissingTokenResponse(
-                status=status.HTTP_400_BAD_REQUEST,
-                message='Please provide refresh token',
-            ).dict()
-        )
+        return MISSING_REFRESH_TOKEN.response()
+    except RefreshTokenReuseError:
+        response = REFRESH_TOKEN_REUSED.response()
+        response.delete_cookie('access_token')
+        response.delete_cookie('refresh_token')
+        return response
     except Exception as ex:
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -229,6 +210,15 @@ async def refresh_token_endpoint(
             httponly=True,
         ).dict()
     )
+    response.set_cookie(
+        **Cookie(
+            key='refresh_token',
+            value=refresh_token,
+            max_age=settings.refresh_token_expires_in * 60,
+            expires=settings.refresh_token_expires_in * 60,
+            httponly=True,
+        ).dict()
+    )
     response.set_cookie(
         **Cookie(
             key='logged_in',
@@ -246,15 +236,20 @@ async def refresh_token_endpoint(
 
 @router.get('/logout', status_code=status.HTTP_200_OK)
 async def logout_endpoint(
+    request: Request,
     response: Response,
-    auth: AuthJWT = Depends(),
-    user_id: str | JSONResponse = Depends(require_user)
+    user_id: str | JSONResponse = Depends(require_user),
+    database_session: AsyncSession = Depends(get_session),
 ) -> JSONResponse:
     
     if isinstance(user_id, JSONResponse):
         return user_id
     
-    auth.unset_jwt_cookies()
+    family_id = tokens.read(request).get('fam')
+    if family_id:
+        await refresh_tokens.revoke(family_id, database_session)
+    response.delete_cookie('access_token')
+    response.delete_cookie('refresh_token')
     response.set_cookie('logged_in', '', -1)
 
     return {'status': 'success'}
\ No newline at end of file
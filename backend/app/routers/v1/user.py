@@ -1,38 +1,106 @@
-import re, uuid
+import re, uuid, json
 
 import schemas, models
-from database import get_session
-from database.core import AsyncSession
-from services.auth.oauth2 import require_user
+from settings import settings
+from database import get_session, get_read_session
+from database.core import AsyncSession, read_session
+from services.auth.oauth2 import require_user, require_admin
+from services.auth.refresh import refresh_tokens
 from crud import user as usr
-from crud.utils.errors import PasswordsMismatchError
+from crud.utils.errors import PasswordsMismatchError, ConcurrentUpdateError
+from crud.utils.pagination import InvalidCursorError, encode_cursor, decode_cursor
+from services.user_lookup import user_lookups
+from services.importer import FORMATS, ImportReport, ImportTooLargeError, ImportUnreadableError, import_users
+from ..route import PrevalidatedRoute, prevalidated
 from ..responses.user import (
     NoSuchUserResponse, 
     UserEmailUpdatedSuccessfully,
     UserLoginUpdatedSuccessfully,
     UserDeletedSuccessfully,
     UserPasswordUpdatedSuccessfully,
-    UserPasswordMismatchResponse,
+    InvalidCursorResponse,
+    UnsupportedImportFormatResponse,
+    ImportTooLargeResponse,
+    UnreadableImportResponse,
+    INVALID_CURSOR,
+    NO_SUCH_USER,
+    NO_SUCH_USER_TO_UPDATE_LOGIN,
+    NO_SUCH_USER_TO_UPDATE_EMAIL,
+    NO_SUCH_USER_TO_UPDATE_PASSWORD,
+    NO_SUCH_USER_TO_DELETE,
+    PASSWORD_INCORRECT,
+    UPDATE_CONFLICT,
 )
 
 from fastapi import (
     APIRouter, 
     Depends,
+    Header,
+    Query,
+    Request,
     status,
 )
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import EmailStr
 
 from typing import Union
 
 
-router = APIRouter(prefix='/users', tags=['USERS'])
+router = APIRouter(prefix='/users', tags=['USERS'], route_class=PrevalidatedRoute)
+
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
+
+def _parse_user_key(user: str) -> str | EmailStr | uuid.UUID:
+    if EMAIL_PATTERN.search(user):
+        return EmailStr(user.lower())
+    try:
+        return uuid.UUID(user)
+    except ValueError:
+        return user
+
+
+@router.get('', status_code=status.HTTP_200_OK, response_model=schemas.UsersPage)
+@prevalidated
+async def list_users_endpoint(
+    cursor: str | None = None,
+    limit: int = Query(default=50, ge=1, le=settings.user_page_max_limit),
+    role: str | None = None,
+    is_active: bool | None = None,
+    format: str = Query(default='json', regex='^(json|ndjson)$'),
+    user_id: str | JSONResponse = Depends(require_admin),
+    database_session: AsyncSession = Depends(get_read_session)
+    ) -> Union[InvalidCursorResponse, schemas.UsersPage]:
+
+    if isinstance(user_id, JSONResponse):
+        return user_id
+
+    if format == 'ndjson':
+        return StreamingResponse(_export_users(role, is_active), media_type='application/x-ndjson')
+
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except InvalidCursorError:
+        return INVALID_CURSOR.response()
+
+    users, next_after = await usr.get_page(database_session, limit, after, role, is_active)
+    return schemas.UsersPage(
+        users=users,
+        next_cursor=encode_cursor(*next_after) if next_after else None,
+    )
+
+async def _export_users(role: str | None, is_active: bool | None):
+    # The request's session is closed once the handler returns, so the
+    # export runs its server-side cursor on a session of its own.
+    async with read_session() as session:
+        async for users in usr.stream(session, role, is_active, settings.user_export_chunk_size):
+            yield ''.join(json.dumps(user.dict()) + '\n' for user in users)
 
 
 @router.get('/me', response_model=schemas.UserPrivate)
 async def get_me_endpoint(
     user_id: str | JSONResponse = Depends(require_user), 
-    database_session: AsyncSession = Depends(get_session)
+    database_session: AsyncSession = Depends(get_read_session)
     ) -> schemas.UserPrivate:
     
     if isinstance(user_id, JSONResponse):
@@ -43,29 +111,71 @@ async def get_me_endpoint(
 @router.get('/get', status_code=status.HTTP_200_OK, response_model=schemas.UserWithID)
 async def get_user_endpoint(
     user: str | EmailStr | uuid.UUID, 
-    database_session: AsyncSession = Depends(get_session)
+    if_none_match: str | None = Header(None),
     ) -> Union[NoSuchUserResponse, schemas.UserWithID]:
     
-    if re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', user):
-        result = await usr.get(EmailStr(user.lower()), database_session)
-    else:
-        try:
-            user = uuid.UUID(user)
-        except ValueError:
-            ...
-        result = await usr.get(user, database_session)
+    result = await user_lookups.get(_parse_user_key(user))
     
     if not result:
+        return NO_SUCH_USER.response()
+    return user_lookups.respond(result, if_none_match)
+
+@router.post('/batch', status_code=status.HTTP_200_OK, response_model=schemas.UsersBatchResult)
+@prevalidated
+async def get_users_batch_endpoint(
+    data: schemas.UsersBatch,
+    database_session: AsyncSession = Depends(get_read_session)
+    ) -> schemas.UsersBatchResult:
+
+    users = await usr.get_many([_parse_user_key(user) for user in data.users], database_session)
+
+    return schemas.UsersBatchResult(
+        users=users,
+        missing=[key for key, user in zip(data.users, users) if user is None],
+    )
+
+@router.post('/import', status_code=status.HTTP_200_OK, response_model=ImportReport)
+@prevalidated
+async def import_users_endpoint(
+    request: Request,
+    user_id: str | JSONResponse = Depends(require_admin),
+    database_session: AsyncSession = Depends(get_session)
+    ) -> Union[UnsupportedImportFormatResponse, ImportTooLargeResponse, UnreadableImportResponse, ImportReport]:
+
+    if isinstance(user_id, JSONResponse):
+        return user_id
+
+    content_type = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    if content_type not in FORMATS:
         return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST, 
-            content=NoSuchUserResponse(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            content=UnsupportedImportFormatResponse(
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                message=f"Supported content types: {', '.join(FORMATS)}"
+            ).dict(),
+        )
+
+    try:
+        return await import_users(request.stream(), FORMATS[content_type], database_session)
+    except ImportTooLargeError as ex:
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content=ImportTooLargeResponse(
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                message=str(ex)
+            ).dict(),
+        )
+    except ImportUnreadableError as ex:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content=UnreadableImportResponse(
                 status=status.HTTP_400_BAD_REQUEST,
-                message='No such user'
+                message=str(ex)
             ).dict(),
         )
-    return result
 
 @router.put('/update/login', status_code=status.HTTP_200_OK, response_model=UserLoginUpdatedSuccessfully)
+@prevalidated
 async def update_login_user_endpoint(
     user_data: schemas.UpdateUserLogin, 
     database_session: AsyncSession = Depends(get_session),
@@ -75,16 +185,20 @@ async def update_login_user_endpoint(
     if isinstance(user_id, JSONResponse):
         return user_id
     
-    result = await usr.update(schemas.UpdateUser(entity=user_data.old_login, update={'login': user_data.new_login}), database_session)
+    try:
+        result = await usr.update(
+            schemas.UpdateUser(
+                entity=user_data.old_login,
+                update={'login': user_data.new_login},
+                expected_updated_at=user_data.expected_updated_at,
+            ),
+            database_session
+        )
+    except ConcurrentUpdateError:
+        return _update_conflict()
     
     if not result:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST, 
-            content=NoSuchUserResponse(
-                status=status.HTTP_400_BAD_REQUEST,
-                message='No such user to update login'
-            ).dict(),
-        )
+        return NO_SUCH_USER_TO_UPDATE_LOGIN.response()
     
     return UserLoginUpdatedSuccessfully(
         status=status.HTTP_200_OK,
@@ -92,6 +206,7 @@ async def update_login_user_endpoint(
     )
 
 @router.put('/update/email', status_code=status.HTTP_200_OK, response_model=UserEmailUpdatedSuccessfully)
+@prevalidated
 async def update_email_user_endpoint(
     user_data: schemas.UpdateUserEmail, 
     database_session: AsyncSession = Depends(get_session),
@@ -101,16 +216,20 @@ async def update_email_user_endpoint(
     if isinstance(user_id, JSONResponse):
         return user_id
     
-    result = await usr.update(schemas.UpdateUser(entity=EmailStr(user_data.old_email), update={'email': EmailStr(user_data.new_email)}), database_session)
+    try:
+        result = await usr.update(
+            schemas.UpdateUser(
+                entity=EmailStr(user_data.old_email),
+                update={'email': EmailStr(user_data.new_email)},
+                expected_updated_at=user_data.expected_updated_at,
+            ),
+            database_session
+        )
+    except ConcurrentUpdateError:
+        return _update_conflict()
 
     if not result:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST, 
-            content=NoSuchUserResponse(
-                status=status.HTTP_400_BAD_REQUEST,
-                message='No such user to update email'
-            ).dict(),
-        )
+        return NO_SUCH_USER_TO_UPDATE_EMAIL.response()
     
     return UserEmailUpdatedSuccessfully(
         status=status.HTTP_200_OK,
@@ -118,6 +237,7 @@ async def update_email_user_endpoint(
     )
 
 @router.put('/update/password', status_code=status.HTTP_200_OK, response_model=UserPasswordUpdatedSuccessfully)
+@prevalidated
 async def update_password_endpoint(
     user_data: schemas.UpdateUserPassword, 
     database_session: AsyncSession = Depends(get_session),
@@ -134,26 +254,19 @@ async def update_password_endpoint(
                 update={
                     'old_password': user_data.old_password,
                     'password': user_data.new_password,
-                }
+                },
+                expected_updated_at=user_data.expected_updated_at,
             ),
             database_session
             )
+    except ConcurrentUpdateError:
+        return _update_conflict()
     except PasswordsMismatchError:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content=UserPasswordMismatchResponse(
-                status=status.HTTP_400_BAD_REQUEST,
-                message='Password is incorrect'
-            ).dict(),
-        )
+        return PASSWORD_INCORRECT.response()
     if not result:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST, 
-            content=NoSuchUserResponse(
-                status=status.HTTP_400_BAD_REQUEST,
-                message='No such user to update password'
-            ).dict(),
-        )
+        return NO_SUCH_USER_TO_UPDATE_PASSWORD.response()
+    # Every session opened with the old password ends here, this one included.
+    await refresh_tokens.revoke_user(user_id, database_session)
     
     return UserPasswordUpdatedSuccessfully(
         status=status.HTTP_200_OK,
@@ -161,6 +274,7 @@ async def update_password_endpoint(
     )
 
 @router.delete('/delete', status_code=status.HTTP_200_OK, response_model=UserDeletedSuccessfully)
+@prevalidated
 async def delete_user_endpoint(
     database_session: AsyncSession = Depends(get_session),
     user_id: str | JSONResponse = Depends(require_user)
@@ -169,18 +283,19 @@ async def delete_user_endpoint(
     if isinstance(user_id, JSONResponse):
         return user_id
 
+    # Announces the user's families to every worker before the rows go with
+    # the user (ON DELETE CASCADE), so their access tokens stop working there
+    # too instead of riding on a cached principal.
+    await refresh_tokens.revoke_user(user_id, database_session)
     result = await usr.delete(uuid.UUID(user_id), database_session)
 
     if not result:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST, 
-            content=NoSuchUserResponse(
-                status=status.HTTP_400_BAD_REQUEST,
-                message='No such user to delete'
-            ).dict(),
-        )
+        return NO_SUCH_USER_TO_DELETE.response()
     
     return UserDeletedSuccessfully(
         status=status.HTTP_200_OK,
         message='User successfully deleted'
-    )
\ No newline at end of file
+    )
+
+def _update_conflict() -> JSONResponse:
+    return UPDATE_CONFLICT.response()
\ No newline at end of file
@@ -13,6 +13,9 @@ from .user import (
     UpdateUserPassword,
     UpdateUser,
     UpdateUserPasswordWithId,
+    UsersBatch,
+    UsersBatchResult,
+    UsersPage,
 )
 
 
@@ -31,4 +34,7 @@ __all__ = [
     'AuthenticateWithEmail',
     'UpdateUserPasswordWithLogin',
     'UpdateUserPasswordWithEmail',
+    'UsersBatch',
+    'UsersBatchResult',
+    'UsersPage',
 ]
\ No newline at end of file
@@ -1,8 +1,9 @@
 import uuid
 from datetime import datetime
 
-from pydantic import BaseModel, EmailStr, Field, constr
+from pydantic import BaseModel, EmailStr, Field, constr, conlist
 
+from settings import settings
 
 
 class UserBase(BaseModel):
@@ -32,16 +33,19 @@ class UpdateUserLogin(BaseModel):
 
     old_login: str
     new_login: str
+    expected_updated_at: datetime | None = None
 
 class UpdateUserPassword(BaseModel):
 
     old_password: str
     new_password: str
+    expected_updated_at: datetime | None = None
 
 class UpdateUserEmail(BaseModel):
     
     old_email: EmailStr
     new_email: EmailStr
+    expected_updated_at: datetime | None = None
 
 class UpdateUserPasswordWithLogin(UpdateUserPassword):
 
@@ -79,3 +83,19 @@ class UpdateUser(BaseModel):
     
     entity:  str | EmailStr | uuid.UUID
     update: dict
+    expected_updated_at: datetime | None = None
+
+
+class UsersBatch(BaseModel):
+
+    users: conlist(str, min_items=1, max_items=settings.user_batch_max_size)
+
+class UsersBatchResult(BaseModel):
+
+    users: list[UserWithID | None]
+    missing: list[str]
+
+class UsersPage(BaseModel):
+
+    users: list[UserWithID]
+    next_cursor: str | None
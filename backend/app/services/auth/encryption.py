@@ -1,21 +1,41 @@
-import base64
+import base64, binascii, hashlib, hmac, struct, time, uuid
 
+from settings import settings
 
-from cryptography.fernet import Fernet
 
+_PAYLOAD = struct.Struct('>16sQ')
+_MAC_SIZE = 16
 
-def get_encrypted_key(key: str) -> str:
-    
-    random_cipher_key = Fernet.generate_key()
-    cipher = Fernet(random_cipher_key)
-    encrypted_key = base64.b64encode(cipher.encrypt(key.encode('utf-8'))).decode('utf-8')
 
-    return f'{random_cipher_key.decode()}:{encrypted_key}'
+def _derive_key(secret: str) -> bytes:
+    return hashlib.sha256(b'email-verification:' + secret.encode('utf-8')).digest()
 
+# The first key signs new tokens; the rest are only accepted, so a key can be
+# rotated out without invalidating links that are already in mailboxes.
+keyring: list[bytes] = [key.encode('utf-8') for key in settings.verification_keys] or [_derive_key(settings.jwt_private_key)]
 
-def get_decrypted_value(encrypted_value: str, cipher_key: Fernet) -> str:
-    
-    cipher = Fernet(cipher_key)
-    return cipher.decrypt(base64.b64decode(encrypted_value)).decode('utf-8')
 
+def _sign(key: bytes, payload: bytes) -> bytes:
+    return hmac.new(key, payload, hashlib.sha256).digest()[:_MAC_SIZE]
 
+
+def get_verification_token(user_id: str | uuid.UUID, ttl: int = settings.verification_token_ttl) -> str:
+    payload = _PAYLOAD.pack(uuid.UUID(str(user_id)).bytes, int(time.time()) + ttl)
+    return base64.urlsafe_b64encode(payload + _sign(keyring[0], payload)).rstrip(b'=').decode('ascii')
+
+
+def get_verified_user_id(token: str) -> uuid.UUID | None:
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    except (binascii.Error, ValueError):
+        return None
+    if len(raw) != _PAYLOAD.size + _MAC_SIZE:
+        return None
+
+    payload, mac = raw[:_PAYLOAD.size], raw[_PAYLOAD.size:]
+    if not any(hmac.compare_digest(mac, _sign(key, payload)) for key in keyring):
+        return None
+    user_id, expires_at = _PAYLOAD.unpack(payload)
+    if expires_at < time.time():
+        return None
+    return uuid.UUID(bytes=user_id)
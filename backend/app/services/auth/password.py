@@ -1,7 +1,31 @@
+import asyncio, time, weakref
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass
+
 from passlib.context import CryptContext
 
+from settings import settings
+
 pwd_cxt = CryptContext(schemes=['bcrypt'], deprecated='auto')
 
+
+@dataclass
+class PasswordPoolStats:
+    queued: int = 0
+    running: int = 0
+    completed: int = 0
+    total_wait_seconds: float = 0.0
+    total_run_seconds: float = 0.0
+
+
+stats = PasswordPoolStats()
+
+_executor: Executor | None = None
+# One per event loop: an asyncio.Semaphore binds to the loop it is first
+# awaited on and cannot be shared with another.
+_semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = weakref.WeakKeyDictionary()
+
+
 def compare_passwords(password: str, confirm_password: str) -> bool:
     if password != confirm_password:
         return False
@@ -12,3 +36,60 @@ def get_password_hash(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_cxt.verify(plain_password, hashed_password)
+
+async def aget_password_hash(password: str) -> str:
+    return await _run_in_pool(get_password_hash, password)
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_pool(verify_password, plain_password, hashed_password)
+
+def shutdown_pool(wait: bool = True) -> None:
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown(wait=wait)
+    _executor = None
+    _semaphores.clear()
+
+def _get_executor() -> Executor:
+    global _executor
+
+    if _executor is None:
+        match settings.password_hash_executor:
+            case 'process':
+                _executor = ProcessPoolExecutor(max_workers=settings.password_hash_workers)
+            case 'thread':
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.password_hash_workers,
+                    thread_name_prefix='password-hash',
+                )
+            case _:
+                raise ValueError(f'Unknown password hash executor: {settings.password_hash_executor}')
+    return _executor
+
+def _get_semaphore(loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(settings.password_hash_max_concurrency)
+    return semaphore
+
+async def _run_in_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    semaphore = _get_semaphore(loop)
+    queued_at = time.perf_counter()
+    stats.queued += 1
+    try:
+        await semaphore.acquire()
+    finally:
+        stats.queued -= 1
+
+    stats.running += 1
+    started_at = time.perf_counter()
+    stats.total_wait_seconds += started_at - queued_at
+    try:
+        return await loop.run_in_executor(_get_executor(), func, *args)
+    finally:
+        semaphore.release()
+        stats.running -= 1
+        stats.completed += 1
+        stats.total_run_seconds += time.perf_counter() - started_at
@@ -0,0 +1,56 @@
+import uuid
+from dataclasses import dataclass, asdict
+
+from crud.utils import hooks
+from services.cache import CacheBackend, get_backend
+from services.singleflight import get_principal
+from settings import settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: str
+    is_active: bool
+    role: str
+
+
+class PrincipalCache:
+
+    def __init__(self, backend: CacheBackend, ttl: float) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, user_id: str) -> Principal | None:
+        cached = await self.backend.get(user_id)
+        if cached is not None:
+            self.hits += 1
+            return Principal(**cached)
+
+        self.misses += 1
+        row = await get_principal(uuid.UUID(user_id))
+        if not row:
+            return None
+        principal = Principal(id=str(row.id), is_active=row.is_active, role=row.role)
+        await self.backend.set(user_id, asdict(principal), self.ttl)
+        return principal
+
+    async def invalidate(self, user_id: str | uuid.UUID) -> None:
+        await self.backend.delete(str(user_id))
+
+
+principal_cache = PrincipalCache(
+    backend=get_backend(
+        settings.principal_cache_backend,
+        max_size=settings.principal_cache_size,
+        redis_dsn=settings.redis_dsn,
+        prefix='principal:',
+    ),
+    ttl=settings.principal_cache_ttl,
+)
+
+
+@hooks.register
+async def _invalidate_principal(event: hooks.UserEvent) -> None:
+    await principal_cache.invalidate(event.id)
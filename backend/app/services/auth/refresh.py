@@ -0,0 +1,122 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import orjson
+
+from crud import token as tkn
+from crud.utils.errors import RefreshTokenReuseError
+from database.core import AsyncSession, async_engine
+from services.auth.token import tokens
+from services.bloom import BloomFilter
+from services.notify import Listener
+from settings import settings
+
+
+class RefreshTokenStore:
+    """
+    Refresh tokens are rows in `refresh_tokens`, one per JTI, grouped into a
+    family per login. Revocation is per family and access tokens carry the
+    family id in `fam`, so logging out also cuts off outstanding access tokens.
+
+    Revoked families are mirrored into a Bloom filter: a negative answer needs
+    no round trip, a positive one is confirmed against the table. Every
+    revocation is announced on `tkn.REVOCATIONS` in its own transaction, so
+    each worker's filter hears about it on commit. A negative is only trusted
+    while that channel is up and the filter was loaded after it came up;
+    otherwise every check goes to the table.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, expires_in: timedelta, notify: bool = True) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.revoked = BloomFilter(capacity, error_rate)
+        self.listener = Listener(tkn.REVOCATIONS, self._on_notify, self._reload, listen=notify)
+        self._loading: BloomFilter | None = None
+        self.expires_in = expires_in
+        self.bloom_negatives = 0
+        self.lookups = 0
+        self.reuses = 0
+
+    async def issue(self, user_id: str, _session: AsyncSession) -> tuple[str, str]:
+        family_id = uuid.uuid4()
+        jti = uuid.uuid4()
+        await tkn.create(jti, uuid.UUID(user_id), family_id, self._expires_at(), _session)
+        return self._encode(user_id, family_id, jti), str(family_id)
+
+    async def rotate(self, claims: dict, _session: AsyncSession) -> tuple[str, str] | None:
+        jti = uuid.uuid4()
+        try:
+            family_id = await tkn.rotate(uuid.UUID(claims['jti']), jti, self._expires_at(), _session)
+        except RefreshTokenReuseError as ex:
+            self.reuses += 1
+            self._add(str(ex.args[0]))
+            raise
+        if family_id is None:
+            return
+        return self._encode(claims['sub'], family_id, jti), str(family_id)
+
+    async def revoke(self, family_id: str, _session: AsyncSession) -> bool:
+        self._add(family_id)
+        return await tkn.revoke_family(uuid.UUID(family_id), _session)
+
+    async def revoke_user(self, user_id: str | uuid.UUID, _session: AsyncSession) -> None:
+        for family_id in await tkn.revoke_user(uuid.UUID(str(user_id)), _session):
+            self._add(str(family_id))
+
+    async def is_revoked(self, family_id: str, _session: AsyncSession) -> bool:
+        if self.listener.ready and family_id not in self.revoked:
+            self.bloom_negatives += 1
+            return False
+        self.lookups += 1
+        return await tkn.is_family_revoked(uuid.UUID(family_id), _session)
+
+    async def load(self, _session: AsyncSession) -> None:
+        # Filled aside and swapped in, so checks never see a half-loaded
+        # filter; revocations heard meanwhile go into both.
+        self._loading = BloomFilter(self.capacity, self.error_rate)
+        try:
+            async for families in tkn.revoked_families(_session):
+                self._loading.update(str(family_id) for family_id in families)
+            self.revoked = self._loading
+        finally:
+            self._loading = None
+
+    async def start(self) -> None:
+        await self.listener.start()
+
+    async def stop(self) -> None:
+        await self.listener.stop()
+
+    def _add(self, family_id: str) -> None:
+        for bloom in (self.revoked, self._loading):
+            if bloom is not None:
+                bloom.add(family_id)
+
+    def _on_notify(self, payload: str) -> None:
+        for family_id in orjson.loads(payload):
+            self._add(family_id)
+
+    async def _reload(self) -> None:
+        # The primary: a lagging replica could miss a revocation whose
+        # notification was already delivered before LISTEN.
+        async with AsyncSession(bind=async_engine) as session:
+            await self.load(session)
+
+    def _encode(self, user_id: str, family_id: uuid.UUID, jti: uuid.UUID) -> str:
+        return tokens.create_refresh_token(
+            subject=user_id,
+            expires_time=self.expires_in,
+            claims={'fam': str(family_id)},
+            jti=str(jti),
+        )
+
+    def _expires_at(self) -> datetime:
+        return datetime.now(timezone.utc) + self.expires_in
+
+
+refresh_tokens = RefreshTokenStore(
+    capacity=settings.refresh_revocation_capacity,
+    error_rate=settings.refresh_revocation_error_rate,
+    expires_in=timedelta(minutes=settings.refresh_token_expires_in),
+    notify=settings.refresh_revocation_notify,
+)
@@ -0,0 +1,115 @@
+import base64, time, uuid
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any
+
+import jwt
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+from fastapi import Request
+
+from settings import settings
+
+
+ACCESS = 'access'
+REFRESH = 'refresh'
+
+COOKIES = {
+    ACCESS: 'access_token',
+    REFRESH: 'refresh_token',
+}
+
+
+class MissingTokenError(Exception):
+    ...
+
+class InvalidTokenError(Exception):
+    ...
+
+
+class TokenService:
+
+    def __init__(self, algorithm: str, private_key: str, public_key: str, cache_size: int = 10_000) -> None:
+        self.algorithm = algorithm
+        if algorithm.startswith('HS'):
+            self._signing_key = self._verifying_key = private_key
+        else:
+            self._signing_key = load_pem_private_key(private_key.encode('utf-8'), password=None, backend=default_backend())
+            self._verifying_key = load_pem_public_key(public_key.encode('utf-8'), backend=default_backend())
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._verified: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    def create_access_token(self, subject: str, expires_time: timedelta, fresh: bool = False, claims: dict | None = None) -> str:
+        return self._encode(subject, ACCESS, expires_time, fresh=fresh, claims=claims)
+
+    def create_refresh_token(self, subject: str, expires_time: timedelta, claims: dict | None = None, jti: str | None = None) -> str:
+        return self._encode(subject, REFRESH, expires_time, claims=claims, jti=jti)
+
+    def verify(self, token: str, type: str = ACCESS) -> dict[str, Any]:
+        claims = self._verified.get(token)
+        if claims is not None and claims['exp'] > time.time():
+            self._verified.move_to_end(token)
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+            try:
+                claims = jwt.decode(token, self._verifying_key, algorithms=[self.algorithm])
+            except jwt.InvalidTokenError as ex:
+                self._verified.pop(token, None)
+                raise InvalidTokenError(str(ex)) from ex
+            if 'exp' in claims:
+                self._remember(token, claims)
+
+        if claims.get('type') != type:
+            raise InvalidTokenError(f'Expected {type} token')
+        return claims
+
+    def read(self, request: Request, type: str = ACCESS) -> dict[str, Any]:
+        token = request.cookies.get(COOKIES[type])
+        if not token:
+            scheme, _, credentials = request.headers.get('authorization', '').partition(' ')
+            if scheme.lower() == 'bearer' and credentials:
+                token = credentials
+        if not token:
+            raise MissingTokenError(f'Missing {COOKIES[type]}')
+        return self.verify(token, type)
+
+    def _encode(
+        self, 
+        subject: str, 
+        type: str, 
+        expires_time: timedelta, 
+        fresh: bool = False, 
+        claims: dict | None = None, 
+        jti: str | None = None,
+    ) -> str:
+        now = int(time.time())
+        payload = {
+            **(claims or {}),
+            'sub': subject,
+            'iat': now,
+            'nbf': now,
+            'jti': jti or str(uuid.uuid4()),
+            'exp': now + int(expires_time.total_seconds()),
+            'type': type,
+        }
+        if type == ACCESS:
+            payload['fresh'] = fresh
+        token = jwt.encode(payload, self._signing_key, algorithm=self.algorithm)
+        return token.decode('utf-8') if isinstance(token, bytes) else token
+
+    def _remember(self, token: str, claims: dict[str, Any]) -> None:
+        self._verified[token] = claims
+        self._verified.move_to_end(token)
+        while len(self._verified) > self.cache_size:
+            self._verified.popitem(last=False)
+
+
+tokens = TokenService(
+    algorithm=settings.jwt_algorithm,
+    private_key=base64.b64decode(settings.jwt_private_key).decode('utf-8'),
+    public_key=base64.b64decode(settings.jwt_public_key).decode('utf-8'),
+    cache_size=settings.token_cache_size,
+)
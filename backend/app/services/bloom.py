@@ -0,0 +1,56 @@
+import math
+from hashlib import blake2b
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter. Membership answers are "definitely not" or
+    "probably yes", so a positive has to be confirmed against the source of truth.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        if capacity <= 0:
+            raise ValueError('capacity must be positive')
+        if not 0 < error_rate < 1:
+            raise ValueError('error_rate must be between 0 and 1')
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[i >> 3] & (1 << (i & 7)) for i in self._indexes(item))
+
+    def add(self, item: str) -> None:
+        for i in self._indexes(item):
+            self._bits[i >> 3] |= 1 << (i & 7)
+        self.count += 1
+
+    def update(self, items) -> None:
+        for item in items:
+            self.add(item)
+
+    def clear(self) -> None:
+        self._bits = bytearray(len(self._bits))
+        self.count = 0
+
+    @property
+    def fill_ratio(self) -> float:
+        return sum(bin(byte).count('1') for byte in self._bits) / self.size
+
+    @property
+    def estimated_error_rate(self) -> float:
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+    def _indexes(self, item: str):
+        # Kirsch-Mitzenmacher: two 64-bit halves of one digest give every index.
+        digest = blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
@@ -0,0 +1,16 @@
+from .backends import (
+    CacheBackend,
+    MemoryBackend,
+    RedisBackend,
+    FakeRedis,
+    get_backend,
+)
+
+
+__all__ = [
+    'CacheBackend',
+    'MemoryBackend',
+    'RedisBackend',
+    'FakeRedis',
+    'get_backend',
+]
@@ -0,0 +1,148 @@
+import json, time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any
+
+
+class CacheBackend(ABC):
+
+    @abstractmethod
+    async def get(self, key: str) -> Any | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+
+class MemoryBackend(CacheBackend):
+
+    def __init__(self, max_size: int = 10_000) -> None:
+        self.max_size = max_size
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def get(self, key: str) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def clear(self) -> None:
+        self._data.clear()
+
+
+class RedisBackend(CacheBackend):
+    """
+    Works with any client exposing the redis.asyncio `get`/`set(ex=)`/`delete`
+    coroutines, e.g. `redis.asyncio.Redis` or `FakeRedis`.
+    """
+
+    def __init__(self, client: Any, prefix: str = 'cache:') -> None:
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Any | None:
+        raw = await self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(ttl)))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+    async def clear(self) -> None:
+        async for key in self.client.scan_iter(match=self.prefix + '*'):
+            await self.client.delete(key)
+
+
+class FakeRedis:
+    """In-process stand-in for `redis.asyncio.Redis`, for tests and local runs."""
+
+    def __init__(self) -> None:
+        self._data: dict[str, tuple[float | None, bytes]] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str | bytes, ex: int | None = None) -> bool:
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        self._data[key] = (time.monotonic() + ex if ex else None, value)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        value = int(await self.get(key) or 0) + amount
+        expires_at = self._data[key][0] if key in self._data else None
+        self._data[key] = (expires_at, str(value).encode('utf-8'))
+        return value
+
+    async def decr(self, key: str, amount: int = 1) -> int:
+        return await self.incr(key, -amount)
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        if await self.get(key) is None:
+            return False
+        self._data[key] = (time.monotonic() + seconds, self._data[key][1])
+        return True
+
+    async def scan_iter(self, match: str = '*'):
+        prefix = match.rstrip('*')
+        for key in list(self._data):
+            if key.startswith(prefix):
+                yield key
+
+
+def get_backend(name: str, max_size: int = 10_000, redis_dsn: str | None = None, prefix: str = 'cache:') -> CacheBackend:
+    match name:
+        case 'memory':
+            return MemoryBackend(max_size=max_size)
+        case 'fakeredis':
+            return RedisBackend(FakeRedis(), prefix=prefix)
+        case 'redis':
+            try:
+                from redis import asyncio as redis
+            except ImportError as ex:
+                raise RuntimeError('The "redis" package is required for the redis cache backend') from ex
+            if not redis_dsn:
+                raise ValueError('redis_dsn is required for the redis cache backend')
+            return RedisBackend(redis.from_url(redis_dsn), prefix=prefix)
+        case _:
+            raise ValueError(f'Unknown cache backend: {name}')
@@ -0,0 +1,151 @@
+import asyncio, codecs, csv, io, json, tempfile, time
+from typing import AsyncIterator, Iterator
+
+from pydantic import BaseModel, ValidationError
+
+import schemas
+from crud import user as usr
+from database.core import AsyncSession
+from services.auth.password import aget_password_hash
+from settings import settings
+
+
+FORMATS = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+}
+
+
+class ImportTooLargeError(Exception):
+    ...
+
+
+class ImportUnreadableError(Exception):
+    ...
+
+
+class ImportRowReport(BaseModel):
+
+    row: int
+    login: str | None = None
+    status: str
+    errors: list[str] = []
+
+
+class ImportReport(BaseModel):
+
+    created: int = 0
+    conflicts: int = 0
+    invalid: int = 0
+    rows: list[ImportRowReport] = []
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+
+
+async def import_users(body: AsyncIterator[bytes], format: str, _session: AsyncSession) -> ImportReport:
+    started_at = time.perf_counter()
+    report = ImportReport()
+
+    with tempfile.SpooledTemporaryFile(max_size=settings.user_import_spool_bytes) as spool:
+        # Decoded once while spooling, so a body that is not UTF-8 is turned
+        # away before any row reaches the database.
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        size = 0
+        try:
+            async for chunk in body:
+                if size + len(chunk) > settings.user_import_max_bytes:
+                    raise ImportTooLargeError(f'Import is larger than {settings.user_import_max_bytes} bytes')
+                decoder.decode(chunk)
+                spool.write(chunk)
+                size += len(chunk)
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError as ex:
+            raise ImportUnreadableError(f'Import is not valid UTF-8 (byte {size + ex.start})') from ex
+        spool.seek(0)
+
+        text = io.TextIOWrapper(spool, encoding='utf-8', newline='')
+        batch: list[tuple[int, dict]] = []
+        number = 0
+        try:
+            for number, row in _read_rows(text, format):
+                batch.append((number, row))
+                if len(batch) >= settings.user_import_batch_size:
+                    await _import_batch(batch, report, _session)
+                    batch = []
+        except csv.Error as ex:
+            raise ImportUnreadableError(
+                f'Malformed CSV after row {number}: {ex} ({report.created} users created before it)'
+            ) from ex
+        await _import_batch(batch, report, _session)
+
+    report.rows.sort(key=lambda row: row.row)
+    total = report.created + report.conflicts + report.invalid
+    report.elapsed_seconds = time.perf_counter() - started_at
+    report.rows_per_second = total / report.elapsed_seconds if report.elapsed_seconds else 0.0
+    return report
+
+def _read_rows(text: io.TextIOBase, format: str) -> Iterator[tuple[int, dict]]:
+    match format:
+        case 'csv':
+            for number, row in enumerate(csv.DictReader(text), start=1):
+                yield number, row
+        case 'ndjson':
+            for number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield number, row if isinstance(row, dict) else {}
+        case _:
+            raise ValueError(f'Unknown import format: {format}')
+
+async def _import_batch(batch: list[tuple[int, dict]], report: ImportReport, _session: AsyncSession) -> None:
+    valid: list[tuple[int, schemas.CreateUser]] = []
+    for number, row in batch:
+        if None in row:
+            # csv.DictReader files the fields past the header under None.
+            report.invalid += 1
+            report.rows.append(ImportRowReport(row=number, login=row.get('login'), status='invalid', errors=['unexpected extra columns']))
+            continue
+        row = {key: value for key, value in row.items() if value not in (None, '')}
+        row.setdefault('confirm_password', row.get('password', ''))
+        try:
+            valid.append((number, schemas.CreateUser(**row)))
+        except ValidationError as ex:
+            report.invalid += 1
+            report.rows.append(ImportRowReport(
+                row=number,
+                login=row.get('login'),
+                status='invalid',
+                errors=[f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in ex.errors()],
+            ))
+    if not valid:
+        return
+
+    hashes = await asyncio.gather(*(aget_password_hash(user.password) for _, user in valid))
+    created = await usr.create_many(
+        [
+            {
+                'name': user.name,
+                'surname': user.surname,
+                'login': user.login,
+                'email': user.email.lower(),
+                'photo': user.photo,
+                'role': 'user',
+                'password': password,
+            }
+            for (_, user), password in zip(valid, hashes)
+        ],
+        _session,
+    )
+
+    for number, user in valid:
+        if user.login in created:
+            created.discard(user.login)
+            report.created += 1
+        else:
+            report.conflicts += 1
+            report.rows.append(ImportRowReport(row=number, login=user.login, status='conflict'))
@@ -0,0 +1,24 @@
+import logging, time
+from contextlib import asynccontextmanager
+
+
+logger = logging.getLogger(__name__)
+
+phases: dict[str, float] = {}
+
+
+@asynccontextmanager
+async def phase(name: str):
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = time.perf_counter() - started_at
+
+def report(stage: str) -> None:
+    logger.info(
+        '%s finished in %.3fs (%s)',
+        stage.capitalize(),
+        sum(phases.get(name, 0) for name in phases if name.startswith(f'{stage}.')),
+        ', '.join(f'{name.partition(".")[2]}={seconds:.3f}s' for name, seconds in phases.items() if name.startswith(f'{stage}.')),
+    )
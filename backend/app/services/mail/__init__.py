@@ -0,0 +1,11 @@
+from .outbox import MailOutbox, SMTPTransport, outbox
+from .templates import TemplateRegistry, registry
+
+
+__all__ = [
+    'MailOutbox',
+    'SMTPTransport',
+    'outbox',
+    'TemplateRegistry',
+    'registry',
+]
@@ -0,0 +1,231 @@
+import asyncio, logging, smtplib, time
+from collections import deque
+from dataclasses import dataclass, field
+from email.message import Message
+from typing import Callable
+
+from settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutgoingMessage:
+    to: str
+    message: Message
+    attempts: int = 0
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class OutboxStats:
+    enqueued: int = 0
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    dead_lettered: int = 0
+    batches: int = 0
+    total_send_seconds: float = 0.0
+    max_send_seconds: float = 0.0
+    total_queue_seconds: float = 0.0
+
+
+class SMTPTransport:
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        starttls: bool = True,
+        user: str | None = None,
+        password: str | None = None,
+        timeout: float = 10,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self._server: smtplib.SMTP | None = None
+
+    def send(self, sender: str, item: OutgoingMessage) -> None:
+        try:
+            self._connection().sendmail(from_addr=sender, to_addrs=item.to, msg=item.message.as_string())
+        except smtplib.SMTPServerDisconnected:
+            self.close()
+            self._connection().sendmail(from_addr=sender, to_addrs=item.to, msg=item.message.as_string())
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except smtplib.SMTPException:
+            self._server.close()
+        finally:
+            self._server = None
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._server is None:
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                server.starttls()
+            if self.user:
+                server.login(user=self.user, password=self.password)
+            self._server = server
+        return self._server
+
+
+class MailOutbox:
+
+    def __init__(
+        self,
+        transport_factory: Callable[[], SMTPTransport],
+        sender: str,
+        max_size: int = 10_000,
+        batch_size: int = 20,
+        max_retries: int = 5,
+        retry_backoff: float = 1.0,
+        dead_letter_size: int = 1_000,
+    ) -> None:
+        self.transport_factory = transport_factory
+        self.sender = sender
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.stats = OutboxStats()
+        self.dead_letters: deque[OutgoingMessage] = deque(maxlen=dead_letter_size)
+        self._queue: asyncio.Queue[OutgoingMessage] = asyncio.Queue(maxsize=max_size)
+        self._retries: set[asyncio.TimerHandle] = set()
+        self._in_flight = 0
+        self._transport: SMTPTransport | None = None
+        self._worker: asyncio.Task | None = None
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() + self._in_flight + len(self._retries)
+
+    def enqueue(self, to: str, message: Message) -> None:
+        item = OutgoingMessage(to=to, message=message)
+        try:
+            self._queue.put_nowait(item)
+            self.stats.enqueued += 1
+        except asyncio.QueueFull:
+            logger.error('Mail outbox is full, dropping message to %s', to)
+            self._dead_letter(item)
+
+    def start(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run(), name='mail-outbox')
+
+    async def stop(self, timeout: float = 10) -> None:
+        deadline = time.monotonic() + timeout
+        while self.depth and time.monotonic() < deadline and self._worker and not self._worker.done():
+            await asyncio.sleep(0.05)
+
+        for handle in self._retries:
+            handle.cancel()
+        self._retries.clear()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                ...
+            self._worker = None
+        if self._transport is not None:
+            await asyncio.to_thread(self._transport.close)
+            self._transport = None
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._in_flight = len(batch)
+            try:
+                failures = await asyncio.to_thread(self._send_batch, batch)
+                for item, ex in failures:
+                    self._retry(item, ex)
+            except Exception:
+                # Whatever broke, the worker has to outlive it or every later
+                # message would sit in the queue unsent.
+                logger.exception('Mail batch of %s failed, dead lettering it', len(batch))
+                for item in batch:
+                    self._dead_letter(item)
+            finally:
+                self._in_flight = 0
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _send_batch(self, batch: list[OutgoingMessage]) -> list[tuple[OutgoingMessage, Exception]]:
+        if self._transport is None:
+            self._transport = self.transport_factory()
+
+        self.stats.batches += 1
+        failures = []
+        for item in batch:
+            started_at = time.monotonic()
+            try:
+                self._transport.send(self.sender, item)
+            except Exception as ex:
+                self._transport.close()
+                failures.append((item, ex))
+                continue
+            elapsed = time.monotonic() - started_at
+            self.stats.sent += 1
+            self.stats.total_send_seconds += elapsed
+            self.stats.max_send_seconds = max(self.stats.max_send_seconds, elapsed)
+            self.stats.total_queue_seconds += started_at - item.enqueued_at
+        return failures
+
+    def _retry(self, item: OutgoingMessage, ex: Exception) -> None:
+        self.stats.failed += 1
+        item.attempts += 1
+        if not isinstance(ex, (smtplib.SMTPException, OSError)):
+            # Not a delivery problem (a message that cannot be encoded, say),
+            # so another attempt would fail the same way.
+            logger.error('Cannot send mail to %s', item.to, exc_info=ex)
+            self._dead_letter(item)
+            return
+        if item.attempts > self.max_retries:
+            logger.error('Giving up on mail to %s after %s attempts: %r', item.to, item.attempts, ex)
+            self._dead_letter(item)
+            return
+
+        self.stats.retried += 1
+        delay = self.retry_backoff * 2 ** (item.attempts - 1)
+
+        def requeue() -> None:
+            self._retries.discard(handle)
+            try:
+                self._queue.put_nowait(item)
+            except asyncio.QueueFull:
+                self._dead_letter(item)
+
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retries.add(handle)
+
+    def _dead_letter(self, item: OutgoingMessage) -> None:
+        self.stats.dead_lettered += 1
+        self.dead_letters.append(item)
+
+
+outbox = MailOutbox(
+    transport_factory=lambda: SMTPTransport(
+        host=settings.smtp_host,
+        port=settings.smtp_port,
+        starttls=settings.smtp_starttls,
+        user=settings.email_sender,
+        password=settings.email_password,
+        timeout=settings.smtp_timeout,
+    ),
+    sender=settings.email_sender,
+    max_size=settings.mail_queue_size,
+    batch_size=settings.mail_batch_size,
+    max_retries=settings.mail_max_retries,
+    retry_backoff=settings.mail_retry_backoff,
+    dead_letter_size=settings.mail_dead_letter_size,
+)
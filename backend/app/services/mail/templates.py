@@ -0,0 +1,59 @@
+from jinja2 import (
+    Environment,
+    FileSystemLoader,
+    FileSystemBytecodeCache,
+    Template,
+    select_autoescape,
+)
+
+from settings import settings, path
+
+
+TEMPLATES = {
+    'confirmation': 'confirmation/index.html',
+    'password_reset': 'password_reset/index.html',
+}
+
+
+class TemplateRegistry:
+
+    def __init__(
+        self,
+        root: str,
+        templates: dict[str, str],
+        auto_reload: bool = False,
+        bytecode_cache_dir: str | None = None,
+    ) -> None:
+        self.templates = templates
+        self.auto_reload = auto_reload
+        self.environment = Environment(
+            loader=FileSystemLoader(root),
+            autoescape=select_autoescape(['html']),
+            auto_reload=auto_reload,
+            bytecode_cache=FileSystemBytecodeCache(bytecode_cache_dir) if bytecode_cache_dir is not None else None,
+        )
+        self._compiled: dict[str, Template] = {}
+
+    def load(self) -> None:
+        for name in self.templates:
+            self._compiled[name] = self.environment.get_template(self.templates[name])
+
+    def get(self, name: str) -> Template:
+        if name not in self.templates:
+            raise KeyError(f'Unknown template: {name}')
+        if self.auto_reload or name not in self._compiled:
+            # get_template consults the loader's mtime check when auto_reload is on
+            # and otherwise returns the environment's cached compiled template.
+            self._compiled[name] = self.environment.get_template(self.templates[name])
+        return self._compiled[name]
+
+    def render(self, name: str, **context) -> str:
+        return self.get(name).render(**context)
+
+
+registry = TemplateRegistry(
+    root=path('templates'),
+    templates=TEMPLATES,
+    auto_reload=settings.templates_auto_reload,
+    bytecode_cache_dir=settings.templates_bytecode_cache_dir,
+)
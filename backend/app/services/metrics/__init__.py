@@ -0,0 +1,31 @@
+from .registry import Registry, Counter, Histogram
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    'http_requests_total',
+    'HTTP requests by method, route template and status.',
+    ('method', 'route', 'status'),
+)
+http_request_duration = registry.histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency by method and route template.',
+    ('method', 'route'),
+)
+db_query_duration = registry.histogram(
+    'db_query_duration_seconds',
+    'SQL statement execution time by statement type.',
+    ('operation',),
+)
+
+
+__all__ = [
+    'Registry',
+    'Counter',
+    'Histogram',
+    'registry',
+    'http_requests',
+    'http_request_duration',
+    'db_query_duration',
+]
@@ -0,0 +1,101 @@
+from . import registry
+
+
+def _password_pool():
+    from services.auth.password import stats
+
+    yield 'password_hash_queued', 'gauge', 'bcrypt jobs waiting for a worker slot.', [('password_hash_queued', {}, stats.queued)]
+    yield 'password_hash_running', 'gauge', 'bcrypt jobs running on the pool.', [('password_hash_running', {}, stats.running)]
+    yield 'password_hash_completed_total', 'counter', 'bcrypt jobs completed.', [('password_hash_completed_total', {}, stats.completed)]
+    yield 'password_hash_wait_seconds_total', 'counter', 'Time bcrypt jobs spent queued.', [('password_hash_wait_seconds_total', {}, stats.total_wait_seconds)]
+    yield 'password_hash_run_seconds_total', 'counter', 'Time bcrypt jobs spent running.', [('password_hash_run_seconds_total', {}, stats.total_run_seconds)]
+
+def _db_pool():
+    from database.pool import stats
+
+    yield 'db_pool_checked_out', 'gauge', 'Connections currently checked out.', [('db_pool_checked_out', {}, stats.checked_out)]
+    yield 'db_pool_connects_total', 'counter', 'New database connections opened.', [('db_pool_connects_total', {}, stats.connects)]
+    yield 'db_pool_checkouts_total', 'counter', 'Connection checkouts.', [('db_pool_checkouts_total', {}, stats.checkouts)]
+    yield 'db_pool_wait_seconds_total', 'counter', 'Time spent waiting for a pooled connection.', [('db_pool_wait_seconds_total', {}, stats.total_wait_seconds)]
+    yield 'db_pool_wait_seconds_max', 'gauge', 'Longest wait for a pooled connection.', [('db_pool_wait_seconds_max', {}, stats.max_wait_seconds)]
+
+def _principal_cache():
+    from services.auth.principal import principal_cache
+
+    yield 'principal_cache_requests_total', 'counter', 'Principal cache lookups by result.', [
+        ('principal_cache_requests_total', {'result': 'hit'}, principal_cache.hits),
+        ('principal_cache_requests_total', {'result': 'miss'}, principal_cache.misses),
+    ]
+
+def _user_lookups():
+    from services.user_lookup import user_lookups
+
+    yield 'user_lookup_cache_requests_total', 'counter', 'Public user lookup cache requests by result.', [
+        ('user_lookup_cache_requests_total', {'result': 'hit'}, user_lookups.hits),
+        ('user_lookup_cache_requests_total', {'result': 'miss'}, user_lookups.misses),
+    ]
+    yield 'user_lookup_not_modified_total', 'counter', 'Public user lookups answered with 304.', [('user_lookup_not_modified_total', {}, user_lookups.not_modified)]
+
+def _user_index():
+    from services.user_index import user_index
+
+    yield 'user_index_lookups_total', 'counter', 'Login/email lookups by how they were answered.', [
+        ('user_index_lookups_total', {'result': 'definite_miss'}, user_index.definite_misses),
+        ('user_index_lookups_total', {'result': 'negative_hit'}, user_index.negative_hits),
+        ('user_index_lookups_total', {'result': 'query'}, user_index.queries),
+    ]
+    yield 'user_index_false_positives_total', 'counter', 'Bloom positives the database turned down.', [('user_index_false_positives_total', {}, user_index.false_positives)]
+    yield 'user_index_false_positive_rate', 'gauge', 'Share of nonexistent names the Bloom filter claimed.', [('user_index_false_positive_rate', {}, user_index.false_positive_rate)]
+    yield 'user_index_estimated_error_rate', 'gauge', 'False-positive rate predicted from the filter fill.', [
+        ('user_index_estimated_error_rate', {}, user_index.filter.estimated_error_rate if user_index.filter else 0.0)
+    ]
+    yield 'user_index_rebuilds_total', 'counter', 'Completed scans into a fresh filter.', [('user_index_rebuilds_total', {}, user_index.rebuilds)]
+
+def _user_flights():
+    from services.singleflight import user_flights
+
+    yield 'user_flight_calls_total', 'counter', 'User lookups by whether they ran a query or joined one in flight.', [
+        ('user_flight_calls_total', {'result': 'leader'}, user_flights.calls),
+        ('user_flight_calls_total', {'result': 'coalesced'}, user_flights.coalesced),
+    ]
+    yield 'user_flight_timeouts_total', 'counter', 'Shared user lookups that ran out of time.', [('user_flight_timeouts_total', {}, user_flights.timeouts)]
+    yield 'user_flights_in_progress', 'gauge', 'Shared user lookups currently running.', [('user_flights_in_progress', {}, len(user_flights))]
+
+def _refresh_tokens():
+    from services.auth.refresh import refresh_tokens
+
+    yield 'refresh_revocation_checks_total', 'counter', 'Revocation checks by how they were answered.', [
+        ('refresh_revocation_checks_total', {'result': 'bloom_negative'}, refresh_tokens.bloom_negatives),
+        ('refresh_revocation_checks_total', {'result': 'lookup'}, refresh_tokens.lookups),
+    ]
+    yield 'refresh_token_reuse_total', 'counter', 'Rotated refresh tokens presented again.', [('refresh_token_reuse_total', {}, refresh_tokens.reuses)]
+
+def _rate_limiter():
+    from services.ratelimit import rate_limiter
+
+    yield 'rate_limit_rejected_total', 'counter', 'Requests rejected by the rate limiter.', [('rate_limit_rejected_total', {}, rate_limiter.rejected)]
+
+def _lifecycle():
+    from services.lifecycle import phases
+
+    yield 'lifecycle_phase_seconds', 'gauge', 'Duration of the last startup and shutdown phases.', [
+        ('lifecycle_phase_seconds', {'phase': name}, seconds) for name, seconds in phases.items()
+    ]
+
+def _mail_outbox():
+    from services.mail import outbox
+
+    yield 'mail_outbox_depth', 'gauge', 'Messages queued, in flight or waiting for a retry.', [('mail_outbox_depth', {}, outbox.depth)]
+    yield 'mail_outbox_messages_total', 'counter', 'Outbox messages by outcome.', [
+        ('mail_outbox_messages_total', {'outcome': 'sent'}, outbox.stats.sent),
+        ('mail_outbox_messages_total', {'outcome': 'failed'}, outbox.stats.failed),
+        ('mail_outbox_messages_total', {'outcome': 'retried'}, outbox.stats.retried),
+        ('mail_outbox_messages_total', {'outcome': 'dead_lettered'}, outbox.stats.dead_lettered),
+    ]
+    yield 'mail_outbox_send_seconds_total', 'counter', 'Time spent sending messages.', [('mail_outbox_send_seconds_total', {}, outbox.stats.total_send_seconds)]
+    yield 'mail_outbox_send_seconds_max', 'gauge', 'Slowest single message send.', [('mail_outbox_send_seconds_max', {}, outbox.stats.max_send_seconds)]
+
+
+def register_default_collectors() -> None:
+    for collector in (_password_pool, _db_pool, _principal_cache, _user_lookups, _user_index, _user_flights, _refresh_tokens, _rate_limiter, _lifecycle, _mail_outbox):
+        registry.add_collector(collector)
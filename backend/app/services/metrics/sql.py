@@ -0,0 +1,34 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from . import db_query_duration
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def _before(connection, cursor, statement, parameters, context, executemany) -> None:
+        connection.info.setdefault('query_started_at', []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def _after(connection, cursor, statement, parameters, context, executemany) -> None:
+        started = connection.info.get('query_started_at')
+        if not started:
+            return
+        db_query_duration.observe(time.perf_counter() - started.pop(), _operation(statement))
+
+    @event.listens_for(sync_engine, 'handle_error')
+    def _error(context) -> None:
+        started = context.connection.info.get('query_started_at') if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+def _operation(statement: str) -> str:
+    operation = statement.lstrip()[:6].upper()
+    if operation in ('SELECT', 'INSERT', 'UPDATE', 'DELETE'):
+        return operation
+    return 'OTHER'
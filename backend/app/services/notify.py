@@ -0,0 +1,139 @@
+import asyncio, logging
+from typing import Any, Awaitable, Callable, Iterable
+
+import orjson
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from database.core import AsyncSession, async_engine
+
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY = 5
+# Postgres refuses NOTIFY payloads of 8000 bytes or more.
+MAX_PAYLOAD = 7_900
+
+_NOTIFY = text('SELECT pg_notify(:channel, :payload)')
+
+
+async def notify(_session: AsyncSession, channel: str, payload: str) -> None:
+    # Postgres delivers the notification when the surrounding transaction
+    # commits, and drops it on rollback: listeners never run ahead of the data.
+    await _session.execute(_NOTIFY, {'channel': channel, 'payload': payload})
+
+async def notify_many(_session: AsyncSession, channel: str, items: Iterable[Any]) -> None:
+    # Items go out as JSON lists, packed as many to a payload as fit, so a
+    # batch of writes costs a handful of notifications rather than one each.
+    chunk: list[bytes] = []
+    size = 2
+    for item in items:
+        encoded = orjson.dumps(item)
+        if chunk and size + len(encoded) + 1 > MAX_PAYLOAD:
+            await notify(_session, channel, (b'[' + b','.join(chunk) + b']').decode('utf-8'))
+            chunk, size = [], 2
+        chunk.append(encoded)
+        size += len(encoded) + 1
+    if chunk:
+        await notify(_session, channel, (b'[' + b','.join(chunk) + b']').decode('utf-8'))
+
+
+class Listener:
+    """
+    Keeps a LISTEN on `channel` up over a dedicated connection and hands every
+    payload to `on_notify`. After each (re)LISTEN, `on_load` reloads whatever
+    state the notifications keep current, so nothing published while the
+    channel was down is missed; it runs again every `reload_interval` seconds
+    if one is given.
+
+    `ready` is True only between a successful load and the loss of the
+    connection: callers that use local state to skip the database must fall
+    back to it whenever `ready` is False. With `listen=False` (a single
+    process, nothing to hear from) only the loads run.
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        on_notify: Callable[[str], None],
+        on_load: Callable[[], Awaitable[None]],
+        reload_interval: float | None = None,
+        listen: bool = True,
+    ) -> None:
+        self.channel = channel
+        self.on_notify = on_notify
+        self.on_load = on_load
+        self.reload_interval = reload_interval
+        self.listen = listen
+        self.ready = False
+        self._connection: AsyncConnection | None = None
+        self._closed = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        delay = self.reload_interval
+        try:
+            await self._refresh()
+        except Exception:
+            logger.exception('Could not load state for %s, falling back to the database', self.channel)
+            await self._disconnect()
+            delay = RETRY_DELAY
+        self._task = asyncio.create_task(self._maintain(delay), name=f'listen-{self.channel}')
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                ...
+            self._task = None
+        await self._disconnect()
+
+    async def _refresh(self) -> None:
+        if self.listen and (self._connection is None or self._closed.is_set()):
+            await self._disconnect()
+            await self._connect()
+        await self.on_load()
+        self.ready = True
+
+    async def _maintain(self, delay: float | None) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._closed.wait(), delay)
+            except asyncio.TimeoutError:
+                ...
+            try:
+                await self._refresh()
+                delay = self.reload_interval
+            except Exception:
+                logger.exception('Could not reload state for %s, falling back to the database', self.channel)
+                await self._disconnect()
+                delay = RETRY_DELAY
+
+    async def _connect(self) -> None:
+        self._closed = asyncio.Event()
+        self._connection = await async_engine.connect()
+        driver = (await self._connection.get_raw_connection()).driver_connection
+        driver.add_termination_listener(self._on_close)
+        await driver.add_listener(self.channel, self._on_payload)
+
+    async def _disconnect(self) -> None:
+        self.ready = False
+        if self._connection is None:
+            return
+        connection, self._connection = self._connection, None
+        try:
+            # Invalidated rather than returned, so the LISTEN does not stay
+            # on a connection handed out to requests.
+            await connection.invalidate()
+            await connection.close()
+        except Exception:
+            logger.exception('Could not close the %s connection', self.channel)
+
+    def _on_close(self, connection) -> None:
+        self.ready = False
+        self._closed.set()
+
+    def _on_payload(self, connection, pid: int, channel: str, payload: str) -> None:
+        self.on_notify(payload)
@@ -0,0 +1,118 @@
+import cProfile, hashlib, hmac, itertools, pstats, time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from settings import settings
+
+
+class ProfiledFunction(BaseModel):
+
+    function: str
+    calls: int
+    total_seconds: float
+    cumulative_seconds: float
+    callers: list[str]
+
+
+class ProfiledStatement(BaseModel):
+
+    statement: str
+    seconds: float
+
+
+class ProfileSummary(BaseModel):
+
+    id: int
+    method: str
+    path: str
+    status: int
+    started_at: float
+    seconds: float
+    statements: int
+
+
+class Profile(ProfileSummary):
+
+    functions: list[ProfiledFunction]
+    sql: list[ProfiledStatement]
+
+
+@dataclass
+class ActiveProfile:
+    statements: list[ProfiledStatement] = field(default_factory=list)
+
+
+class ProfileStore:
+
+    def __init__(self, size: int) -> None:
+        self._profiles: deque[Profile] = deque(maxlen=size)
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def add(self, profile: Profile) -> None:
+        self._profiles.append(profile)
+
+    def list(self) -> list[ProfileSummary]:
+        return [ProfileSummary(**profile.dict(include=set(ProfileSummary.__fields__))) for profile in reversed(self._profiles)]
+
+    def get(self, profile_id: int) -> Profile | None:
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return profile
+
+
+store = ProfileStore(settings.profiling_ring_size)
+active: ContextVar[ActiveProfile | None] = ContextVar('active_profile', default=None)
+
+
+def sign(method: str, path: str, expires: int, secret: str) -> str:
+    message = f'{expires}:{method.upper()}:{path}'.encode('utf-8')
+    return f'{expires}:' + hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+def verify_signature(value: str, method: str, path: str, secret: str) -> bool:
+    expires, _, _ = value.partition(':')
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(value, sign(method, path, int(expires), secret))
+
+def functions(profiler: cProfile.Profile, limit: int) -> list[ProfiledFunction]:
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        ProfiledFunction(
+            function=_label(function),
+            calls=calls,
+            total_seconds=total,
+            cumulative_seconds=cumulative,
+            callers=[_label(caller) for caller in callers],
+        )
+        for function, (_, calls, total, cumulative, callers) in rows
+    ]
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def _before(connection, cursor, statement, parameters, context, executemany) -> None:
+        if active.get() is not None:
+            connection.info.setdefault('profile_started_at', []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def _after(connection, cursor, statement, parameters, context, executemany) -> None:
+        profile = active.get()
+        started = connection.info.get('profile_started_at')
+        if profile is None or not started:
+            return
+        profile.statements.append(ProfiledStatement(statement=statement, seconds=time.perf_counter() - started.pop()))
+
+
+def _label(function: tuple[str, int, str]) -> str:
+    filename, line, name = function
+    return f'{filename}:{line}({name})' if line else name
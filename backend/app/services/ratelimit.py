@@ -0,0 +1,225 @@
+import math, time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+
+from services.cache import FakeRedis
+from routers.responses.user import TooManyRequestsResponse
+from settings import settings
+
+
+_PERIODS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 60 * 60,
+    'day': 24 * 60 * 60,
+}
+
+
+@dataclass(frozen=True)
+class Rule:
+    limit: int
+    window: int
+
+    @classmethod
+    def parse(cls, value: str) -> 'Rule':
+        # "5/minute", "100/hour", "10/30 second"
+        limit, _, period = value.partition('/')
+        count, _, unit = period.strip().rpartition(' ')
+        unit = unit.rstrip('s')
+        if unit not in _PERIODS:
+            raise ValueError(f'Unknown rate limit period: {value}')
+        return cls(limit=int(limit), window=int(count or 1) * _PERIODS[unit])
+
+
+def _retry_after(previous: int, current: int, rule: Rule, elapsed: float) -> float:
+    # Sliding window counter: a hit is allowed while `previous * (1 - elapsed /
+    # window) + current + 1` stays within the limit, so solve for that moment.
+    room = rule.limit - 1
+    if room < 0:
+        return rule.window - elapsed
+    if current <= room:
+        return max(0.001, (1 - (room - current) / previous) * rule.window - elapsed)
+    return rule.window - elapsed + (1 - room / current) * rule.window
+
+
+def _estimate(previous: int, current: int, rule: Rule, elapsed: float) -> float:
+    return previous * (1 - elapsed / rule.window) + current
+
+
+class RateLimitStore(ABC):
+
+    @abstractmethod
+    async def hit(self, key: str, rule: Rule) -> float:
+        """Counts a hit and returns 0, or the seconds to wait if the key is over its limit."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """
+    Two counters per key. Keys idle for two windows carry no information and
+    are dropped, least recently used first once `max_keys` is reached.
+    """
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._windows: OrderedDict[str, list[int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    async def hit(self, key: str, rule: Rule) -> float:
+        now = time.time()
+        index, elapsed = divmod(now, rule.window)
+        index = int(index)
+
+        window = self._windows.get(key)
+        if window is None:
+            self._evict(now)
+            window = self._windows[key] = [index, 0, 0, 0.0]
+        elif window[0] != index:
+            window[1] = window[2] if window[0] == index - 1 else 0
+            window[0], window[2] = index, 0
+        window[3] = (index + 2) * rule.window
+        self._windows.move_to_end(key)
+
+        _, previous, current, _ = window
+        if _estimate(previous, current + 1, rule, elapsed) > rule.limit:
+            return _retry_after(previous, current, rule, elapsed)
+        window[2] += 1
+        return 0.0
+
+    async def clear(self) -> None:
+        self._windows.clear()
+
+    def _evict(self, now: float) -> None:
+        while self._windows:
+            window = next(iter(self._windows.values()))
+            if window[3] > now and len(self._windows) < self.max_keys:
+                break
+            self._windows.popitem(last=False)
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """
+    Shared counters, one key per (key, window). Works with any client exposing
+    the redis.asyncio `get`/`incr`/`decr`/`expire` coroutines.
+    """
+
+    def __init__(self, client: Any, prefix: str = 'ratelimit:') -> None:
+        self.client = client
+        self.prefix = prefix
+
+    async def hit(self, key: str, rule: Rule) -> float:
+        index, elapsed = divmod(time.time(), rule.window)
+        current_key = f'{self.prefix}{key}:{int(index)}'
+
+        current = await self.client.incr(current_key)
+        if current == 1:
+            await self.client.expire(current_key, 2 * rule.window)
+        previous = int(await self.client.get(f'{self.prefix}{key}:{int(index) - 1}') or 0)
+
+        if _estimate(previous, current, rule, elapsed) > rule.limit:
+            await self.client.decr(current_key)
+            return _retry_after(previous, current - 1, rule, elapsed)
+        return 0.0
+
+    async def clear(self) -> None:
+        async for key in self.client.scan_iter(match=self.prefix + '*'):
+            await self.client.delete(key)
+
+
+def get_store(name: str, max_keys: int = 100_000, redis_dsn: str | None = None) -> RateLimitStore:
+    match name:
+        case 'memory':
+            return MemoryRateLimitStore(max_keys=max_keys)
+        case 'fakeredis':
+            return RedisRateLimitStore(FakeRedis())
+        case 'redis':
+            try:
+                from redis import asyncio as redis
+            except ImportError as ex:
+                raise RuntimeError('The "redis" package is required for the redis rate limit store') from ex
+            if not redis_dsn:
+                raise ValueError('redis_dsn is required for the redis rate limit store')
+            return RedisRateLimitStore(redis.from_url(redis_dsn))
+        case _:
+            raise ValueError(f'Unknown rate limit store: {name}')
+
+
+class RateLimiter:
+
+    def __init__(self, store: RateLimitStore, ip_rules: dict[str, str], identity_rules: dict[str, str], enabled: bool = True) -> None:
+        self.store = store
+        self.enabled = enabled
+        self.ip_rules = {path: Rule.parse(rule) for path, rule in ip_rules.items()}
+        self.identity_rules = {name: Rule.parse(rule) for name, rule in identity_rules.items()}
+        self.rejected = 0
+
+    async def check_ip(self, path: str, ip: str) -> float:
+        rule = self.ip_rules.get(path)
+        if not self.enabled or rule is None:
+            return 0.0
+        return self._count(await self.store.hit(f'ip:{path}:{ip}', rule))
+
+    async def check_identity(self, name: str, identity: str) -> float:
+        rule = self.identity_rules.get(name)
+        if not self.enabled or rule is None:
+            return 0.0
+        return self._count(await self.store.hit(f'{name}:{identity.lower()}', rule))
+
+    def _count(self, retry_after: float) -> float:
+        if retry_after:
+            self.rejected += 1
+        return retry_after
+
+
+rate_limiter = RateLimiter(
+    store=get_store(settings.rate_limit_backend, max_keys=settings.rate_limit_max_keys, redis_dsn=settings.redis_dsn),
+    ip_rules=settings.rate_limit_ip_rules,
+    identity_rules=settings.rate_limit_identity_rules,
+    enabled=settings.rate_limit_enabled,
+)
+
+
+def too_many_requests(retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content=TooManyRequestsResponse(
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+            message='Too many requests, try again later',
+        ).dict(),
+        headers={'Retry-After': str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def throttle(name: str, *fields: str):
+    """
+    Dependency limiting requests per identity taken from the JSON body, e.g.
+    `Depends(throttle('login', 'login', 'email'))`. Returns a 429 response for
+    the handler to pass on, like `require_user` does for auth failures.
+    """
+
+    async def dependency(request: Request) -> JSONResponse | None:
+        if not rate_limiter.enabled or name not in rate_limiter.identity_rules:
+            return
+        try:
+            body = await request.json()
+        except ValueError:
+            return
+        if not isinstance(body, dict):
+            return
+        for field in fields:
+            if isinstance(body.get(field), str):
+                retry_after = await rate_limiter.check_identity(name, body[field])
+                if retry_after:
+                    return too_many_requests(retry_after)
+
+    return dependency
@@ -0,0 +1,96 @@
+import asyncio, uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+from pydantic import EmailStr
+from sqlalchemy.engine import Row
+
+import schemas
+from crud import user as usr
+from crud.utils import hooks
+from database.core import read_session
+from settings import settings
+
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one execution. The shared call
+    runs in a task of its own: a caller that is cancelled stops waiting while
+    the others still get the result, and `timeout` bounds the call itself so
+    a stuck query frees its key for the next caller.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        self.timeout = timeout
+        self.calls = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self._flights: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, func: Callable[..., Awaitable[T]], *args: Any) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            self.calls += 1
+            flight = asyncio.create_task(self._run(func, *args))
+            flight.add_done_callback(lambda done: self._land(key, done))
+            self._flights[key] = flight
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(flight)
+
+    def forget(self, key: Hashable) -> None:
+        # The flight keeps running for whoever already waits on it; later
+        # callers start a fresh one.
+        self._flights.pop(key, None)
+
+    async def _run(self, func: Callable[..., Awaitable[T]], *args: Any) -> T:
+        try:
+            return await asyncio.wait_for(func(*args), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+
+    def _land(self, key: Hashable, flight: asyncio.Task) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            # Retrieved here so a flight every caller gave up on is not
+            # reported as an exception nobody handled.
+            flight.exception()
+
+
+user_flights = SingleFlight(timeout=settings.user_flight_timeout)
+
+
+async def get_user(user: uuid.UUID | EmailStr | str, private: bool = False) -> schemas.UserWithID | schemas.UserPrivate | None:
+    return await user_flights.do(('private' if private else 'public', type(user), user), _read, usr.get, user, private)
+
+async def get_user_versioned(user: uuid.UUID | EmailStr | str) -> tuple[schemas.UserWithID, datetime] | None:
+    return await user_flights.do(('versioned', type(user), user), _read, usr.get_versioned, user)
+
+async def get_principal(user_id: uuid.UUID) -> Row | None:
+    return await user_flights.do(('principal', uuid.UUID, user_id), _read, usr.get_principal, user_id)
+
+async def _read(load: Callable[..., Awaitable[T]], user: uuid.UUID | EmailStr | str, *args: Any) -> T:
+    # A session of its own: the callers' sessions close with their requests,
+    # which may end before the shared query does.
+    async with read_session() as session:
+        return await load(user, session, *args)
+
+
+@hooks.register
+async def _forget_user_flights(event: hooks.UserEvent) -> None:
+    users = [event.id]
+    if event.login:
+        users.append(event.login)
+    if event.email:
+        users.append(EmailStr(event.email.lower()))
+    for user in users:
+        for name in ('public', 'private', 'versioned', 'principal'):
+            user_flights.forget((name, type(user), user))
@@ -0,0 +1,188 @@
+import time, uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, TypeVar
+
+import orjson
+from pydantic import EmailStr
+
+from crud import user as usr
+from crud.utils import hooks
+from database.core import AsyncSession, async_engine
+from services.bloom import BloomFilter
+from services.notify import Listener
+from services.singleflight import get_user_versioned
+from settings import settings
+
+
+T = TypeVar('T')
+
+
+def index_key(user: uuid.UUID | EmailStr | str) -> str | None:
+    if isinstance(user, uuid.UUID):
+        return None
+    if isinstance(user, EmailStr):
+        return f'email:{user.lower()}'
+    return f'login:{user}'
+
+
+class UserIndex:
+    """
+    Logins and emails of existing users in a Bloom filter, so lookups for names
+    nobody has are answered without a query. Bloom false positives that the
+    database turned down are remembered for a short while in a negative cache.
+
+    The filter only ever errs towards "maybe": until the first scan is in, and
+    whenever the notification channel is down, it is switched off and every
+    lookup goes to the database. Each worker keeps its own filter; writes
+    reach the others through the NOTIFY `crud.user` sends on `usr.IDENTITIES`
+    in the writing transaction, one per batch. Deleted users stay in the
+    filter (as positives, so harmless) until the next periodic rebuild.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        negative_ttl: float,
+        negative_size: int,
+        rebuild_interval: float,
+        enabled: bool = True,
+        notify: bool = True,
+    ) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.negative_ttl = negative_ttl
+        self.negative_size = negative_size
+        self.rebuild_interval = rebuild_interval
+        self.enabled = enabled
+        self.filter: BloomFilter | None = None
+        self.definite_misses = 0
+        self.negative_hits = 0
+        self.false_positives = 0
+        self.queries = 0
+        self.rebuilds = 0
+        self._building: BloomFilter | None = None
+        self._negatives: OrderedDict[str, float] = OrderedDict()
+        # Bumped on every add: a miss read before a concurrent insert must not
+        # be remembered as a negative afterwards.
+        self._generation = 0
+        self.listener = Listener(usr.IDENTITIES, self._on_notify, self._reload, reload_interval=rebuild_interval, listen=notify)
+
+    @property
+    def false_positive_rate(self) -> float:
+        # Of the names that do not exist, the share the filter claimed.
+        false_positives = self.false_positives + self.negative_hits
+        absent = false_positives + self.definite_misses
+        return false_positives / absent if absent else 0.0
+
+    @property
+    def active(self) -> bool:
+        return self.filter is not None and self.listener.ready
+
+    def might_exist(self, *users: uuid.UUID | EmailStr | str) -> bool:
+        if not self.active:
+            return True
+        for user in users:
+            key = index_key(user)
+            if key is None or key in self.filter:
+                return True
+        return False
+
+    async def get(self, user: uuid.UUID | EmailStr | str, _session: AsyncSession, private: bool = False):
+        return await self._guarded(usr.get, user, _session, private)
+
+    async def get_versioned(self, user: uuid.UUID | EmailStr | str):
+        return await self._guarded(get_user_versioned, user)
+
+    def add(self, login: str | None, email: str | None) -> None:
+        self._generation += 1
+        for key in (login and f'login:{login}', email and f'email:{email.lower()}'):
+            if not key:
+                continue
+            self._negatives.pop(key, None)
+            for bloom in (self.filter, self._building):
+                if bloom is not None:
+                    bloom.add(key)
+
+    async def rebuild(self, _session: AsyncSession) -> None:
+        capacity = max(self.capacity, 2 * len(self.filter or ()))
+        self._building = BloomFilter(capacity, self.error_rate)
+        try:
+            async for rows in usr.identities(_session):
+                for row in rows:
+                    self._building.add(f'login:{row.login}')
+                    self._building.add(f'email:{row.email.lower()}')
+            self.filter = self._building
+            self.rebuilds += 1
+        finally:
+            self._building = None
+
+    async def start(self) -> None:
+        if self.enabled:
+            await self.listener.start()
+
+    async def stop(self) -> None:
+        await self.listener.stop()
+        self.filter = None
+
+    async def _guarded(self, load: Callable[..., Awaitable[T | None]], user, *args) -> T | None:
+        key = index_key(user)
+        if key is None or not self.active:
+            return await load(user, *args)
+        if key not in self.filter:
+            self.definite_misses += 1
+            return None
+        if self._is_negative(key):
+            self.negative_hits += 1
+            return None
+
+        self.queries += 1
+        generation = self._generation
+        result = await load(user, *args)
+        if result is None:
+            self.false_positives += 1
+            if generation == self._generation:
+                self._remember_negative(key)
+        return result
+
+    def _is_negative(self, key: str) -> bool:
+        expires_at = self._negatives.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._negatives[key]
+            return False
+        return True
+
+    def _remember_negative(self, key: str) -> None:
+        self._negatives[key] = time.monotonic() + self.negative_ttl
+        self._negatives.move_to_end(key)
+        while len(self._negatives) > self.negative_size:
+            self._negatives.popitem(last=False)
+
+    async def _reload(self) -> None:
+        async with AsyncSession(bind=async_engine) as session:
+            await self.rebuild(session)
+
+    def _on_notify(self, payload: str) -> None:
+        for login, email in orjson.loads(payload):
+            self.add(login, email)
+
+
+user_index = UserIndex(
+    capacity=settings.user_index_capacity,
+    error_rate=settings.user_index_error_rate,
+    negative_ttl=settings.user_index_negative_ttl,
+    negative_size=settings.user_index_negative_size,
+    rebuild_interval=settings.user_index_rebuild_interval,
+    enabled=settings.user_index_enabled,
+    notify=settings.user_index_notify,
+)
+
+
+@hooks.register
+async def _index_user(event: hooks.UserEvent) -> None:
+    if event.kind not in ('created', 'updated'):
+        return
+    # Peers hear about it from the NOTIFY sent with the write itself.
+    user_index.add(event.login, event.email)
@@ -0,0 +1,139 @@
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from hashlib import blake2b
+
+import orjson
+from fastapi import Response
+from pydantic import EmailStr
+
+from crud.utils import hooks
+from services.cache import CacheBackend, get_backend
+from services.user_index import user_index
+from settings import settings
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    id: str
+    etag: str
+    body: bytes
+
+    def matches(self, if_none_match: str | None) -> bool:
+        if not if_none_match:
+            return False
+        # Weak comparison, as RFC 9110 prescribes for If-None-Match.
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag == '*' or tag.removeprefix('W/') == self.etag:
+                return True
+        return False
+
+
+def make_etag(user_id: str, updated_at: datetime) -> str:
+    digest = blake2b(f'{user_id}:{updated_at.isoformat()}'.encode('utf-8'), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+def cache_key(user: uuid.UUID | EmailStr | str) -> str:
+    if isinstance(user, uuid.UUID):
+        return f'id:{user}'
+    if isinstance(user, EmailStr):
+        return f'email:{user.lower()}'
+    return f'login:{user}'
+
+
+class UserLookupCache:
+    """
+    Public `/users/get` lookups, cached as rendered bodies with their ETag.
+    A hit answers without touching the database or serializing anything.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, cache_control: str, max_index_size: int = 10_000) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.cache_control = cache_control.encode('latin-1')
+        self.max_index_size = max_index_size
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        # A user can be cached under its id, login and email at once; a change
+        # to any of them has to drop all three.
+        self._keys_by_id: OrderedDict[str, set[str]] = OrderedDict()
+        self._invalidations = 0
+
+    async def get(self, user: uuid.UUID | EmailStr | str) -> CachedUser | None:
+        key = cache_key(user)
+        cached = await self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            return CachedUser(cached['id'], cached['etag'], cached['body'].encode('utf-8'))
+
+        self.misses += 1
+        invalidations = self._invalidations
+        result = await user_index.get_versioned(user)
+        if result is None:
+            return None
+
+        user, updated_at = result
+        entry = CachedUser(user.id, make_etag(user.id, updated_at), orjson.dumps(user.dict()))
+        # An update that landed while the row was being read may already have
+        # invalidated; storing the older row would outlive it by a full TTL.
+        if self.ttl > 0 and invalidations == self._invalidations:
+            await self.backend.set(key, {'id': entry.id, 'etag': entry.etag, 'body': entry.body.decode('utf-8')}, self.ttl)
+            self._index(entry.id, key)
+        return entry
+
+    def respond(self, entry: CachedUser, if_none_match: str | None = None) -> Response:
+        headers = [(b'etag', entry.etag.encode('latin-1')), (b'cache-control', self.cache_control)]
+        if entry.matches(if_none_match):
+            self.not_modified += 1
+            response = Response(status_code=304)
+            response.raw_headers = headers
+            return response
+
+        response = Response(status_code=200)
+        response.body = entry.body
+        response.raw_headers = [
+            (b'content-length', str(len(entry.body)).encode('latin-1')),
+            (b'content-type', b'application/json'),
+            *headers,
+        ]
+        return response
+
+    async def invalidate(self, user_id: str | uuid.UUID, *keys: str) -> None:
+        self._invalidations += 1
+        user_id = str(user_id)
+        for key in self._keys_by_id.pop(user_id, set()) | {f'id:{user_id}', *keys}:
+            await self.backend.delete(key)
+
+    def _index(self, user_id: str, key: str) -> None:
+        self._keys_by_id.setdefault(user_id, set()).add(key)
+        self._keys_by_id.move_to_end(user_id)
+        # Entries dropped here still expire with the TTL; only an old login or
+        # email of a user renamed meanwhile can be served until then.
+        while len(self._keys_by_id) > self.max_index_size:
+            self._keys_by_id.popitem(last=False)
+
+
+user_lookups = UserLookupCache(
+    backend=get_backend(
+        settings.user_lookup_cache_backend,
+        max_size=settings.user_lookup_cache_size,
+        redis_dsn=settings.redis_dsn,
+        prefix='user_lookup:',
+    ),
+    ttl=settings.user_lookup_cache_ttl,
+    cache_control=settings.user_lookup_cache_control,
+    max_index_size=settings.user_lookup_cache_size,
+)
+
+
+@hooks.register
+async def _invalidate_user_lookups(event: hooks.UserEvent) -> None:
+    keys = []
+    if event.login:
+        keys.append(f'login:{event.login}')
+    if event.email:
+        keys.append(f'email:{event.email.lower()}')
+    await user_lookups.invalidate(event.id, *keys)
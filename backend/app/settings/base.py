@@ -5,17 +5,102 @@ load_dotenv(find_dotenv(raise_error_if_not_found=True))
 
 
 class Setting(BaseSettings):
+    server_host: str = '127.0.0.1'
+    server_port: int = 8001
+    server_reload: bool = False
+    server_workers: int | None = None
+    server_keep_alive: int = 5
+    server_backlog: int = 2048
     pg_dsn: PostgresDsn
     pg_echo: bool = False
     pg_future: bool = True
+    pg_pool_size: int = 5
+    pg_max_overflow: int = 10
+    pg_pool_timeout: float = 30
+    pg_pool_recycle: int = -1
+    pg_pool_pre_ping: bool = False
+    pg_pool_warm_up: int = 0
+    pg_statement_cache_size: int = 100
+    pg_replica_dsns: list[PostgresDsn] = []
+    pg_replica_strategy: str = 'round_robin'
+    pg_replica_retry_after: float = 30
     access_token_expires_in: int 
     refresh_token_expires_in: int
     jwt_algorithm: str
     jwt_private_key: str
     jwt_public_key: str
+    token_cache_size: int = 10_000
+    refresh_revocation_capacity: int = 100_000
+    refresh_revocation_error_rate: float = 0.01
+    refresh_revocation_notify: bool = True
+    verification_keys: list[str] = []
+    verification_token_ttl: int = 24 * 60 * 60
     client_origin: str
     email_sender: str
     email_password: str
+    smtp_host: str = 'smtp.gmail.com'
+    smtp_port: int = 587
+    smtp_starttls: bool = True
+    smtp_timeout: float = 10
+    mail_queue_size: int = 10_000
+    mail_batch_size: int = 20
+    mail_max_retries: int = 5
+    mail_retry_backoff: float = 1.0
+    mail_dead_letter_size: int = 1_000
+    mail_drain_timeout: float = 10
+    validation_max_errors: int = 20
+    metrics_enabled: bool = True
+    metrics_path: str = '/metrics'
+    profiling_secret: str | None = None
+    profiling_header: str = 'x-profile'
+    profiling_sample_rate: float = 0.0
+    profiling_ring_size: int = 50
+    profiling_max_functions: int = 50
+    templates_auto_reload: bool = False
+    templates_bytecode_cache_dir: str | None = None
+    password_hash_executor: str = 'thread'
+    password_hash_workers: int = 4
+    password_hash_max_concurrency: int = 8
+    redis_dsn: str | None = None
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = 'memory'
+    rate_limit_max_keys: int = 100_000
+    rate_limit_ip_rules: dict[str, str] = {
+        '/api/v1/auth/login': '20/minute',
+        '/api/v1/auth/register': '10/minute',
+    }
+    # The IP rules key on the connecting peer. Behind a load balancer that is
+    # the balancer itself, so list its addresses here (comma separated, '*'
+    # for any): uvicorn then takes the client from X-Forwarded-For, but only
+    # on connections from these peers, so clients cannot spoof the header.
+    rate_limit_trusted_proxies: str = '127.0.0.1'
+    rate_limit_identity_rules: dict[str, str] = {
+        'login': '5/minute',
+        'register': '5/hour',
+    }
+    principal_cache_backend: str = 'memory'
+    principal_cache_ttl: int = 60
+    principal_cache_size: int = 10_000
+    user_lookup_cache_backend: str = 'memory'
+    user_lookup_cache_ttl: float = 5
+    user_lookup_cache_size: int = 10_000
+    user_lookup_cache_control: str = 'public, no-cache'
+    user_index_enabled: bool = True
+    user_index_notify: bool = True
+    user_index_capacity: int = 1_000_000
+    user_index_error_rate: float = 0.01
+    user_index_negative_ttl: float = 30
+    user_index_negative_size: int = 100_000
+    user_index_rebuild_interval: float = 60 * 60
+    user_flight_timeout: float = 10
+    user_create_precheck: bool = True
+    user_batch_max_size: int = 1_000
+    user_batch_chunk_size: int = 500
+    user_page_max_limit: int = 100
+    user_export_chunk_size: int = 1_000
+    user_import_batch_size: int = 1_000
+    user_import_max_bytes: int = 512 * 1024 * 1024
+    user_import_spool_bytes: int = 8 * 1024 * 1024
 
 
     def __init__(self, module: BaseSettings = None, *args, **kwargs) -> None:
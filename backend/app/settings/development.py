@@ -2,7 +2,9 @@ from pydantic import BaseSettings
 
 
 class Setting(BaseSettings):
+    server_reload: bool = True
     pg_echo: bool = True
+    templates_auto_reload: bool = True
 
     class Config:
         env_file = '.envs/development'
\ No newline at end of file
@@ -2,6 +2,13 @@ from pydantic import BaseSettings
 
 
 class Setting(BaseSettings):
+    server_host: str = '0.0.0.0'
+    server_keep_alive: int = 75
+    pg_pool_size: int = 20
+    pg_max_overflow: int = 10
+    pg_pool_recycle: int = 1800
+    pg_pool_pre_ping: bool = True
+    pg_pool_warm_up: int = 10
 
     class Config:
-        env_file = '.envs/production'
\ No newline at end of file
+        env_file = '.envs/production'
@@ -2,6 +2,11 @@ from pydantic import BaseSettings
 
 
 class Setting(BaseSettings):
+    pg_pool_size: int = 2
+    pg_max_overflow: int = 5
+    rate_limit_enabled: bool = False
+    user_index_notify: bool = False
+    refresh_revocation_notify: bool = False
 
     class Config:
-        env_file = '.envs/test'
\ No newline at end of file
+        env_file = '.envs/test'
@@ -1,7 +1,10 @@
 import pytest, httpx
 
+from types import SimpleNamespace
 from typing import AsyncGenerator, TypeVar, Callable, Any
 
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
 from settings import Setting
 from settings.test import Setting as AdditionalSetting
 from database.core import init_db
@@ -14,6 +17,54 @@ Fixture = TypeVar('Fixture', bound=Callable[..., Any])
 pytestmark = pytest.mark.anyio
 
 
+class CompilingSession:
+    """
+    Stands in for AsyncSession without a database. Every statement is compiled
+    for asyncpg with the keys of its parameters, as Session.execute does, so a
+    statement Postgres would never receive fails here too. Each execute answers
+    with the next list of rows in `results` (none once they run out), cut down
+    to the columns the statement selects or returns: a projection missing a
+    column the caller reads fails as it would against the database.
+    """
+
+    dialect = asyncpg_dialect()
+
+    def __init__(self, *results: list[dict]) -> None:
+        self.results = list(results)
+        self.executed: list[tuple[Any, dict]] = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def execute(self, statement, params: dict | None = None):
+        params = params or {}
+        compiled = statement.compile(dialect=self.dialect, column_keys=list(params))
+        compiled.construct_params(params)
+        self.executed.append((statement, params))
+        names = list(getattr(statement, 'exported_columns', {}).keys())
+        rows = [
+            SimpleNamespace(**({name: row[name] for name in names} if names else row))
+            for row in (self.results.pop(0) if self.results else [])
+        ]
+        return SimpleNamespace(
+            rowcount=len(rows),
+            all=lambda: rows,
+            first=lambda: rows[0] if rows else None,
+            one=lambda: rows[0],
+            one_or_none=lambda: rows[0] if rows else None,
+            scalars=lambda: SimpleNamespace(all=lambda: [next(iter(vars(row).values())) for row in rows]),
+        )
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+    async def rollback(self) -> None:
+        self.rollbacks += 1
+
+    @property
+    def notifications(self) -> list[tuple[str, str]]:
+        return [(params['channel'], params['payload']) for _, params in self.executed if 'channel' in params]
+
+
 @pytest.fixture(scope='session')
 def anyio_backend():
     return 'asyncio'
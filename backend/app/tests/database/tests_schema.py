@@ -0,0 +1,79 @@
+from contextlib import asynccontextmanager
+
+from sqlmodel import SQLModel
+
+from tests.conftest import (
+    anyio_backend,
+    pytestmark,
+)
+
+from database import core, schema
+
+
+class FakeInspector:
+    """Reports the live schema as exactly what the models declare, less `dropped`, plus `extra`."""
+
+    def __init__(self, dropped: set[str] = frozenset(), extra: dict[str, list[str]] = {}) -> None:
+        self.dropped = dropped
+        self.extra = extra
+
+    def get_table_names(self) -> list[str]:
+        return [name for name in SQLModel.metadata.tables if name not in self.dropped]
+
+    def get_columns(self, table: str) -> list[dict]:
+        columns = [
+            {'name': column.name, 'nullable': column.nullable}
+            for column in SQLModel.metadata.tables[table].columns
+            if f'{table}.{column.name}' not in self.dropped
+        ]
+        return columns + [{'name': name, 'nullable': True} for name in self.extra.get(table, [])]
+
+    def get_indexes(self, table: str) -> list[dict]:
+        return [{'name': index.name} for index in SQLModel.metadata.tables[table].indexes if index.name not in self.dropped]
+
+
+def test_matching_schema_has_no_differences() -> None:
+    assert schema.differences(FakeInspector()) == [], "create_all output matches the models"
+
+def test_differences_create_all_cannot_fix() -> None:
+    found = schema.differences(FakeInspector(dropped={'users.photo'}, extra={'users': ['legacy']}))
+
+    assert 'column users.photo is missing' in found, "added model column reported"
+    assert 'column users.legacy is not in the models' in found, "removed model column reported"
+
+async def test_drifted_schema_is_not_recorded(monkeypatch) -> None:
+    stored = []
+
+    class FakeConnection:
+
+        async def run_sync(self, func):
+            # create_all is skipped; anything else runs against the fake.
+            return None if func == SQLModel.metadata.create_all else func(self)
+
+    @asynccontextmanager
+    async def connection():
+        yield FakeConnection()
+
+    async def stored_version(_connection):
+        return None
+
+    async def nothing(_connection):
+        ...
+
+    async def store_version(_connection, version):
+        stored.append(version)
+
+    monkeypatch.setattr(core, 'async_engine', type('FakeEngine', (), {'connect': staticmethod(connection), 'begin': staticmethod(connection)}))
+    monkeypatch.setattr(core, 'module', 'development')
+    monkeypatch.setattr(schema, 'stored_version', stored_version)
+    monkeypatch.setattr(schema, 'lock', nothing)
+    monkeypatch.setattr(schema, 'create_version_table', nothing)
+    monkeypatch.setattr(schema, 'store_version', store_version)
+    monkeypatch.setattr(schema, 'drift', lambda _connection: ['column users.photo is missing'])
+
+    assert await core.ensure_schema() is False, "drift reported as not applied"
+    assert stored == [], "version left unrecorded, so the next boot checks again"
+
+    monkeypatch.setattr(schema, 'drift', lambda _connection: [])
+    assert await core.ensure_schema() is True, "matching schema applied"
+    assert stored == [schema.current_version()], "version recorded"
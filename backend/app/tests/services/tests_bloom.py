@@ -0,0 +1,32 @@
+import pytest
+
+from services.bloom import BloomFilter
+
+
+def test_bloom_has_no_false_negatives() -> None:
+    bloom = BloomFilter(capacity=1_000, error_rate=0.01)
+    bloom.update(f'item-{i}' for i in range(1_000))
+
+    assert all(f'item-{i}' in bloom for i in range(1_000)), "every added item is found"
+    assert len(bloom) == 1_000, "count tracks additions"
+
+def test_bloom_false_positive_rate_near_target() -> None:
+    bloom = BloomFilter(capacity=1_000, error_rate=0.01)
+    bloom.update(f'item-{i}' for i in range(1_000))
+    false_positives = sum(f'other-{i}' in bloom for i in range(10_000))
+
+    assert false_positives / 10_000 < 0.03, "false positive rate close to the configured one"
+
+def test_bloom_clear() -> None:
+    bloom = BloomFilter(capacity=10)
+    bloom.add('a')
+    bloom.clear()
+
+    assert 'a' not in bloom, "cleared filter is empty"
+    assert bloom.fill_ratio == 0, "no bits set after clear"
+
+def test_bloom_rejects_bad_parameters() -> None:
+    with pytest.raises(ValueError):
+        BloomFilter(capacity=0)
+    with pytest.raises(ValueError):
+        BloomFilter(capacity=10, error_rate=1)
@@ -0,0 +1,96 @@
+import pytest
+
+from tests.conftest import (
+    anyio_backend,
+    pytestmark,
+)
+
+from services import importer
+
+
+async def _body(data: bytes):
+    yield data[:16]
+    yield data[16:]
+
+async def _create_many(users: list[dict], _session) -> set[str]:
+    return {user['login'] for user in users if user['login'] != 'taken_login'}
+
+async def _hash(password: str) -> str:
+    return 'hashed:' + password
+
+
+async def test_import_csv_reports_invalid_and_conflicting_rows(monkeypatch) -> None:
+    monkeypatch.setattr(importer.usr, 'create_many', _create_many)
+    monkeypatch.setattr(importer, 'aget_password_hash', _hash)
+    body = (
+        b'name,surname,login,email,password\n'
+        b'name,surname,good_login,GOOD@example.com,password1\n'
+        b'"multi\nline",surname,taken_login,taken@example.com,password1\n'
+        b'name,surname,bad,bad@example.com,password1\n'
+    )
+
+    report = await importer.import_users(_body(body), 'csv', None)
+    assert (report.created, report.conflicts, report.invalid) == (1, 1, 1), "rows counted"
+    assert [(row.row, row.status) for row in report.rows] == [(2, 'conflict'), (3, 'invalid')], "rows reported in order"
+
+async def test_import_ndjson_batches_rows(monkeypatch) -> None:
+    batches = []
+
+    async def create_many(users: list[dict], _session) -> set[str]:
+        batches.append(len(users))
+        return {user['login'] for user in users}
+
+    monkeypatch.setattr(importer.usr, 'create_many', create_many)
+    monkeypatch.setattr(importer, 'aget_password_hash', _hash)
+    monkeypatch.setattr(importer.settings, 'user_import_batch_size', 2)
+    body = b''.join(
+        b'{"name": "name", "surname": "surname", "login": "login_%d00", "email": "user%d@example.com", "password": "password1"}\n' % (index, index)
+        for index in range(5)
+    )
+
+    report = await importer.import_users(_body(body), 'ndjson', None)
+    assert report.created == 5, "all rows created"
+    assert batches == [2, 2, 1], "rows inserted in batches"
+
+async def test_import_csv_reports_ragged_row_as_invalid(monkeypatch) -> None:
+    monkeypatch.setattr(importer.usr, 'create_many', _create_many)
+    monkeypatch.setattr(importer, 'aget_password_hash', _hash)
+    body = (
+        b'name,surname,login,email,password\n'
+        b'name,surname,ragged_login,ragged@example.com,password1,extra,fields\n'
+        b'name,surname,good_login,good@example.com,password1\n'
+    )
+
+    report = await importer.import_users(_body(body), 'csv', None)
+    assert (report.created, report.invalid) == (1, 1), "ragged row rejected, the rest imported"
+    assert report.rows[0].errors == ['unexpected extra columns'], "reason reported"
+    assert report.rows[0].login == 'ragged_login', "row identified"
+
+async def test_import_rejects_non_utf8_body_before_writing(monkeypatch) -> None:
+    batches = []
+
+    async def create_many(users: list[dict], _session) -> set[str]:
+        batches.append(users)
+        return set()
+
+    monkeypatch.setattr(importer.usr, 'create_many', create_many)
+    monkeypatch.setattr(importer, 'aget_password_hash', _hash)
+    body = (
+        b'name,surname,login,email,password\n'
+        b'name,surname,good_login,good@example.com,password1\n'
+        b'n\xe9me,surname,latin1_login,latin1@example.com,password1\n'
+    )
+
+    with pytest.raises(importer.ImportUnreadableError):
+        await importer.import_users(_body(body), 'csv', None)
+    assert batches == [], "nothing inserted"
+
+async def test_import_rejects_malformed_csv(monkeypatch) -> None:
+    monkeypatch.setattr(importer.usr, 'create_many', _create_many)
+    monkeypatch.setattr(importer, 'aget_password_hash', _hash)
+    # A field past csv.field_size_limit() is the csv module's own refusal.
+    body = b'name,surname,login,email,password\nname,surname,"' + b'x' * 200_000 + b'",long@example.com,password1\n'
+
+    with pytest.raises(importer.ImportUnreadableError):
+        await importer.import_users(_body(body), 'csv', None)
+
@@ -0,0 +1,128 @@
+import smtplib, socket
+from email.mime.text import MIMEText
+
+import pytest
+
+from tests.conftest import (
+    anyio_backend,
+    pytestmark,
+)
+
+from services.mail import MailOutbox, SMTPTransport
+
+
+class FlakyTransport:
+
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.sent = []
+
+    def send(self, sender: str, item) -> None:
+        if item.to.startswith('broken'):
+            raise UnicodeEncodeError('ascii', item.to, 0, 1, 'cannot encode')
+        if self.failures:
+            self.failures -= 1
+            raise smtplib.SMTPServerDisconnected('connection lost')
+        self.sent.append(item.to)
+
+    def close(self) -> None:
+        ...
+
+
+def _message(to: str) -> MIMEText:
+    message = MIMEText('<p>hello</p>', 'html')
+    message['Subject'] = 'Email Confirmation'
+    message['To'] = to
+    return message
+
+
+async def test_outbox_retries_failed_messages() -> None:
+    transport = FlakyTransport(failures=2)
+    outbox = MailOutbox(lambda: transport, sender='sender@example.com', retry_backoff=0.01)
+    outbox.start()
+
+    outbox.enqueue('user@example.com', _message('user@example.com'))
+    await outbox.stop(timeout=5)
+
+    assert transport.sent == ['user@example.com'], "message delivered after retries"
+    assert outbox.stats.retried == 2, "two retries"
+    assert not outbox.dead_letters, "nothing dead lettered"
+
+async def test_outbox_dead_letters_after_max_retries() -> None:
+    transport = FlakyTransport(failures=100)
+    outbox = MailOutbox(lambda: transport, sender='sender@example.com', max_retries=1, retry_backoff=0.01)
+    outbox.start()
+
+    outbox.enqueue('user@example.com', _message('user@example.com'))
+    await outbox.stop(timeout=5)
+
+    assert [item.to for item in outbox.dead_letters] == ['user@example.com'], "message dead lettered"
+    assert outbox.depth == 0, "queue drained"
+
+async def test_outbox_dead_letters_unsendable_message_without_retrying() -> None:
+    transport = FlakyTransport(failures=0)
+    outbox = MailOutbox(lambda: transport, sender='sender@example.com', retry_backoff=0.01)
+    outbox.start()
+
+    outbox.enqueue('broken@example.com', _message('broken@example.com'))
+    outbox.enqueue('user@example.com', _message('user@example.com'))
+    await outbox.stop(timeout=5)
+
+    assert [item.to for item in outbox.dead_letters] == ['broken@example.com'], "unsendable message dead lettered"
+    assert outbox.stats.retried == 0, "not retried"
+    assert transport.sent == ['user@example.com'], "rest of the batch delivered"
+
+async def test_outbox_worker_survives_a_failed_batch() -> None:
+    transports = []
+
+    def transport_factory():
+        if not transports:
+            transports.append(None)
+            raise RuntimeError('transport misconfigured')
+        transports.append(FlakyTransport(failures=0))
+        return transports[-1]
+
+    outbox = MailOutbox(transport_factory, sender='sender@example.com')
+    outbox.start()
+
+    outbox.enqueue('first@example.com', _message('first@example.com'))
+    await outbox._queue.join()
+    outbox.enqueue('second@example.com', _message('second@example.com'))
+    await outbox.stop(timeout=5)
+
+    assert [item.to for item in outbox.dead_letters] == ['first@example.com'], "failed batch dead lettered"
+    assert transports[-1].sent == ['second@example.com'], "worker kept sending"
+
+async def test_outbox_batches_over_one_smtp_connection() -> None:
+    controller_module = pytest.importorskip('aiosmtpd.controller')
+    handler_module = pytest.importorskip('aiosmtpd.handlers')
+
+    handler = handler_module.Sink()
+    handler.messages = []
+
+    async def handle_DATA(server, session, envelope):
+        handler.messages.append((session.peer, envelope.rcpt_tos))
+        return '250 OK'
+
+    handler.handle_DATA = handle_DATA
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    controller = controller_module.Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    try:
+        outbox = MailOutbox(
+            lambda: SMTPTransport('127.0.0.1', port, starttls=False),
+            sender='sender@example.com',
+            batch_size=10,
+        )
+        for index in range(5):
+            outbox.enqueue(f'user{index}@example.com', _message(f'user{index}@example.com'))
+        outbox.start()
+        await outbox.stop(timeout=5)
+    finally:
+        controller.stop()
+
+    assert len(handler.messages) == 5, "all messages delivered"
+    assert len({peer for peer, _ in handler.messages}) == 1, "one smtp connection reused"
+    assert outbox.stats.batches == 1, "delivered in one batch"
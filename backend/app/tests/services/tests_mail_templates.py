@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from services.mail import TemplateRegistry, registry
+
+
+def _write(path, content: str, mtime: int) -> None:
+    path.write_text(content, encoding='utf-8')
+    os.utime(path, (mtime, mtime))
+
+
+def test_registry_renders_named_templates(tmp_path) -> None:
+    _write(tmp_path / 'confirmation.html', 'Hello {{ login }}', 1_000)
+    templates = TemplateRegistry(str(tmp_path), {'confirmation': 'confirmation.html'})
+    templates.load()
+
+    assert templates.render('confirmation', login='<b>') == 'Hello &lt;b&gt;', "rendered and escaped"
+    with pytest.raises(KeyError):
+        templates.render('unknown')
+
+def test_shipped_templates_render() -> None:
+    registry.load()
+    confirmation = registry.render('confirmation', site='https://example.com', login='mail_login', confirmation_url='https://example.com/confirm')
+    password_reset = registry.render('password_reset', site='https://example.com', login='mail_login', reset_url='https://example.com/reset')
+
+    assert 'https://example.com/confirm' in confirmation, "confirmation link rendered"
+    assert 'https://example.com/reset' in password_reset, "reset link rendered"
+    assert 'mail_login' in password_reset, "login rendered"
+
+def test_registry_reloads_changed_templates_only_when_enabled(tmp_path) -> None:
+    template = tmp_path / 'confirmation.html'
+    _write(template, 'v1', 1_000)
+    cached = TemplateRegistry(str(tmp_path), {'confirmation': 'confirmation.html'})
+    reloading = TemplateRegistry(str(tmp_path), {'confirmation': 'confirmation.html'}, auto_reload=True)
+    cached.load()
+    reloading.load()
+
+    _write(template, 'v2', 2_000)
+    assert cached.render('confirmation') == 'v1', "compiled template reused"
+    assert reloading.render('confirmation') == 'v2', "changed template reloaded"
@@ -0,0 +1,42 @@
+import httpx
+from fastapi import FastAPI
+
+from tests.conftest import (
+    anyio_backend,
+    pytestmark,
+)
+
+from services.metrics import Registry, http_requests
+from middlewares.metrics import MetricsMiddleware
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', 'Latency.', ('route',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, '/a"b')
+
+    lines = registry.render().splitlines()
+    assert '# TYPE latency_seconds histogram' in lines, "type line rendered"
+    assert 'latency_seconds_bucket{route="/a\\"b",le="0.1"} 1' in lines, "first bucket, label escaped"
+    assert 'latency_seconds_bucket{route="/a\\"b",le="1"} 2' in lines, "buckets cumulative"
+    assert 'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 3' in lines, "inf bucket counts all"
+    assert 'latency_seconds_count{route="/a\\"b"} 3' in lines, "count rendered"
+
+async def test_middleware_labels_requests_by_route_template() -> None:
+    app = FastAPI()
+
+    @app.get('/items/{item_id}')
+    async def get_item(item_id: str) -> dict:
+        return {'id': item_id}
+
+    app.add_middleware(MetricsMiddleware)
+    before = http_requests.value('GET', '/items/{item_id}', '200')
+
+    async with httpx.AsyncClient(app=app, base_url='http://test') as client:
+        await client.get('/items/1')
+        await client.get('/items/2')
+        await client.get('/missing')
+
+    assert http_requests.value('GET', '/items/{item_id}', '200') - before == 2, "requests labeled by template"
+    assert http_requests.value('GET', '<unmatched>', '404') >= 1, "unmatched requests share one label"
@@ -0,0 +1,62 @@
+import asyncio, threading, time
+from typing import Callable
+
+import pytest
+
+from tests.conftest import (
+    anyio_backend,
+    pytestmark,
+)
+
+from services.auth import password
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(password.settings, 'password_hash_executor', 'thread')
+    monkeypatch.setattr(password.settings, 'password_hash_max_concurrency', 2)
+    password.shutdown_pool()
+    yield password
+    password.shutdown_pool()
+
+def make_work() -> tuple[Callable, list[int]]:
+    lock, running, peaks = threading.Lock(), [0], []
+
+    def work(value):
+        with lock:
+            running[0] += 1
+            peaks.append(running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return value
+
+    return work, peaks
+
+
+async def test_hash_and_verify_round_trip(pool) -> None:
+    hashed = await pool.aget_password_hash('test_password')
+
+    assert hashed != 'test_password', "password hashed"
+    assert await pool.averify_password('test_password', hashed), "right password verifies"
+    assert not await pool.averify_password('wrong_password', hashed), "wrong password rejected"
+
+async def test_concurrency_capped(pool) -> None:
+    work, peaks = make_work()
+    completed = pool.stats.completed
+
+    assert await asyncio.gather(*(pool._run_in_pool(work, value) for value in range(6))) == list(range(6)), "results in order"
+    assert max(peaks) == 2, "no more than password_hash_max_concurrency at once"
+    assert pool.stats.completed - completed == 6, "completions counted"
+    assert (pool.stats.queued, pool.stats.running) == (0, 0), "gauges back to zero"
+    assert pool.stats.total_wait_seconds > 0, "queueing measured"
+
+def test_pool_works_across_event_loops(pool) -> None:
+    work, peaks = make_work()
+
+    async def burst():
+        return await asyncio.gather(*(pool._run_in_pool(work, value) for value in range(4)))
+
+    # A semaphore bound to the first loop would raise on the second.
+    assert asyncio.run(burst()) == asyncio.run(burst()) == list(range(4)), "both loops served"
+    assert max(peaks) == 2, "cap held on each loop"
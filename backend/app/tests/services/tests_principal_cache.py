@@ -0,0 +1,66 @@
+import uuid, asyncio
+from contextlib import asynccontextmanager
+
+from tests.conftest import (
+    anyio_backend,
+    pytestmark,
+    CompilingSession,
+)
+
+from crud.utils import hooks
+from services import singleflight
+from services.cache import MemoryBackend, RedisBackend, FakeRedis
+from services.auth.principal import Principal, PrincipalCache, principal_cache
+
+
+async def test_memory_backend_evicts_least_recently_used() -> None:
+    backend = MemoryBackend(max_size=2)
+    await backend.set('a', 1, ttl=60)
+    await backend.set('b', 2, ttl=60)
+    await backend.get('a')
+    await backend.set('c', 3, ttl=60)
+
+    assert await backend.get('b') is None, "least recently used key evicted"
+    assert await backend.get('a') == 1, "recently used key kept"
+    assert await backend.get('c') == 3, "new key stored"
+
+async def test_memory_backend_expires_keys() -> None:
+    backend = MemoryBackend()
+    await backend.set('a', 1, ttl=0.01)
+    await asyncio.sleep(0.02)
+
+    assert await backend.get('a') is None, "expired key is a miss"
+    assert len(backend) == 0, "expired key removed"
+
+async def test_redis_backend_round_trip() -> None:
+    backend = RedisBackend(FakeRedis(), prefix='test:')
+    await backend.set('a', {'id': 'a', 'is_active': True}, ttl=60)
+    assert await backend.get('a') == {'id': 'a', 'is_active': True}, "value round trips through json"
+
+    await backend.delete('a')
+    assert await backend.get('a') is None, "deleted key is a miss"
+
+async def test_principal_invalidated_by_user_event() -> None:
+    user_id = uuid.uuid4()
+    await principal_cache.backend.set(str(user_id), {'id': str(user_id), 'is_active': True, 'role': 'user'}, ttl=60)
+
+    await hooks.fire(hooks.UserEvent(kind='updated', id=user_id))
+    assert await principal_cache.backend.get(str(user_id)) is None, "principal invalidated"
+
+async def test_principal_loads_only_what_authorization_needs(monkeypatch) -> None:
+    user_id = uuid.uuid4()
+    session = CompilingSession([{'id': user_id, 'is_active': True, 'role': 'admin'}])
+
+    @asynccontextmanager
+    async def read_session():
+        yield session
+
+    monkeypatch.setattr(singleflight, 'read_session', read_session)
+    cache = PrincipalCache(MemoryBackend(), ttl=60)
+
+    assert await cache.get(str(user_id)) == Principal(id=str(user_id), is_active=True, role='admin'), "principal loaded"
+    assert await cache.get(str(user_id)) == Principal(id=str(user_id), is_active=True, role='admin'), "principal cached"
+    assert len(session.executed) == 1, "one query"
+    statement, _ = session.executed[0]
+    assert list(statement.selected_columns.keys()) == ['id', 'is_active', 'role'], "no password hash or profile columns read"
+
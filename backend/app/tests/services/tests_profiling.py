@@ -0,0 +1,55 @@
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from tests.conftest import (
+    anyio_backend,
+    pytestmark,
+)
+
+from services import profiling
+from middlewares.profiling import ProfilingMiddleware
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get('/slow')
+    async def slow() -> dict:
+        return {'total': sum(range(10_000))}
+
+    app.add_middleware(ProfilingMiddleware)
+    return app
+
+
+async def test_profiles_only_signed_requests(monkeypatch) -> None:
+    monkeypatch.setattr(profiling.settings, 'profiling_secret', 'secret')
+    monkeypatch.setattr(profiling.settings, 'profiling_sample_rate', 0.0)
+    monkeypatch.setattr(profiling, 'store', profiling.ProfileStore(size=2))
+    signature = profiling.sign('GET', '/slow', int(time.time()) + 60, 'secret')
+
+    async with httpx.AsyncClient(app=_app(), base_url='http://test') as client:
+        await client.get('/slow')
+        await client.get('/slow', headers={'X-Profile': 'bad:signature'})
+        await client.get('/slow', headers={'X-Profile': signature})
+
+    profiles = profiling.store.list()
+    assert [(profile.path, profile.status) for profile in profiles] == [('/slow', 200)], "only the signed request profiled"
+    profile = profiling.store.get(profiles[0].id)
+    assert any('slow' in function.function for function in profile.functions), "handler in call graph"
+
+async def test_ring_keeps_latest_profiles(monkeypatch) -> None:
+    monkeypatch.setattr(profiling.settings, 'profiling_secret', None)
+    monkeypatch.setattr(profiling.settings, 'profiling_sample_rate', 1.0)
+    monkeypatch.setattr(profiling, 'store', profiling.ProfileStore(size=2))
+
+    async with httpx.AsyncClient(app=_app(), base_url='http://test') as client:
+        for _ in range(3):
+            await client.get('/slow')
+
+    assert [profile.id for profile in profiling.store.list()] == [3, 2], "oldest profile evicted"
+
+def test_expired_signature_rejected() -> None:
+    signature = profiling.sign('GET', '/slow', int(time.time()) - 1, 'secret')
+    assert not profiling.verify_signature(signature, 'GET', '/slow', 'secret'), "expired signature rejected"
@@ -0,0 +1,115 @@
+import httpx, pytest
+from starlette.applications import Starlette
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from tests.conftest import (
+    client,
+    anyio_backend,
+    pytestmark,
+)
+
+from httpx import AsyncClient
+
+import main
+from middlewares.ratelimit import RateLimitMiddleware
+from services.cache import FakeRedis
+from services.ratelimit import (
+    Rule,
+    RateLimiter,
+    MemoryRateLimitStore,
+    RedisRateLimitStore,
+    rate_limiter,
+)
+
+
+def test_rule_parse() -> None:
+    assert Rule.parse('5/minute') == Rule(limit=5, window=60), "single period"
+    assert Rule.parse('10/30 seconds') == Rule(limit=10, window=30), "counted period"
+    with pytest.raises(ValueError):
+        Rule.parse('5/fortnight')
+
+@pytest.mark.parametrize('store', [MemoryRateLimitStore(), RedisRateLimitStore(FakeRedis())], ids=['memory', 'fakeredis'])
+async def test_store_limits_per_key(store) -> None:
+    rule = Rule(limit=3, window=60)
+    results = [await store.hit('a', rule) for _ in range(4)]
+
+    assert results[:3] == [0.0, 0.0, 0.0], "hits under the limit allowed"
+    assert 0 < results[3] <= 2 * rule.window, "hit over the limit gets a retry delay"
+    assert await store.hit('b', rule) == 0.0, "other keys unaffected"
+    await store.clear()
+
+async def test_memory_store_evicts_least_recently_used() -> None:
+    store = MemoryRateLimitStore(max_keys=2)
+    rule = Rule(limit=1, window=60)
+    for key in ('a', 'b', 'c'):
+        await store.hit(key, rule)
+
+    assert len(store) == 2, "store bounded"
+    assert await store.hit('a', rule) == 0.0, "evicted key starts over"
+
+async def test_middleware_rejects_before_app() -> None:
+    calls = []
+
+    async def endpoint(request):
+        calls.append(request)
+        return PlainTextResponse('ok')
+
+    limiter = RateLimiter(MemoryRateLimitStore(), ip_rules={'/login': '1/minute'}, identity_rules={})
+    app = RateLimitMiddleware(Starlette(routes=[Route('/login', endpoint, methods=['POST'])]), limiter=limiter)
+    async with httpx.AsyncClient(app=app, base_url='http://test') as client:
+        assert (await client.post('/login')).status_code == 200, "first request allowed"
+        response = await client.post('/login')
+
+    assert response.status_code == 429, "second request limited"
+    assert int(response.headers['retry-after']) >= 1, "Retry-After set"
+    assert len(calls) == 1, "limited request never reached the app"
+
+async def test_middleware_limits_clients_behind_a_trusted_proxy() -> None:
+
+    async def endpoint(request):
+        return PlainTextResponse('ok')
+
+    limiter = RateLimiter(MemoryRateLimitStore(), ip_rules={'/login': '1/minute'}, identity_rules={})
+    limited = RateLimitMiddleware(Starlette(routes=[Route('/login', endpoint, methods=['POST'])]), limiter=limiter)
+
+    # What uvicorn runs in front of the app with proxy_headers enabled.
+    app = ProxyHeadersMiddleware(limited, trusted_hosts='10.0.0.1')
+    transport = httpx.ASGITransport(app=app, client=('10.0.0.1', 123))
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        first = await client.post('/login', headers={'x-forwarded-for': '203.0.113.1'})
+        second = await client.post('/login', headers={'x-forwarded-for': '203.0.113.2'})
+        again = await client.post('/login', headers={'x-forwarded-for': '203.0.113.1'})
+    assert (first.status_code, second.status_code) == (200, 200), "clients behind the proxy limited separately"
+    assert again.status_code == 429, "each client still limited"
+
+    app = ProxyHeadersMiddleware(limited, trusted_hosts='10.0.0.1')
+    transport = httpx.ASGITransport(app=app, client=('198.51.100.7', 123))
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        first = await client.post('/login', headers={'x-forwarded-for': '203.0.113.3'})
+        spoofed = await client.post('/login', headers={'x-forwarded-for': '203.0.113.4'})
+    assert first.status_code == 200, "untrusted peer limited by its own address"
+    assert spoofed.status_code == 429, "forwarded header ignored from an untrusted peer"
+
+def test_server_trusts_configured_proxies(monkeypatch) -> None:
+    calls = []
+    monkeypatch.setattr(main.uvicorn, 'run', lambda *args, **kwargs: calls.append(kwargs))
+    monkeypatch.setattr(main.settings, 'server_reload', False)
+    monkeypatch.setattr(main.settings, 'rate_limit_trusted_proxies', '10.0.0.1,10.0.0.2')
+
+    main.main()
+    assert calls[0]['proxy_headers'] is True, "proxy headers honoured"
+    assert calls[0]['forwarded_allow_ips'] == '10.0.0.1,10.0.0.2', "only from the configured proxies"
+
+def test_cors_wraps_the_rate_limiter() -> None:
+    assert main.app.user_middleware[0].cls is CORSMiddleware, "CORS is the outermost middleware"
+
+async def test_login_throttled_by_identity(client: AsyncClient, monkeypatch) -> None:
+    monkeypatch.setattr(rate_limiter, 'enabled', True)
+    monkeypatch.setattr(rate_limiter, 'identity_rules', {'login': Rule(limit=0, window=60)})
+
+    response = await client.post('/api/v1/auth/login', json={"login": "test_login", "password": "test_password"})
+    assert response.status_code == 429, "login limited before any lookup"
+    assert 'retry-after' in response.headers, "Retry-After set"
@@ -0,0 +1,130 @@
+import uuid
+from datetime import timedelta
+
+from tests.conftest import (
+    anyio_backend,
+    pytestmark,
+    CompilingSession,
+)
+
+import schemas
+from crud import token as tkn
+from services.auth.refresh import RefreshTokenStore
+from routers.v1 import user as user_router
+
+
+async def test_revocation_check_skips_database_on_bloom_negative() -> None:
+    store = RefreshTokenStore(capacity=100, error_rate=0.01, expires_in=timedelta(minutes=5), notify=False)
+    store.listener.ready = True
+
+    # No session: a Bloom negative must not need one.
+    assert await store.is_revoked(str(uuid.uuid4()), None) is False, "unknown family is not revoked"
+    assert store.bloom_negatives == 1, "answered by the filter"
+    assert store.lookups == 0, "no table lookup"
+
+
+def make_store() -> RefreshTokenStore:
+    store = RefreshTokenStore(capacity=100, error_rate=0.01, expires_in=timedelta(minutes=5), notify=False)
+    store.listener.ready = True
+    return store
+
+def deliver(session: CompilingSession, *stores: RefreshTokenStore) -> None:
+    # Stands in for Postgres handing the committed NOTIFY to every listener.
+    for channel, payload in session.notifications:
+        for store in stores:
+            assert channel == store.listener.channel, "announced on the channel workers listen to"
+            store.listener.on_notify(payload)
+
+
+async def test_revocation_reaches_another_worker(monkeypatch) -> None:
+    worker_a, worker_b = make_store(), make_store()
+    family_id = uuid.uuid4()
+    revoked = set()
+
+    async def is_family_revoked(family, _session):
+        return family in revoked
+
+    monkeypatch.setattr(tkn, 'is_family_revoked', is_family_revoked)
+    assert await worker_b.is_revoked(str(family_id), None) is False, "live family"
+
+    session = CompilingSession([{'family_id': family_id}])
+    assert await worker_a.revoke(str(family_id), session) is True, "family revoked"
+    revoked.add(family_id)
+    assert session.commits == 1, "revocation committed together with its announcement"
+    deliver(session, worker_a, worker_b)
+
+    assert await worker_b.is_revoked(str(family_id), None) is True, "other worker sees the revocation"
+    assert worker_b.lookups == 1, "confirmed against the table"
+
+async def test_revoke_user_announces_every_family(monkeypatch) -> None:
+    worker_a, worker_b = make_store(), make_store()
+    families = [uuid.uuid4() for _ in range(250)]
+
+    session = CompilingSession([{'family_id': family_id} for family_id in families])
+    await worker_a.revoke_user(uuid.uuid4(), session)
+    deliver(session, worker_b)
+
+    assert len(session.notifications) == 3, "payloads chunked under the NOTIFY size limit"
+    assert all(str(family_id) in worker_b.revoked for family_id in families), "every family announced"
+
+async def test_bloom_negative_not_trusted_while_channel_is_down(monkeypatch) -> None:
+    store = make_store()
+    store.listener.ready = False
+    lookups = []
+
+    async def is_family_revoked(family, _session):
+        lookups.append(family)
+        return True
+
+    monkeypatch.setattr(tkn, 'is_family_revoked', is_family_revoked)
+    assert await store.is_revoked(str(uuid.uuid4()), None) is True, "answered by the table"
+    assert len(lookups) == 1, "no shortcut through a filter that may have missed revocations"
+
+async def test_revocations_heard_during_load_are_kept(monkeypatch) -> None:
+    store = make_store()
+    loaded, heard = uuid.uuid4(), uuid.uuid4()
+
+    async def revoked_families(_session, chunk_size=1_000):
+        yield [loaded]
+        store.listener.on_notify(f'["{heard}"]')
+
+    monkeypatch.setattr(tkn, 'revoked_families', revoked_families)
+    await store.load(None)
+
+    assert str(loaded) in store.revoked, "loaded family"
+    assert str(heard) in store.revoked, "family announced mid-load"
+
+async def test_password_change_revokes_sessions(monkeypatch) -> None:
+    user_id = str(uuid.uuid4())
+    revoked = []
+
+    async def update(data, _session):
+        return True
+
+    async def revoke_user(user, _session):
+        revoked.append(user)
+
+    monkeypatch.setattr(user_router.usr, 'update', update)
+    monkeypatch.setattr(user_router.refresh_tokens, 'revoke_user', revoke_user)
+    await user_router.update_password_endpoint(
+        schemas.UpdateUserPassword(old_password='old_password', new_password='new_password'),
+        database_session=None,
+        user_id=user_id,
+    )
+    assert revoked == [user_id], "refresh families revoked on password change"
+
+async def test_user_delete_revokes_sessions_first(monkeypatch) -> None:
+    user_id = str(uuid.uuid4())
+    calls = []
+
+    async def delete(user, _session):
+        calls.append('delete')
+        return True
+
+    async def revoke_user(user, _session):
+        calls.append('revoke')
+
+    monkeypatch.setattr(user_router.usr, 'delete', delete)
+    monkeypatch.setattr(user_router.refresh_tokens, 'revoke_user', revoke_user)
+    await user_router.delete_user_endpoint(database_session=None, user_id=user_id)
+    assert calls == ['revoke', 'delete'], "families announced before the rows cascade away"
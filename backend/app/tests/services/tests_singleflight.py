@@ -0,0 +1,123 @@
+import uuid, asyncio
+
+from tests.conftest import (
+    anyio_backend,
+    pytestmark,
+)
+
+from crud import user as usr
+from crud.utils import hooks
+from services.singleflight import SingleFlight, get_user, user_flights
+
+
+def make_load(calls: list, release: asyncio.Event, result='row'):
+
+    async def load(*args):
+        calls.append(args)
+        await release.wait()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return load
+
+
+async def test_concurrent_calls_share_one_execution() -> None:
+    flights, calls, release = SingleFlight(timeout=1), [], asyncio.Event()
+    load = make_load(calls, release)
+
+    waiters = [asyncio.create_task(flights.do('key', load, 'key')) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ['row'] * 5, "every caller gets the result"
+    assert len(calls) == 1, "one execution"
+    assert (flights.calls, flights.coalesced) == (1, 4), "leader and coalesced calls counted"
+    assert len(flights) == 0, "key released"
+
+async def test_different_keys_do_not_coalesce() -> None:
+    flights, calls, release = SingleFlight(timeout=1), [], asyncio.Event()
+    load = make_load(calls, release)
+    release.set()
+
+    await asyncio.gather(flights.do('a', load, 'a'), flights.do('b', load, 'b'))
+    assert len(calls) == 2, "one execution per key"
+
+async def test_cancelled_caller_does_not_cancel_the_flight() -> None:
+    flights, calls, release = SingleFlight(timeout=1), [], asyncio.Event()
+    load = make_load(calls, release)
+
+    leader = asyncio.create_task(flights.do('key', load))
+    follower = asyncio.create_task(flights.do('key', load))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == 'row', "remaining caller still served"
+    assert leader.cancelled(), "cancelled caller stopped waiting"
+
+async def test_timeout_releases_the_key() -> None:
+    flights, calls, release = SingleFlight(timeout=0.01), [], asyncio.Event()
+    load = make_load(calls, release)
+
+    results = await asyncio.gather(flights.do('key', load), flights.do('key', load), return_exceptions=True)
+    assert all(isinstance(result, asyncio.TimeoutError) for result in results), "every caller times out"
+    assert flights.timeouts == 1, "timeout counted once"
+    assert len(flights) == 0, "key released"
+
+    release.set()
+    assert await flights.do('key', load) == 'row', "next call runs a fresh flight"
+
+async def test_exception_reaches_every_caller() -> None:
+    flights, calls, release = SingleFlight(timeout=1), [], asyncio.Event()
+    load = make_load(calls, release, result=ValueError('boom'))
+
+    waiters = [asyncio.create_task(flights.do('key', load)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results), "error shared"
+    assert len(calls) == 1, "one execution"
+
+async def test_forget_starts_a_fresh_flight() -> None:
+    flights, calls, release = SingleFlight(timeout=1), [], asyncio.Event()
+    load = make_load(calls, release)
+
+    first = asyncio.create_task(flights.do('key', load))
+    await asyncio.sleep(0)
+    flights.forget('key')
+    second = asyncio.create_task(flights.do('key', load))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(first, second) == ['row', 'row'], "both served"
+    assert len(calls) == 2, "forgotten flight not joined"
+
+async def test_get_user_coalesces_lookups(monkeypatch) -> None:
+    calls, release = [], asyncio.Event()
+
+    async def get(user, _session, private=False):
+        calls.append((user, private))
+        await release.wait()
+        return user
+
+    monkeypatch.setattr(usr, 'get', get)
+    user_id = uuid.uuid4()
+    waiters = [asyncio.create_task(get_user(user_id, private=True)) for _ in range(3)]
+    waiters.append(asyncio.create_task(get_user(user_id)))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == [user_id] * 4, "every caller served"
+    assert calls == [(user_id, True), (user_id, False)], "one query per projection"
+
+async def test_user_event_forgets_flights() -> None:
+    user_id = uuid.uuid4()
+    user_flights._flights[('private', uuid.UUID, user_id)] = asyncio.get_running_loop().create_future()
+    user_flights._flights[('public', str, 'event_login')] = asyncio.get_running_loop().create_future()
+
+    await hooks.fire(hooks.UserEvent(kind='updated', id=user_id, login='event_login'))
+    assert ('private', uuid.UUID, user_id) not in user_flights._flights, "id flight forgotten"
+    assert ('public', str, 'event_login') not in user_flights._flights, "login flight forgotten"
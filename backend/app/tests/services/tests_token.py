@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from services.auth.token import tokens, InvalidTokenError, REFRESH
+
+
+def test_token_round_trip() -> None:
+    token = tokens.create_access_token('subject', timedelta(minutes=1))
+    claims = tokens.verify(token)
+
+    assert claims['sub'] == 'subject', "subject preserved"
+    assert claims['type'] == 'access', "access token type"
+    assert tokens.verify(token) == claims, "cached verification returns same claims"
+
+def test_token_type_checked() -> None:
+    token = tokens.create_refresh_token('subject', timedelta(minutes=1))
+
+    with pytest.raises(InvalidTokenError):
+        tokens.verify(token)
+    assert tokens.verify(token, REFRESH)['sub'] == 'subject', "refresh token accepted as refresh"
+
+def test_tampered_token_rejected() -> None:
+    token = tokens.create_access_token('subject', timedelta(minutes=1))
+    tokens.verify(token)
+    header, payload, signature = token.split('.')
+
+    with pytest.raises(InvalidTokenError):
+        tokens.verify(f'{header}.{payload}x.{signature}')
+
+def test_expired_cache_entry_reverified() -> None:
+    token = tokens.create_access_token('subject', timedelta(minutes=1))
+    tokens.verify(token)
+    tokens._verified[token]['exp'] = int(time.time()) - 1
+    misses = tokens.cache_misses
+
+    assert tokens.verify(token)['exp'] > time.time(), "claims decoded again from the token"
+    assert tokens.cache_misses == misses + 1, "expired cache entry is a miss"
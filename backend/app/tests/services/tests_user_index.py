@@ -0,0 +1,202 @@
+import uuid, asyncio
+from types import SimpleNamespace
+
+import orjson
+
+from tests.conftest import (
+    anyio_backend,
+    pytestmark,
+)
+
+import schemas
+from crud import user as usr
+from pydantic import EmailStr
+from services.bloom import BloomFilter
+from services.notify import MAX_PAYLOAD
+from services.user_index import UserIndex
+
+
+def make_index(*keys: str, negative_ttl: float = 60) -> UserIndex:
+    index = UserIndex(capacity=1_000, error_rate=0.01, negative_ttl=negative_ttl, negative_size=100, rebuild_interval=60, notify=False)
+    index.filter = BloomFilter(1_000, 0.01)
+    index.filter.update(keys)
+    index.listener.ready = True
+    return index
+
+def patch_get(monkeypatch, found: bool = False) -> list:
+    calls = []
+
+    async def get(user, _session, private=False):
+        calls.append(user)
+        return SimpleNamespace(login=user) if found else None
+
+    monkeypatch.setattr(usr, 'get', get)
+    return calls
+
+
+async def test_unknown_login_answered_without_query(monkeypatch) -> None:
+    calls = patch_get(monkeypatch)
+    index = make_index('login:known_login')
+
+    assert await index.get('unknown_login', None) is None, "definite miss"
+    assert await index.get(EmailStr('nobody@example.com'), None) is None, "definite miss by email"
+    assert calls == [], "database not queried"
+    assert index.definite_misses == 2, "misses counted"
+
+async def test_possible_login_is_queried(monkeypatch) -> None:
+    calls = patch_get(monkeypatch, found=True)
+    index = make_index('login:known_login')
+
+    assert await index.get('known_login', None) is not None, "existing user found"
+    assert calls == ['known_login'], "database queried"
+
+async def test_lookups_bypass_unloaded_filter(monkeypatch) -> None:
+    calls = patch_get(monkeypatch)
+    index = make_index()
+    index.filter = None
+
+    await index.get('unknown_login', None)
+    assert calls == ['unknown_login'], "no filter, every lookup queried"
+    assert index.might_exist('unknown_login'), "no filter, everything might exist"
+
+async def test_lookups_bypass_filter_while_channel_is_down(monkeypatch) -> None:
+    calls = patch_get(monkeypatch)
+    index = make_index()
+    index.listener.ready = False
+
+    await index.get('unknown_login', None)
+    assert calls == ['unknown_login'], "peers' inserts may be missing, lookup queried"
+    assert index.might_exist('unknown_login'), "nothing ruled out"
+
+async def test_ids_are_not_filtered(monkeypatch) -> None:
+    calls = patch_get(monkeypatch)
+    index = make_index()
+    user_id = uuid.uuid4()
+
+    await index.get(user_id, None)
+    assert calls == [user_id], "id lookups always queried"
+
+async def test_false_positive_is_remembered(monkeypatch) -> None:
+    calls = patch_get(monkeypatch)
+    index = make_index('login:ghost_login')
+
+    assert await index.get('ghost_login', None) is None, "database says no"
+    assert await index.get('ghost_login', None) is None, "negative cache says no"
+    assert len(calls) == 1, "second lookup answered from the negative cache"
+    assert (index.false_positives, index.negative_hits) == (1, 1), "false positive and negative hit counted"
+
+async def test_negative_cache_expires(monkeypatch) -> None:
+    calls = patch_get(monkeypatch)
+    index = make_index('login:ghost_login', negative_ttl=0.01)
+
+    await index.get('ghost_login', None)
+    await asyncio.sleep(0.02)
+    await index.get('ghost_login', None)
+    assert len(calls) == 2, "expired negative queried again"
+
+async def test_add_clears_negative(monkeypatch) -> None:
+    calls = patch_get(monkeypatch)
+    index = make_index('login:new_login')
+
+    await index.get('new_login', None)
+    index.add('new_login', 'new@example.com')
+    await index.get('new_login', None)
+
+    assert len(calls) == 2, "created user queried again"
+    assert index.might_exist(EmailStr('NEW@example.com')), "email added, case-insensitively"
+
+async def test_miss_racing_an_insert_is_not_remembered(monkeypatch) -> None:
+    index = make_index('login:racing_login')
+
+    async def get(user, _session, private=False):
+        index.add('racing_login', None)
+        return None
+
+    monkeypatch.setattr(usr, 'get', get)
+    await index.get('racing_login', None)
+    assert not index._is_negative('login:racing_login'), "negative dropped after concurrent insert"
+
+async def test_might_exist_needs_every_key_absent() -> None:
+    index = make_index('login:taken_login')
+
+    assert index.might_exist('taken_login', EmailStr('free@example.com')), "one key taken"
+    assert not index.might_exist('free_login', EmailStr('free@example.com')), "both free"
+
+async def test_false_positive_rate() -> None:
+    index = make_index()
+    index.definite_misses, index.false_positives, index.negative_hits = 97, 2, 1
+
+    assert index.false_positive_rate == 0.03, "share of absent names the filter claimed"
+
+async def test_rebuild_keeps_adds_made_during_the_scan(monkeypatch) -> None:
+    index = make_index('login:deleted_login')
+
+    async def identities(_session, chunk_size=1_000):
+        yield [SimpleNamespace(login='scanned_login', email='Scanned@example.com')]
+        index.add('added_login', None)
+        yield [SimpleNamespace(login='other_login', email='other@example.com')]
+
+    monkeypatch.setattr(usr, 'identities', identities)
+    await index.rebuild(None)
+
+    assert index.might_exist('scanned_login'), "scanned login"
+    assert index.might_exist(EmailStr('scanned@example.com')), "scanned email, lowercased"
+    assert index.might_exist('added_login'), "login added mid-scan"
+    assert not index.might_exist('deleted_login'), "deleted login gone after rebuild"
+    assert index.rebuilds == 1, "rebuild counted"
+
+async def test_notification_adds_to_filter() -> None:
+    index = make_index()
+    index.listener.on_notify(orjson.dumps([['peer_login', 'peer@example.com'], ['other_peer', 'other@example.com']]).decode())
+
+    assert index.might_exist('peer_login'), "login from another worker"
+    assert index.might_exist(EmailStr('peer@example.com')), "email from another worker"
+    assert index.might_exist('other_peer'), "every pair in the payload"
+
+
+class FakeSession:
+    """Returns `rows` for any write and records the notifications sent."""
+
+    def __init__(self, rows: list) -> None:
+        self.rows = rows
+        self.executed = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        self.executed.append((params, self.commits))
+        return SimpleNamespace(all=lambda: self.rows, one=lambda: self.rows[0])
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+    @property
+    def notifications(self) -> list[tuple[str, str, int]]:
+        return [(params['channel'], params['payload'], commits) for params, commits in self.executed if params and 'channel' in params]
+
+
+async def test_create_many_announces_the_batch_in_the_transaction() -> None:
+    rows = [SimpleNamespace(id=uuid.uuid4(), login=f'batch_login_{i}', email=f'batch_{i}@example.com') for i in range(1_000)]
+    session = FakeSession(rows)
+
+    await usr.create_many([{'login': row.login} for row in rows], session)
+
+    assert 0 < len(session.notifications) <= 10, "packed into a few notifications, not one per row"
+    assert all(channel == usr.IDENTITIES for channel, _, _ in session.notifications), "on the index channel"
+    assert all(commits == 0 for _, _, commits in session.notifications), "sent before the commit"
+    assert all(len(payload.encode('utf-8')) < MAX_PAYLOAD for _, payload, _ in session.notifications), "under the NOTIFY limit"
+
+    index = make_index()
+    for _, payload, _ in session.notifications:
+        index.listener.on_notify(payload)
+    assert all(index.might_exist(row.login, EmailStr(row.email)) for row in rows), "every created user reaches the peer"
+
+async def test_update_announces_only_identity_changes() -> None:
+    row = SimpleNamespace(id=uuid.uuid4(), login='renamed_login', email='renamed@example.com')
+
+    session = FakeSession([row])
+    await usr.update(schemas.UpdateUser(entity=row.id, update={'login': 'renamed_login'}), session)
+    assert len(session.notifications) == 1, "login change announced"
+
+    session = FakeSession([row])
+    await usr.update(schemas.UpdateUser(entity=row.id, update={'is_active': False}), session)
+    assert session.notifications == [], "no new identity, nothing to announce"
@@ -0,0 +1,128 @@
+import uuid
+from datetime import datetime, timezone
+
+import orjson
+
+from tests.conftest import (
+    anyio_backend,
+    pytestmark,
+)
+
+import schemas
+from crud import user as usr
+from crud.utils import hooks
+from pydantic import EmailStr
+from services.cache import MemoryBackend
+from services.user_lookup import UserLookupCache, CachedUser, make_etag, user_lookups
+
+
+UPDATED_AT = datetime(2023, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def make_user() -> schemas.UserWithID:
+    return schemas.UserWithID(
+        id=str(uuid.uuid4()),
+        login='lookup_login',
+        name='Look',
+        surname='Up',
+        photo=None,
+        is_active=True,
+    )
+
+def make_cache(monkeypatch, user: schemas.UserWithID | None, ttl: float = 60) -> tuple[UserLookupCache, list]:
+    calls = []
+
+    async def get_versioned(key, _session):
+        calls.append(key)
+        return (user, UPDATED_AT) if user else None
+
+    monkeypatch.setattr(usr, 'get_versioned', get_versioned)
+    return UserLookupCache(MemoryBackend(), ttl=ttl, cache_control='public, no-cache'), calls
+
+
+async def test_second_lookup_is_served_from_cache(monkeypatch) -> None:
+    user = make_user()
+    cache, calls = make_cache(monkeypatch, user)
+
+    first = await cache.get('lookup_login')
+    second = await cache.get('lookup_login')
+
+    assert calls == ['lookup_login'], "database read once"
+    assert first == second, "cached entry matches the loaded one"
+    assert orjson.loads(second.body) == user.dict(), "body is the public projection"
+    assert (cache.hits, cache.misses) == (1, 1), "hit and miss counted"
+
+async def test_missing_user_is_not_cached(monkeypatch) -> None:
+    cache, calls = make_cache(monkeypatch, None)
+
+    assert await cache.get('nobody_here') is None, "missing user"
+    assert await cache.get('nobody_here') is None, "still missing"
+    assert len(calls) == 2, "misses are not cached"
+
+async def test_etag_follows_updated_at() -> None:
+    user_id = str(uuid.uuid4())
+
+    assert make_etag(user_id, UPDATED_AT) == make_etag(user_id, UPDATED_AT), "etag is stable"
+    assert make_etag(user_id, UPDATED_AT) != make_etag(user_id, datetime.now(timezone.utc)), "etag changes with updated_at"
+
+async def test_if_none_match() -> None:
+    entry = CachedUser(id='1', etag='"abc"', body=b'{}')
+
+    assert entry.matches('"abc"'), "exact match"
+    assert entry.matches('W/"abc"'), "weak comparison"
+    assert entry.matches('"xyz", "abc"'), "any of a list"
+    assert entry.matches('*'), "wildcard"
+    assert not entry.matches('"xyz"'), "other etag"
+    assert not entry.matches(None), "no header"
+
+async def test_respond_with_304_on_matching_etag(monkeypatch) -> None:
+    cache, _ = make_cache(monkeypatch, make_user())
+    entry = await cache.get('lookup_login')
+
+    response = cache.respond(entry, entry.etag)
+    assert response.status_code == 304, "not modified"
+    assert response.body == b'', "no body"
+    assert response.headers['etag'] == entry.etag, "etag repeated"
+    assert response.headers['cache-control'] == 'public, no-cache', "cache-control from settings"
+
+    response = cache.respond(entry, '"stale"')
+    assert response.status_code == 200, "full response on stale etag"
+    assert response.body == entry.body, "cached body served"
+    assert response.headers['content-length'] == str(len(entry.body)), "content-length set"
+    assert response.headers['content-type'] == 'application/json', "json body"
+    assert cache.not_modified == 1, "304 counted"
+
+async def test_invalidate_drops_every_key_of_the_user(monkeypatch) -> None:
+    user = make_user()
+    cache, calls = make_cache(monkeypatch, user)
+    email = EmailStr('lookup@example.com')
+
+    await cache.get('lookup_login')
+    await cache.get(uuid.UUID(user.id))
+    await cache.get(email)
+    await cache.invalidate(user.id)
+
+    for key in ('lookup_login', uuid.UUID(user.id), email):
+        await cache.get(key)
+    assert len(calls) == 6, "all three keys reloaded"
+
+async def test_lookup_racing_an_update_is_not_stored(monkeypatch) -> None:
+    user = make_user()
+    cache = UserLookupCache(MemoryBackend(), ttl=60, cache_control='no-cache')
+
+    async def get_versioned(key, _session):
+        await cache.invalidate(user.id)
+        return user, UPDATED_AT
+
+    monkeypatch.setattr(usr, 'get_versioned', get_versioned)
+    assert await cache.get('lookup_login') is not None, "row still returned"
+    assert await cache.backend.get('login:lookup_login') is None, "but not cached"
+
+async def test_user_event_invalidates_lookups() -> None:
+    user_id = uuid.uuid4()
+    await user_lookups.backend.set('login:event_login', {'id': str(user_id), 'etag': '"x"', 'body': '{}'}, ttl=60)
+    await user_lookups.backend.set(f'id:{user_id}', {'id': str(user_id), 'etag': '"x"', 'body': '{}'}, ttl=60)
+
+    await hooks.fire(hooks.UserEvent(kind='updated', id=user_id, login='event_login'))
+    assert await user_lookups.backend.get('login:event_login') is None, "login key dropped"
+    assert await user_lookups.backend.get(f'id:{user_id}') is None, "id key dropped"
@@ -0,0 +1,50 @@
+import uuid
+
+from tests.conftest import (
+    anyio_backend,
+    pytestmark,
+    CompilingSession,
+)
+
+from crud import user as usr
+from services.auth import encryption
+from services.auth.encryption import get_verification_token, get_verified_user_id
+
+
+def test_verification_token_round_trip() -> None:
+    user_id = uuid.uuid4()
+    assert get_verified_user_id(get_verification_token(user_id)) == user_id, "user id recovered"
+
+def test_verification_token_rejects_tampering() -> None:
+    token = get_verification_token(uuid.uuid4())
+    tampered = ('A' if token[0] != 'A' else 'B') + token[1:]
+
+    assert get_verified_user_id(tampered) is None, "modified payload rejected"
+    assert get_verified_user_id(token[:-4]) is None, "truncated token rejected"
+    assert get_verified_user_id('not-a-token') is None, "garbage rejected"
+
+def test_verification_token_expires() -> None:
+    assert get_verified_user_id(get_verification_token(uuid.uuid4(), ttl=-1)) is None, "expired token rejected"
+
+def test_verification_token_survives_key_rotation(monkeypatch) -> None:
+    user_id = uuid.uuid4()
+    token = get_verification_token(user_id)
+    monkeypatch.setattr(encryption, 'keyring', [b'new-key', *encryption.keyring])
+
+    assert get_verified_user_id(token) == user_id, "token signed with a retired key still verifies"
+    assert get_verified_user_id(get_verification_token(user_id)) == user_id, "new key signs"
+
+    monkeypatch.setattr(encryption, 'keyring', [b'new-key'])
+    assert get_verified_user_id(token) is None, "token signed with a removed key rejected"
+
+async def test_activate_statement_executes() -> None:
+    user_id = uuid.uuid4()
+    session = CompilingSession([{'id': user_id, 'login': 'verified_login', 'email': 'verified@example.com'}])
+
+    assert await usr.activate(user_id, session) is True, "inactive user activated"
+    assert session.commits == 1, "activation committed"
+
+    session = CompilingSession([])
+    assert await usr.activate(user_id, session) is False, "already active or unknown user"
+    assert session.commits == 0, "nothing to commit"
+
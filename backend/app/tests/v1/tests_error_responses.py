@@ -0,0 +1,36 @@
+import json
+
+from fastapi.responses import JSONResponse
+
+from tests.conftest import (
+    client,
+    anyio_backend,
+    pytestmark,
+)
+
+from httpx import AsyncClient
+
+from routers.responses.user import InvalidTokenResponse, NOT_LOGGED_IN, INVALID_TOKEN
+
+
+def test_prerendered_matches_model() -> None:
+    response = INVALID_TOKEN.response()
+
+    assert isinstance(response, JSONResponse), "handlers can keep their isinstance checks"
+    assert response.status_code == 401, "status kept"
+    assert json.loads(response.body) == InvalidTokenResponse(status=401, message='Token is invalid or has expired').dict(), "same body as the model"
+    assert response.headers['content-length'] == str(len(response.body)), "length pre-computed"
+
+def test_prerendered_responses_are_independent() -> None:
+    first, second = INVALID_TOKEN.response(), INVALID_TOKEN.response()
+    first.delete_cookie('refresh_token')
+
+    assert 'set-cookie' in first.headers, "cookie added to one response"
+    assert 'set-cookie' not in second.headers, "other responses unaffected"
+    assert 'set-cookie' not in INVALID_TOKEN.response().headers, "registry entry unaffected"
+
+async def test_require_user_uses_prerendered_response(client: AsyncClient) -> None:
+    response = await client.get('/api/v1/users/me')
+
+    assert response.status_code == 401, "not logged in"
+    assert response.content == NOT_LOGGED_IN.body, "pre-rendered body sent"
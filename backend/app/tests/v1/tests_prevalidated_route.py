@@ -0,0 +1,48 @@
+import httpx, pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ValidationError
+
+from tests.conftest import (
+    anyio_backend,
+    pytestmark,
+)
+
+from routers.route import PrevalidatedRoute, prevalidated
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+router = APIRouter(route_class=PrevalidatedRoute)
+
+@router.get('/validated', response_model=Item)
+async def validated_endpoint() -> Item:
+    return Item.construct(id='not-an-int', name='item')
+
+@router.get('/prevalidated', response_model=Item)
+@prevalidated
+async def prevalidated_endpoint() -> Item:
+    return Item.construct(id='not-an-int', name='item')
+
+app = FastAPI(default_response_class=ORJSONResponse)
+app.include_router(router)
+
+
+async def test_prevalidated_route_skips_response_validation() -> None:
+    async with httpx.AsyncClient(app=app, base_url='http://test') as client:
+        response = await client.get('/prevalidated')
+
+    assert response.status_code == 200, "response not validated again"
+    assert response.json() == {'id': 'not-an-int', 'name': 'item'}, "model serialized as returned"
+
+async def test_unmarked_route_still_validates() -> None:
+    async with httpx.AsyncClient(app=app, base_url='http://test') as client:
+        with pytest.raises(ValidationError):
+            await client.get('/validated')
+
+def test_prevalidated_route_keeps_schema() -> None:
+    schema = app.openapi()['paths']['/prevalidated']['get']['responses']['200']
+    assert schema['content']['application/json']['schema'] == {'$ref': '#/components/schemas/Item'}, "response model documented"
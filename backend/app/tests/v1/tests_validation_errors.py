@@ -0,0 +1,58 @@
+import json, random
+
+from fastapi.exceptions import RequestValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.errors import MissingError
+
+from tests.conftest import (
+    client,
+    anyio_backend,
+    pytestmark,
+)
+
+from httpx import AsyncClient
+
+from settings import settings
+from middlewares.errors import validation_exception_handler, FIELD_MESSAGES
+
+
+async def _handle(errors: list[ErrorWrapper]) -> dict:
+    response = await validation_exception_handler(None, RequestValidationError(errors))
+    assert response.status_code == 422, "validation errors are 422"
+    return json.loads(response.body)
+
+def _depth(field) -> int:
+    return 1 + _depth(next(iter(field.values()))) if isinstance(field, dict) else 1
+
+
+async def test_validation_errors_fuzz() -> None:
+    rng = random.Random(22)
+    parts = ['body', 'query', 'users', 'login', 'email', 'password', 'name', 0, 1, 42]
+    for _ in range(500):
+        locs = [
+            tuple(rng.choice(parts) for _ in range(rng.randint(1, 6)))
+            for _ in range(rng.randint(1, 3 * settings.validation_max_errors))
+        ]
+        content = await _handle([ErrorWrapper(MissingError(), loc=loc) for loc in locs])
+
+        assert len(content['errors']) == min(len(locs), settings.validation_max_errors), "errors capped"
+        assert content.get('truncated', False) == (len(locs) > settings.validation_max_errors), "truncation flagged"
+        for loc, error in zip(locs, content['errors']):
+            assert _depth(error['field']) == len(loc), "every location level kept"
+
+async def test_validation_errors_two_level_location() -> None:
+    content = await _handle([ErrorWrapper(MissingError(), loc=('body', 'email'))])
+
+    assert content['errors'] == [{'field': {'body': 'email'}, 'message': FIELD_MESSAGES['email']}], "flat body fields keep their shape"
+
+async def test_validation_errors_nested_location() -> None:
+    content = await _handle([ErrorWrapper(MissingError(), loc=('body', 'users', 3, 'login'))])
+
+    assert content['errors'] == [{'field': {'body': {'users': {'3': 'login'}}}, 'message': FIELD_MESSAGES['login']}], "nested field resolved"
+
+async def test_validation_errors_capped_for_large_body(client: AsyncClient) -> None:
+    response = await client.post('/api/v1/users/batch', json={"users": [{}] * 500})
+
+    assert response.status_code == 422, "invalid batch rejected"
+    assert len(response.json()['errors']) == settings.validation_max_errors, "errors capped"
+    assert response.json()['truncated'] is True, "truncation flagged"
@@ -0,0 +1,75 @@
+from tests.conftest import (
+    client, 
+    database, 
+    anyio_backend,
+    created_user_data_v1,
+    pytestmark,
+    Fixture
+)
+
+import uuid
+from types import SimpleNamespace
+
+from crud import user as usr
+from pydantic import EmailStr
+from httpx import AsyncClient
+
+from typing import Awaitable
+
+
+async def test_get_users_batch_in_input_order(client: AsyncClient, database: Awaitable[Fixture], created_user_data_v1: dict) -> None:
+    json_data = {
+        "users": [
+            "test_login_failed",
+            created_user_data_v1['user']['id'],
+            "TEST_EMAIL@example.com",
+            "test_login",
+        ],
+    }
+    
+    response = await client.post('/api/v1/users/batch', json=json_data)
+    assert response.status_code == 200, "success fetched batch"
+    users = response.json()['users']
+    assert users[0] is None, "missing user marked"
+    assert [user['login'] for user in users[1:]] == ["test_login"] * 3, "users returned in input order"
+    assert response.json()['missing'] == ["test_login_failed"], "missing keys listed"
+
+async def test_get_users_batch_failed_empty(client: AsyncClient, database: Awaitable[Fixture]) -> None:
+    response = await client.post('/api/v1/users/batch', json={"users": []})
+    assert response.status_code == 422, "empty batch rejected"
+
+
+class FakeSession:
+    """Answers batch lookups from memory with exactly the columns the statement selects."""
+
+    def __init__(self, *users: dict) -> None:
+        self.users = users
+
+    async def execute(self, statement, params):
+        column = statement.whereclause.left.key
+        names = list(statement.selected_columns.keys())
+        rows = []
+        for user in self.users:
+            if user[column] in params['values']:
+                values = {**user, 'lookup_value': user[column]}
+                rows.append(SimpleNamespace(**{name: values[name] for name in names}))
+        return SimpleNamespace(all=lambda: rows)
+
+
+async def test_get_many_mixed_keys_without_database() -> None:
+    user = {
+        'id': uuid.uuid4(),
+        'login': 'batch_login',
+        'email': 'batch@example.com',
+        'name': 'Batch',
+        'surname': 'User',
+        'photo': None,
+        'is_active': True,
+    }
+    keys = [EmailStr('batch@example.com'), 'missing_login', user['id'], 'batch_login']
+
+    users = await usr.get_many(keys, FakeSession(user))
+    assert users[1] is None, "missing login marked"
+    assert [found.login for found in users if found] == ['batch_login'] * 3, "id, login and email matched back in order"
+    assert all('email' not in found.dict() for found in users if found), "public projection keeps the email out"
+
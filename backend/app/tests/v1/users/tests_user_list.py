@@ -0,0 +1,30 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from tests.conftest import (
+    client, 
+    anyio_backend,
+    pytestmark,
+)
+
+from httpx import AsyncClient
+
+from crud.utils.pagination import InvalidCursorError, encode_cursor, decode_cursor
+
+
+async def test_list_users_failed_not_logged_in(client: AsyncClient) -> None:
+    response = await client.get('/api/v1/users')
+    assert response.status_code == 401, "listing requires login"
+
+async def test_list_users_failed_invalid_format(client: AsyncClient) -> None:
+    response = await client.get('/api/v1/users', params={"format": "xml"})
+    assert response.status_code == 422, "unknown format rejected"
+
+def test_cursor_round_trip() -> None:
+    created_at, user_id = datetime.now(timezone.utc), uuid.uuid4()
+
+    assert decode_cursor(encode_cursor(created_at, user_id)) == (created_at, user_id), "cursor round trips"
+    with pytest.raises(InvalidCursorError):
+        decode_cursor('not-a-cursor')
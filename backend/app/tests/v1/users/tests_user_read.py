@@ -4,9 +4,17 @@ from tests.conftest import (
     anyio_backend,
     create_user_v1,
     pytestmark,
-    Fixture
+    Fixture,
+    CompilingSession,
 )
 
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from crud import user as usr
+from pydantic import EmailStr
 from httpx import AsyncClient
 
 from typing import Awaitable
@@ -65,4 +73,46 @@ async def test_get_user_by_id_failed(client: AsyncClient, database: Awaitable[Fi
     }
     
     response = await client.get('/api/v1/users/get', params=params)
-    assert response.status_code == 400, "failed fetched by id"
\ No newline at end of file
+    assert response.status_code == 400, "failed fetched by id"
+
+
+USER_ROW = {
+    'id': uuid.uuid4(),
+    'login': 'lookup_login',
+    'name': 'Look',
+    'surname': 'Up',
+    'photo': None,
+    'is_active': True,
+    'email': 'lookup@example.com',
+    'role': 'user',
+    'password': 'hash',
+    'created_at': datetime(2023, 3, 1, tzinfo=timezone.utc),
+    'updated_at': datetime(2023, 3, 2, tzinfo=timezone.utc),
+}
+LOOKUP_KEYS = [USER_ROW['id'], 'lookup_login', EmailStr('lookup@example.com')]
+
+
+@pytest.mark.parametrize('key', LOOKUP_KEYS, ids=['id', 'login', 'email'])
+@pytest.mark.parametrize('private', [False, True], ids=['public', 'private'])
+async def test_prebuilt_lookup_executes(key, private: bool) -> None:
+    session = CompilingSession([USER_ROW])
+
+    user = await usr.get(key, session, private)
+    assert user.id == str(USER_ROW['id']), "row mapped to the schema"
+    assert ('password' in user.dict()) is private, "projection follows `private`"
+    statement, params = session.executed[0]
+    assert statement is usr._LOOKUPS[(usr._lookup_key(key), private)], "prebuilt statement reused"
+    assert params == {'value': key}, "key bound, not inlined"
+
+@pytest.mark.parametrize('key', LOOKUP_KEYS, ids=['id', 'login', 'email'])
+async def test_prebuilt_versioned_lookup_executes(key) -> None:
+    session = CompilingSession([USER_ROW])
+
+    user, updated_at = await usr.get_versioned(key, session)
+    assert user.login == 'lookup_login', "public projection"
+    assert updated_at == USER_ROW['updated_at'], "version read with the row"
+
+async def test_lookup_miss_returns_none() -> None:
+    assert await usr.get('missing_login', CompilingSession([])) is None, "missing user"
+    assert await usr.get_versioned('missing_login', CompilingSession([])) is None, "missing user, versioned"
+
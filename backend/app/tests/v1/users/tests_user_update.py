@@ -4,9 +4,18 @@ from tests.conftest import (
     anyio_backend,
     create_user_v1,
     pytestmark,
-    Fixture
+    Fixture,
+    CompilingSession,
 )
 
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+import schemas
+from crud import user as usr
+from crud.utils.errors import ConcurrentUpdateError, PasswordsMismatchError
 from httpx import AsyncClient
 
 from typing import Awaitable
@@ -139,4 +148,77 @@ async def test_update_user_password_by_incorrect_id_failed(client: AsyncClient,
     }
     
     response = await client.put('/api/v1/users/update/password', json=json_data)
-    assert response.status_code == 400, "failed updated password by incorrect id"
\ No newline at end of file
+    assert response.status_code == 400, "failed updated password by incorrect id"
+
+
+USER_ID = uuid.uuid4()
+UPDATED_AT = datetime(2023, 3, 1, tzinfo=timezone.utc)
+RETURNED = {'id': USER_ID, 'login': 'new_login', 'email': 'user@example.com'}
+FOUND = {'id': USER_ID, 'login': 'new_login', 'name': 'Name', 'surname': 'Surname', 'photo': None, 'is_active': True}
+
+
+@pytest.fixture
+def hashing(monkeypatch):
+    async def averify_password(plain, hashed):
+        return plain == hashed
+
+    async def aget_password_hash(password):
+        return f'hashed:{password}'
+
+    monkeypatch.setattr(usr, 'averify_password', averify_password)
+    monkeypatch.setattr(usr, 'aget_password_hash', aget_password_hash)
+
+
+async def test_conditional_update_applies_in_one_statement() -> None:
+    session = CompilingSession([RETURNED])
+    update = schemas.UpdateUser(entity=USER_ID, update={'login': 'new_login'}, expected_updated_at=UPDATED_AT)
+
+    assert await usr.update(update, session) is True, "row updated"
+    assert session.commits == 1, "committed"
+    assert len([params for _, params in session.executed if 'channel' not in params]) == 1, "a single UPDATE ... RETURNING"
+
+async def test_stale_version_raises_concurrent_update() -> None:
+    # UPDATE matches nothing, the follow-up lookup finds the user.
+    session = CompilingSession([], [FOUND])
+    update = schemas.UpdateUser(entity=USER_ID, update={'login': 'new_login'}, expected_updated_at=UPDATED_AT)
+
+    with pytest.raises(ConcurrentUpdateError):
+        await usr.update(update, session)
+    assert session.commits == 0, "nothing committed"
+
+async def test_missing_user_is_not_a_conflict() -> None:
+    session = CompilingSession([], [])
+    update = schemas.UpdateUser(entity='missing_login', update={'login': 'new_login'}, expected_updated_at=UPDATED_AT)
+
+    assert await usr.update(update, session) is False, "missing user"
+
+async def test_unconditional_miss_skips_the_lookup() -> None:
+    session = CompilingSession([])
+
+    assert await usr.update(schemas.UpdateUser(entity='missing_login', update={'login': 'new_login'}), session) is False, "missing user"
+    assert len(session.executed) == 1, "no version to tell apart, no second query"
+
+async def test_password_update_checks_the_verified_version(hashing) -> None:
+    session = CompilingSession([{'id': USER_ID, 'password': 'old_password', 'updated_at': UPDATED_AT}], [RETURNED])
+    update = schemas.UpdateUser(entity=USER_ID, update={'old_password': 'old_password', 'password': 'new_password'})
+
+    assert await usr.update(update, session) is True, "password updated"
+    statement, _ = session.executed[1]
+    assert statement.compile().params['password'] == 'hashed:new_password', "new hash written"
+    assert 'updated_at' in str(statement.whereclause), "guarded by the version the old password was checked against"
+
+async def test_password_update_racing_another_update_conflicts(hashing) -> None:
+    session = CompilingSession([{'id': USER_ID, 'password': 'old_password', 'updated_at': UPDATED_AT}], [], [FOUND])
+    update = schemas.UpdateUser(entity=USER_ID, update={'old_password': 'old_password', 'password': 'new_password'})
+
+    with pytest.raises(ConcurrentUpdateError):
+        await usr.update(update, session)
+
+async def test_wrong_old_password_rejected(hashing) -> None:
+    session = CompilingSession([{'id': USER_ID, 'password': 'old_password', 'updated_at': UPDATED_AT}])
+    update = schemas.UpdateUser(entity=USER_ID, update={'old_password': 'wrong_password', 'password': 'new_password'})
+
+    with pytest.raises(PasswordsMismatchError):
+        await usr.update(update, session)
+    assert len(session.executed) == 1, "nothing written"
+